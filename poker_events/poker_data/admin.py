@@ -1,6 +1,104 @@
 from django.contrib import admin
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
 from .models import Player, Event, EventParticipation
 
-admin.site.register(Player)
-admin.site.register(Event)
-admin.site.register(EventParticipation)
+# Admin-Listen müssen auch mit zehntausenden Zeilen schnell bleiben:
+# - Sortierung entlang vorhandener Indizes, damit LIMIT ohne Sortieren der ganzen Tabelle auskommt
+# - Summen als korrelierte Subqueries, die SQLite nur für die Zeilen der Seite auswertet
+# - Suche nur nach Präfix ('^'): LIKE 'abc%' nutzt den NOCASE-Index auf Player.name
+# - Fremdschlüssel als Autocomplete statt <select> mit allen Spielern/Events
+# - show_full_result_count=False spart das zweite COUNT(*) bei gefilterten Listen
+
+AMOUNT = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _participation_total(outer_field, expression):
+    # SELECT SUM(...) FROM eventparticipation WHERE <outer_field> = outer.id
+    participations = EventParticipation.objects.filter(**{outer_field: OuterRef('pk')}).order_by().values(outer_field)
+    return Subquery(participations.annotate(total=expression).values('total'), output_field=expression.output_field)
+
+
+class ParticipationTotalsMixin:
+    participation_field = None
+
+    def get_queryset(self, request):
+        buy_in = Sum(F('initial_buy_in') + F('re_buy'), output_field=AMOUNT)
+        return super().get_queryset(request).annotate(
+            participations=Coalesce(_participation_total(self.participation_field, Count('id')), 0),
+            total_buy_in=Coalesce(_participation_total(self.participation_field, buy_in), 0, output_field=AMOUNT),
+        )
+
+    @admin.display(description='Participations', ordering='participations')
+    def participation_count(self, obj):
+        return obj.participations
+
+    @admin.display(description='Total buy-in', ordering='total_buy_in')
+    def buy_in_total(self, obj):
+        return obj.total_buy_in
+
+
+@admin.register(Player)
+class PlayerAdmin(ParticipationTotalsMixin, admin.ModelAdmin):
+    participation_field = 'player'
+    list_display = ('name', 'founding_member', 'first_participation', 'participation_count', 'buy_in_total',
+                    'total_earnings')
+    list_filter = ('founding_member',)
+    search_fields = ('^name',)
+    ordering = ('-total_earnings', 'id')  # player_earnings_idx
+    readonly_fields = ('total_earnings',)  # maintained by poker_data/earnings.py
+    show_full_result_count = False
+
+
+@admin.register(Event)
+class EventAdmin(ParticipationTotalsMixin, admin.ModelAdmin):
+    participation_field = 'event'
+    list_display = ('date', 'host_location', 'asop', 'active', 'pot', 'remaining_chips', 'participation_count',
+                    'buy_in_total')
+    list_filter = ('active', 'asop', 'archived')
+    date_hierarchy = 'date'
+    search_fields = ('^host_location',)
+    ordering = ('-date', '-id')  # event_date_idx
+    autocomplete_fields = ('host_player',)
+    readonly_fields = ('remaining_chips', 'archived')  # maintained by the chip ledger and poker_data/archive.py
+    show_full_result_count = False
+
+    def has_change_permission(self, request, obj=None):
+        # Archived events are frozen (Event.save); restore_events brings them back
+        if obj is not None and obj.archived:
+            return False
+        return super().has_change_permission(request, obj)
+
+
+@admin.register(EventParticipation)
+class EventParticipationAdmin(admin.ModelAdmin):
+    list_display = ('player_name', 'event_date', 'initial_buy_in', 're_buy', 'buy_in_total', 'earnings', 'net')
+    # __str__ reads player.name and event.date, so load both with the changelist query
+    list_select_related = ('player', 'event')
+    list_filter = ('event__asop', 'event__active')
+    search_fields = ('^player__name',)
+    ordering = ('-id',)
+    autocomplete_fields = ('player', 'event')
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_total_buy_in().annotate(
+            net=F('earnings') - F('total_buy_in'),
+        )
+
+    @admin.display(description='Player', ordering='player__name')
+    def player_name(self, obj):
+        return obj.player.name
+
+    @admin.display(description='Date', ordering='event__date')
+    def event_date(self, obj):
+        return obj.event.date
+
+    @admin.display(description='Total buy-in', ordering='total_buy_in')
+    def buy_in_total(self, obj):
+        return obj.total_buy_in
+
+    @admin.display(description='Net', ordering='net')
+    def net(self, obj):
+        return obj.net
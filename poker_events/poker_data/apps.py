@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PokerDataConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'poker_data'
+
+    def ready(self):
+        from poker_data import signals  # noqa: F401  Registriert die Signal-Handler
@@ -0,0 +1,207 @@
+# poker_data/archive.py
+"""Archivierung alter, abgerechneter Events.
+
+Beendete und abgerechnete Events, die älter als ``settings.ARCHIVE_AFTER_DAYS`` sind,
+verlassen die heißen Tabellen: ihre Teilnahmen und Ledger-Einträge wandern mit ihren
+IDs nach ``ArchivedParticipation`` und ``ArchivedChipTransaction``. Pro Spieler hält
+``PlayerArchiveTotal`` die Summen der archivierten Teilnahmen (Carry-Forward), die
+earnings.py und die ASOP-Rangliste zu den verbleibenden Teilnahmen addieren. Die
+Perioden-Summen (rollups.py) lesen das Archiv nur für die markierten Spieler mit.
+
+Event, EventSummary und EventResult bleiben stehen; Verlauf, Statistiken und die
+"Last ASOP"-Rangliste lesen ohnehin nur diese. Die Events der Trend-Rangliste und das
+letzte ASOP-Event werden nie archiviert, deren Ranglisten lesen Teilnahmen.
+
+Archivieren ändert keine Summe und keine Rangliste; ``restore`` holt Events zurück
+in die heißen Tabellen, z.B. um Teilnahmen zu korrigieren. Die Zeilen werden in beide
+Richtungen per INSERT ... SELECT innerhalb von SQLite kopiert.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Max, Q, Sum
+from django.utils import timezone
+
+from poker_data import caching, leaderboards
+from poker_data.models import (
+    ArchivedChipTransaction, ArchivedParticipation, ChipTransaction, Event, EventParticipation, PlayerArchiveTotal,
+)
+from poker_data.sqlite import immediate_atomic
+
+ZERO = Decimal('0.00')
+BATCH_SIZE = 200  # events per transaction
+ROW_BATCH_SIZE = 2000
+
+
+def default_cutoff(today=None):
+    return (today or timezone.localdate()) - datetime.timedelta(days=getattr(settings, 'ARCHIVE_AFTER_DAYS', 365))
+
+
+def archivable(cutoff):
+    """Events, die vor ``cutoff`` liegen, beendet und abgerechnet sind und keine Rangliste mehr live speisen."""
+    keep = set(leaderboards.recent_event_ids())
+    last_asop_id = leaderboards.last_asop_event_id()
+    if last_asop_id is not None:
+        keep.add(last_asop_id)
+    return (
+        Event.objects.filter(active=False, archived=False, summary__isnull=False, date__lt=cutoff)
+        .exclude(id__in=keep).order_by('id')
+    )
+
+
+def _archived_totals(event_ids):
+    # Summen der archivierten Teilnahmen der Events, pro Spieler
+    asop = Q(asop=True)
+    return list(
+        ArchivedParticipation.objects.filter(event_id__in=event_ids).values('player_id').annotate(
+            events=Count('id'), total=Sum('earnings'), buy_in=Sum(F('initial_buy_in') + F('re_buy')),
+            asop_events=Count('id', filter=asop), asop_total=Sum('earnings', filter=asop), last=Max('date'),
+        ).order_by()
+    )
+
+
+def _carry_forward(deltas, sign):
+    """Addiert (``sign=1``) oder subtrahiert (``sign=-1``) Summen aus ``_archived_totals`` auf PlayerArchiveTotal.
+
+    Gibt die betroffenen Spieler-IDs zurück.
+    """
+    player_ids = [delta['player_id'] for delta in deltas]
+    totals = PlayerArchiveTotal.objects.in_bulk(player_ids)
+    if sign < 0:
+        # The newest remaining archived event of each player (the restored rows are already gone)
+        last_played = dict(
+            ArchivedParticipation.objects.filter(player_id__in=player_ids).values('player_id')
+            .annotate(last=Max('date')).values_list('player_id', 'last')
+        )
+    to_save, to_delete = [], []
+    for delta in deltas:
+        player_id = delta['player_id']
+        total = totals.get(player_id) or PlayerArchiveTotal(player_id=player_id)
+        total.events += sign * delta['events']
+        total.earnings += sign * (delta['total'] or ZERO)
+        total.buy_in += sign * (delta['buy_in'] or ZERO)
+        total.asop_events += sign * delta['asop_events']
+        total.asop_earnings += sign * (delta['asop_total'] or ZERO)
+        if sign > 0:
+            total.last_played = max(total.last_played or delta['last'], delta['last'])
+        else:
+            total.last_played = last_played.get(player_id)
+        (to_save if total.events > 0 else to_delete).append(total)
+
+    PlayerArchiveTotal.objects.filter(player__in=[total.player_id for total in to_delete]).delete()
+    # INSERT ... ON CONFLICT DO UPDATE; bulk_update's CASE per row is quadratic for thousands of players
+    PlayerArchiveTotal.objects.bulk_create(
+        to_save, batch_size=ROW_BATCH_SIZE, update_conflicts=True, unique_fields=['player'],
+        update_fields=['events', 'earnings', 'buy_in', 'asop_events', 'asop_earnings', 'last_played'],
+    )
+    return set(player_ids)
+
+
+def _copy(sql, event_ids):
+    # INSERT ... SELECT: the rows are copied inside SQLite, without a model instance per row
+    tables = {
+        model.__name__: connection.ops.quote_name(model._meta.db_table)
+        for model in (Event, EventParticipation, ChipTransaction, ArchivedParticipation, ArchivedChipTransaction)
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(events=', '.join(['%s'] * len(event_ids)), **tables), list(event_ids))
+        return cursor.rowcount
+
+
+def _raw_delete(queryset):
+    # delete() would send post_delete per participation (rankings, live stream, totals);
+    # the rows only move to the archive, so nothing they feed changes
+    return queryset._raw_delete(queryset.db)
+
+
+def _archive(event_ids):
+    moved = _copy(
+        'INSERT INTO {ArchivedParticipation} (id, event_id, player_id, date, asop, earnings, initial_buy_in, re_buy) '
+        'SELECT p.id, p.event_id, p.player_id, e.date, e.asop, p.earnings, p.initial_buy_in, p.re_buy '
+        'FROM {EventParticipation} p JOIN {Event} e ON e.id = p.event_id WHERE p.event_id IN ({events})',
+        event_ids,
+    )
+    _copy(
+        'INSERT INTO {ArchivedChipTransaction} (id, event_id, player_id, kind, amount, created_at) '
+        'SELECT id, event_id, player_id, kind, amount, created_at FROM {ChipTransaction} WHERE event_id IN ({events})',
+        event_ids,
+    )
+    _carry_forward(_archived_totals(event_ids), 1)
+
+    _raw_delete(EventParticipation.objects.filter(event_id__in=event_ids))
+    ChipTransaction.objects.filter(event_id__in=event_ids).delete()
+    Event.objects.filter(id__in=event_ids).update(archived=True)  # ohne Signale, siehe Event.save
+    return moved
+
+
+def archive(cutoff=None, event_ids=None):
+    """Archiviert die archivierbaren Events vor ``cutoff`` (Standard: ARCHIVE_AFTER_DAYS).
+
+    Gibt ``(Events, Teilnahmen)`` zurück.
+    """
+    events = archivable(cutoff or default_cutoff())
+    if event_ids is not None:
+        events = events.filter(id__in=event_ids)
+    archived = participations = 0
+    last_id = 0
+    while batch := list(events.filter(id__gt=last_id).values_list('id', flat=True)[:BATCH_SIZE]):
+        with immediate_atomic():
+            participations += _archive(batch)
+            caching.bump_on_commit(caching.DATA)
+        archived += len(batch)
+        last_id = batch[-1]
+    return archived, participations
+
+
+def _restore(event_ids):
+    deltas = _archived_totals(event_ids)
+    moved = _copy(
+        'INSERT INTO {EventParticipation} (id, event_id, player_id, earnings, initial_buy_in, re_buy) '
+        'SELECT id, event_id, player_id, earnings, initial_buy_in, re_buy FROM {ArchivedParticipation} '
+        'WHERE event_id IN ({events})',
+        event_ids,
+    )
+    _copy(
+        'INSERT INTO {ChipTransaction} (id, event_id, player_id, kind, amount, created_at) '
+        'SELECT id, event_id, player_id, kind, amount, created_at FROM {ArchivedChipTransaction} '
+        'WHERE event_id IN ({events})',
+        event_ids,
+    )
+    ArchivedParticipation.objects.filter(event_id__in=event_ids).delete()
+    ArchivedChipTransaction.objects.filter(event_id__in=event_ids).delete()
+    _carry_forward(deltas, -1)
+    Event.objects.filter(id__in=event_ids).update(archived=False)
+    return moved
+
+
+def restore(event_ids=None):
+    """Holt archivierte Events zurück (ohne IDs alle); gibt ``(Events, Teilnahmen)`` zurück."""
+    events = Event.objects.filter(archived=True).order_by('id')
+    if event_ids is not None:
+        events = events.filter(id__in=event_ids)
+    restored = participations = 0
+    last_id = 0
+    while batch := list(events.filter(id__gt=last_id).values_list('id', flat=True)[:BATCH_SIZE]):
+        with immediate_atomic():
+            participations += _restore(batch)
+            caching.bump_on_commit(caching.DATA)
+        restored += len(batch)
+        last_id = batch[-1]
+    return restored, participations
+
+
+def forget(event):
+    """Nimmt die Teilnahmen eines archivierten Events, das gelöscht wird, aus dem Carry-Forward."""
+    deltas = _archived_totals([event.pk])
+    ArchivedParticipation.objects.filter(event_id=event.pk).delete()
+    return _carry_forward(deltas, -1)
+
+
+def vacuum():
+    """Gibt den Platz der verschobenen Zeilen an das Dateisystem zurück (nicht in einer Transaktion)."""
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+        cursor.execute('ANALYZE')
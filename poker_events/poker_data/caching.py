@@ -0,0 +1,56 @@
+# poker_data/caching.py
+"""Versionierte Cache-Keys.
+
+Statt einzelne Keys zu löschen, wird pro Namensraum eine Versionsnummer im Cache gehalten
+und bei Schreibzugriffen hochgezählt. Alle Keys mit der alten Version werden damit
+ungültig und laufen im Cache einfach aus.
+
+Die Versionen gehen auch in die ETags der Views ein. Ein leerer Cache (Neustart, anderer
+Worker mit eigenem LocMemCache) beginnt deshalb nicht bei 1, sondern bei einem
+eindeutigen Startwert; sonst könnte ein altes ETag wieder passen und ein 304 liefern.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+ACTIVE_EVENTS = 'active_events'  # Event.active, für den Context-Processor
+DATA = 'data'  # alle Daten der Startseite (Spieler, Events, Teilnahmen, Chips)
+
+
+def _version_key(namespace):
+    return f'poker_data:{namespace}:version'
+
+
+def _modified_key(namespace):
+    return f'poker_data:{namespace}:modified'
+
+
+def get_version(namespace):
+    return cache.get_or_set(_version_key(namespace), time.time_ns, timeout=None)
+
+
+def last_modified(namespace):
+    return cache.get_or_set(_modified_key(namespace), timezone.now, timeout=None)
+
+
+def bump_version(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # Key fehlt (z.B. nach einem Neustart des Caches)
+        cache.set(_version_key(namespace), time.time_ns(), timeout=None)
+    cache.set(_modified_key(namespace), timezone.now(), timeout=None)
+
+
+def bump_on_commit(*namespaces):
+    """Zählt die Versionen erst nach dem Commit hoch, damit kein Request den alten Stand neu cacht."""
+    def bump():
+        for namespace in namespaces:
+            bump_version(namespace)
+    transaction.on_commit(bump)
+
+
+def versioned_key(namespace, name):
+    return f'poker_data:{namespace}:{get_version(namespace)}:{name}'
@@ -0,0 +1,80 @@
+# poker_data/chips.py
+"""Chip-Bewegungen eines Events.
+
+Jede Änderung an ``Event.remaining_chips`` läuft über diese Funktionen: sie schreiben
+``ChipTransaction``-Einträge und passen remaining_chips mit einem einzigen
+``UPDATE ... SET remaining_chips = remaining_chips + delta`` an. Das UPDATE steht am
+Anfang der Transaktion und sperrt damit die Event-Zeile, bis die Ledger-Einträge
+geschrieben sind; gleichzeitige Re-Buys können sich so nicht gegenseitig überschreiben.
+Auf SQLite beginnt die Transaktion mit BEGIN IMMEDIATE (siehe sqlite.py).
+"""
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Value, When
+
+from poker_data import caching, earnings, live, rollups, settlement
+from poker_data.sqlite import immediate_atomic
+from poker_data.models import ChipTransaction, Event, EventParticipation
+
+
+class InsufficientChips(Exception):
+    pass
+
+
+def apply_transactions(event_id, transactions, check_remaining=False):
+    """Schreibt Ledger-Einträge und passt remaining_chips atomar an.
+
+    Mit ``check_remaining=True`` schlägt die Buchung fehl (InsufficientChips), wenn der Pot
+    nicht genug Chips hat; die Prüfung passiert im selben UPDATE.
+    """
+    transactions = [t for t in transactions if t.amount]
+    if not transactions:
+        return Decimal('0.00')
+    delta = sum(t.signed_amount for t in transactions)
+
+    # Inside re_buy/registration no savepoint: a failed booking rolls back the whole transaction anyway
+    with immediate_atomic(savepoint=False):
+        events = Event.objects.filter(pk=event_id)
+        if check_remaining and delta < 0:
+            events = events.filter(remaining_chips__gte=-delta)
+        if not events.update(remaining_chips=F('remaining_chips') + delta):
+            raise InsufficientChips("Nicht genügend Chips im Event für diese Buchung!")
+        ChipTransaction.objects.bulk_create(transactions)
+        caching.bump_on_commit(caching.DATA)
+        live.notify(event_id)
+    return delta
+
+
+def re_buy(event_id, amounts):
+    """Bucht Re-Buys ``{player_id: amount}`` für die Teilnehmer eines Events."""
+    amounts = {player_id: amount for player_id, amount in amounts.items() if amount > 0}
+    if not amounts:
+        return Decimal('0.00')
+
+    with immediate_atomic():
+        delta = apply_transactions(event_id, [
+            ChipTransaction(event_id=event_id, player_id=player_id, kind=ChipTransaction.RE_BUY, amount=amount)
+            for player_id, amount in amounts.items()
+        ], check_remaining=True)
+
+        # Ein UPDATE für alle Spieler: re_buy = re_buy + CASE player_id WHEN ... END
+        updated = EventParticipation.objects.filter(event_id=event_id, player_id__in=amounts).update(
+            re_buy=F('re_buy') + Case(
+                *[When(player_id=player_id, then=Value(amount)) for player_id, amount in amounts.items()],
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+        )
+        if updated != len(amounts):
+            raise EventParticipation.DoesNotExist("Re-Buy für Spieler ohne Teilnahme an diesem Event.")
+        # update() sendet keine Signale; von re_buy hängen nur die Buy-In-Summen der Rollups ab
+        if not rollups.add_buy_in(event_id, amounts):
+            earnings.mark_dirty(amounts)
+        settlement.mark_stale([event_id])  # a settled event is settled again after the commit
+    return -delta
+
+
+def cash_out(event_id, player_id, amount):
+    """Ein Spieler gibt Chips an den Pot zurück."""
+    return apply_transactions(event_id, [
+        ChipTransaction(event_id=event_id, player_id=player_id, kind=ChipTransaction.CASH_OUT, amount=amount),
+    ])
@@ -1,7 +1,24 @@
 # poker_data/context_processors.py
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from poker_data.caching import ACTIVE_EVENTS, versioned_key
 from poker_data.models import Event
 
+ACTIVE_EVENTS_TIMEOUT = 300
+
+
+def active_events_exist():
+    # Cached per Event version, signals.py bumps the version on every Event save/delete
+    return cache.get_or_set(
+        versioned_key(ACTIVE_EVENTS, 'exist'),
+        lambda: Event.objects.filter(active=True).exists(),
+        timeout=ACTIVE_EVENTS_TIMEOUT,
+    )
+
+
 def active_events_status(request):
+    # Lazy: templates that never read active_events_exist do not touch cache or database
     return {
-        'active_events_exist': Event.objects.filter(active=True).exists()
+        'active_events_exist': SimpleLazyObject(active_events_exist)
     }
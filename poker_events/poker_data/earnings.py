@@ -0,0 +1,67 @@
+# poker_data/earnings.py
+"""Neuberechnung von Player.total_earnings, Player.last_played und der Perioden-Summen (rollups.py).
+
+Schreibzugriffe auf Teilnahmen markieren den Spieler nur als "dirty". Nach dem Commit
+werden alle markierten Spieler mit einem einzigen gruppierten UPDATE neu berechnet, egal
+wie viele Teilnahmen in der Transaktion gespeichert wurden.
+"""
+import threading
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from poker_data import caching, rollups
+from poker_data.models import EventParticipation, Player, PlayerArchiveTotal
+
+_state = threading.local()
+
+
+def _pending():
+    if not hasattr(_state, 'player_ids'):
+        _state.player_ids = set()
+    return _state.player_ids
+
+
+def recompute(player_ids=None):
+    """Setzt total_earnings und last_played per UPDATE ... = (SELECT SUM(earnings), MAX(date) ...).
+
+    Ohne IDs für alle Spieler.
+    """
+    participations = EventParticipation.objects.filter(player=OuterRef('pk')).values('player')
+    earnings = participations.annotate(total=Sum('earnings')).values('total')
+    last_played = Subquery(participations.annotate(last=Max('event__date')).values('last'))
+    # Archivierte Events zählen über die eine Carry-Forward-Zeile mit (siehe archive.py)
+    carried = PlayerArchiveTotal.objects.filter(player=OuterRef('pk'))
+    carried_last_played = Subquery(carried.values('last_played'))
+    players = Player.objects.all() if player_ids is None else Player.objects.filter(pk__in=player_ids)
+    updated = players.update(
+        total_earnings=(
+            Coalesce(Subquery(earnings), Decimal('0')) + Coalesce(Subquery(carried.values('earnings')), Decimal('0'))
+        ),
+        # SQLite's max(a, b) is NULL as soon as one side is NULL
+        last_played=Greatest(Coalesce(last_played, carried_last_played), Coalesce(carried_last_played, last_played)),
+    )
+    caching.bump_on_commit(caching.DATA)
+    return updated
+
+
+def _flush():
+    # Every mark_dirty registers this callback; the first one per commit does all the work
+    pending = _pending()
+    if pending:
+        player_ids = set(pending)
+        pending.clear()
+        recompute(player_ids)
+        rollups.recompute(player_ids)
+
+
+def mark_dirty(player_ids):
+    """Merkt Spieler für die Neuberechnung nach dem Commit vor.
+
+    Wird die Transaktion zurückgerollt, bleiben die IDs vorgemerkt und werden beim
+    nächsten Commit mit berechnet; das ist harmlos, die Berechnung ist idempotent.
+    """
+    _pending().update(player_ids)
+    transaction.on_commit(_flush)
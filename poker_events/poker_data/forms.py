@@ -1,2 +1,38 @@
 #TODO Player delete while creating new event - disable
-#TODO Event only to choose when active
\ No newline at end of file
+#TODO Event only to choose when active
+from django.core.exceptions import ValidationError
+from django.forms import BaseModelFormSet, ModelChoiceField
+
+
+class LoadedChoiceField(ModelChoiceField):
+    """Verstecktes ``id``-Feld, das die Instanz aus bereits geladenen Objekten nimmt statt per Query."""
+
+    def __init__(self, objects, *args, **kwargs):
+        self.objects = objects  # {str(pk): instance}
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objects[str(getattr(value, 'pk', value))]
+        except KeyError:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
+class LoadedModelFormSet(BaseModelFormSet):
+    """Model-Formset, dessen Formulare ihre Instanz aus dem einmal geladenen Queryset nehmen.
+
+    Django prüft das versteckte ``id`` jedes Formulars mit einem eigenen SELECT, bei N
+    Zeilen also N Queries; hier kommen alle aus der einen Query des Formsets.
+    """
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if not hasattr(self, '_loaded'):
+            self._loaded = {str(obj.pk): obj for obj in self.get_queryset()}
+        name = self._pk_field.name
+        field = form.fields[name]
+        form.fields[name] = LoadedChoiceField(
+            self._loaded, field.queryset, initial=field.initial, required=False, widget=field.widget,
+        )
@@ -0,0 +1,229 @@
+# poker_data/leaderboards.py
+"""Materialisierte Ranglisten für die Startseite.
+
+Die Tabellen in ``LeaderboardEntry`` werden über die Signale in ``signals.py``
+inkrementell gepflegt. Die All-Time-Rangliste braucht keine eigene Tabelle,
+dafür gibt es bereits ``Player.total_earnings``.
+
+Gelesen werden die Ranglisten seitenweise per Keyset-Pagination: sortiert nach
+``(-earnings, player_id)``, die nächste Seite beginnt hinter dem letzten Eintrag der
+vorherigen (Cursor ``"<earnings>:<player_id>"``). So liest jede Seite nur ihre eigenen
+Zeilen aus dem Index, ohne OFFSET.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils.functional import cached_property
+
+from poker_data.models import (
+    ArchivedParticipation, Event, EventParticipation, EventResult, LeaderboardEntry, Player, PlayerArchiveTotal,
+)
+
+TOP = 'top'  # All-Time-Rangliste aus Player.total_earnings
+BOARDS = [TOP] + [board for board, _ in LeaderboardEntry.BOARD_CHOICES]
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def trend_event_count():
+    return getattr(settings, 'TREND_EVENT_COUNT', 3)
+
+
+def recent_event_ids(count=None):
+    # The last TREND_EVENT_COUNT events by date feed the "Trending Players" board
+    return list(Event.objects.order_by('-date').values_list('id', flat=True)[:count or trend_event_count()])
+
+
+def last_asop_event():
+    """``(id, active)`` des letzten ASOP-Events oder None."""
+    return Event.objects.filter(asop=True).order_by('-date').values_list('id', 'active').first()
+
+
+def last_asop_event_id():
+    event = last_asop_event()
+    return event[0] if event else None
+
+
+def _replace_board(board, participations):
+    """Ersetzt alle Zeilen einer Rangliste durch die aggregierten Teilnahmen."""
+    rows = participations.values('player_id').annotate(total=Sum('earnings')).values_list('player_id', 'total')
+    _write_board(board, rows)
+
+
+def _write_board(board, rows):
+    # No savepoint when called inside a write (registration, settlement), the outer transaction covers it
+    with transaction.atomic(savepoint=False):
+        LeaderboardEntry.objects.filter(board=board).delete()
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(board=board, player_id=player_id, earnings=total or 0)
+            for player_id, total in rows
+        ])
+
+
+def rebuild_trend(event_ids=None):
+    if event_ids is None:
+        event_ids = recent_event_ids()
+    # Reicht das Fenster in archivierte Events (größeres TREND_EVENT_COUNT, neuere Events gelöscht),
+    # kommen deren Teilnahmen aus dem Archiv, wie in rollups.py
+    hot, archived = [
+        participations.filter(event_id__in=event_ids).values('player_id')
+        .annotate(total=Sum('earnings')).values_list('player_id', 'total').order_by()
+        for participations in (EventParticipation.objects, ArchivedParticipation.objects)
+    ]
+    totals = {}
+    for player_id, total in hot.union(archived, all=True):
+        totals[player_id] = totals.get(player_id, 0) + (total or 0)
+    _write_board(LeaderboardEntry.TREND, totals.items())
+
+
+def _asop_totals(player_ids=None):
+    # Teilnahmen plus Carry-Forward der archivierten Events (archive.py), in einer Query
+    participations = EventParticipation.objects.filter(event__asop=True)
+    carried = PlayerArchiveTotal.objects.filter(asop_events__gt=0)
+    if player_ids is not None:
+        participations = participations.filter(player_id__in=player_ids)
+        carried = carried.filter(player_id__in=player_ids)
+    totals = {}
+    for player_id, total in (
+        participations.values('player_id').annotate(total=Sum('earnings')).values_list('player_id', 'total')
+        .order_by().union(carried.values_list('player_id', 'asop_earnings').order_by(), all=True)
+    ):
+        totals[player_id] = totals.get(player_id, 0) + (total or 0)
+    return totals
+
+
+def rebuild_asop():
+    _write_board(LeaderboardEntry.ASOP, _asop_totals().items())
+
+
+def rebuild_last_asop(event_id=None):
+    # With an explicit event_id its participations just changed: read them, not the settled results
+    settled = False
+    if event_id is None:
+        event_id, active = last_asop_event() or (None, True)
+        settled = not active
+    # Abgerechnete Events haben genau eine Ergebniszeile pro Spieler, ohne Aggregat
+    rows = list(EventResult.objects.filter(event_id=event_id).values_list('player_id', 'earnings')) if settled else []
+    if rows:
+        _write_board(LeaderboardEntry.LAST_ASOP, rows)
+    else:
+        _replace_board(LeaderboardEntry.LAST_ASOP, EventParticipation.objects.filter(event_id=event_id))
+
+
+def rebuild_all():
+    rebuild_trend()
+    rebuild_asop()
+    rebuild_last_asop()
+
+
+def refresh_asop_players(player_ids):
+    """Berechnet nur die ASOP-Zeilen der betroffenen Spieler neu."""
+    player_ids = set(player_ids)
+    if not player_ids:
+        return
+    totals = _asop_totals(player_ids)
+    with transaction.atomic(savepoint=False):
+        LeaderboardEntry.objects.filter(board=LeaderboardEntry.ASOP, player_id__in=player_ids).delete()
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(board=LeaderboardEntry.ASOP, player_id=player_id, earnings=total or 0)
+            for player_id, total in totals.items()
+        ])
+
+
+def refresh_for_participations(player_ids, event_ids):
+    """Aktualisiert die Ranglisten nach Änderungen an Teilnahmen der angegebenen Spieler/Events."""
+    event_ids = set(event_ids)
+    if not event_ids:
+        return
+    asop_event_ids = set(Event.objects.filter(id__in=event_ids, asop=True).values_list('id', flat=True))
+    if asop_event_ids:
+        refresh_asop_players(player_ids)
+        last_asop_id = last_asop_event_id()
+        if last_asop_id in asop_event_ids:
+            rebuild_last_asop(last_asop_id)
+    recent_ids = recent_event_ids()
+    if event_ids & set(recent_ids):
+        rebuild_trend(recent_ids)
+
+
+def refresh_for_event_change(event, asop_changed=True):
+    """Ein Event wurde angelegt, gelöscht oder hat Datum/ASOP geändert."""
+    rebuild_trend()
+    rebuild_last_asop()
+    if asop_changed and event.pk is not None:
+        refresh_asop_players(
+            EventParticipation.objects.filter(event_id=event.pk).values_list('player_id', flat=True)
+        )
+
+
+def ranking(board):
+    """Sortierte Rangliste als ``values()``-Zeilen mit player_id, name und earnings."""
+    if board == TOP:
+        queryset = Player.objects.annotate(player_id=F('id'), earnings=F('total_earnings'))
+    elif board in BOARDS:
+        queryset = LeaderboardEntry.objects.filter(board=board).annotate(name=F('player__name'))
+    else:
+        raise KeyError(board)
+    return queryset.order_by('-earnings', 'player_id').values('player_id', 'name', 'earnings')
+
+
+def encode_cursor(row):
+    return f"{row['earnings']}:{row['player_id']}"
+
+
+def decode_cursor(cursor):
+    try:
+        earnings, player_id = cursor.split(':')
+        earnings, player_id = Decimal(earnings), int(player_id)
+    except (ValueError, InvalidOperation):
+        raise InvalidCursor(cursor)
+    if not earnings.is_finite():
+        raise InvalidCursor(cursor)
+    return earnings, player_id
+
+
+def seek(queryset, cursor):
+    """Alle Zeilen hinter dem Cursor; ``earnings__lte`` gibt dem Index einen Startpunkt."""
+    earnings, player_id = decode_cursor(cursor)
+    return queryset.filter(
+        Q(earnings__lt=earnings) | Q(earnings=earnings, player_id__gt=player_id),
+        earnings__lte=earnings,
+    )
+
+
+class Page:
+    """Eine Seite einer Rangliste; die Query läuft erst beim ersten Zugriff auf ``rows``."""
+
+    def __init__(self, board, after=None, limit=PAGE_SIZE):
+        self.board = board
+        self.after = after
+        self.limit = max(1, min(limit, MAX_PAGE_SIZE))
+        self.queryset = ranking(board)
+        if after:
+            self.queryset = seek(self.queryset, after)
+
+    @cached_property
+    def _rows(self):
+        # Eine Zeile mehr laden, um zu wissen, ob es eine nächste Seite gibt
+        return list(self.queryset[:self.limit + 1])
+
+    def load(self):
+        """Führt die Query sofort aus und gibt die Seite zurück."""
+        self._rows
+        return self
+
+    @property
+    def rows(self):
+        return self._rows[:self.limit]
+
+    @property
+    def next_cursor(self):
+        if len(self._rows) > self.limit:
+            return encode_cursor(self.rows[-1])
+        return None
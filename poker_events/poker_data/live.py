@@ -0,0 +1,93 @@
+# poker_data/live.py
+"""Live-Updates aktiver Events als Server-Sent Events.
+
+Schreibzugriffe (Chips, Teilnahmen, Event beendet) melden das betroffene Event über
+``notify(event_id)``. Nach dem Commit wird ein Snapshot des Events an alle offenen
+Streams verteilt. Der Broadcaster lebt im Prozess: mit mehreren Worker-Prozessen
+sieht ein Stream nur die Änderungen seines eigenen Prozesses.
+"""
+import asyncio
+import json
+import threading
+
+from django.db import transaction
+
+from poker_data.models import Event, EventParticipation
+
+QUEUE_SIZE = 100
+
+
+class Broadcaster:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, message):
+        # Called from sync code in worker threads; hand the message to each stream's event loop
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, message)
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe((loop, queue))
+
+    @staticmethod
+    def _put(queue, message):
+        if queue.full():
+            queue.get_nowait()  # slow client: drop the oldest update, the next snapshot is complete anyway
+        queue.put_nowait(message)
+
+
+broadcaster = Broadcaster()
+
+
+def event_snapshot(event_id):
+    """Aktueller Stand eines Events: verbleibende Chips und Spieler mit Buy-In."""
+    event = Event.objects.filter(id=event_id).values('id', 'active', 'pot', 'remaining_chips').first()
+    if event is None:
+        return {'id': event_id, 'active': False, 'deleted': True}
+    participations = (
+        EventParticipation.objects.filter(event_id=event_id).with_total_buy_in()
+        .order_by('id').values('player_id', 'player__name', 'total_buy_in')
+    )
+    return {
+        'id': event['id'],
+        'active': event['active'],
+        'pot': str(event['pot']),
+        'remaining_chips': str(event['remaining_chips']),
+        'players': [
+            {'id': p['player_id'], 'name': p['player__name'], 'total_buy_in': str(p['total_buy_in'])}
+            for p in participations
+        ],
+    }
+
+
+def format_sse(snapshot):
+    return f"event: event\ndata: {json.dumps(snapshot)}\n\n"
+
+
+def notify(event_id):
+    """Schickt nach dem Commit einen Snapshot des Events an alle Streams."""
+    if not broadcaster.has_subscribers():
+        return
+
+    def publish():
+        if broadcaster.has_subscribers():
+            broadcaster.publish(format_sse(event_snapshot(event_id)))
+
+    transaction.on_commit(publish)
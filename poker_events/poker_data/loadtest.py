@@ -0,0 +1,150 @@
+# poker_data/loadtest.py
+"""Lastgenerator für einen Spielabend, für ``python manage.py load_test``.
+
+Simuliert die Telefone der Spieler gegen einen laufenden Server über echtes HTTP:
+der Organisator legt ein Event an und meldet Spieler an, danach fragt jedes Telefon
+in einem eigenen Thread regelmäßig die Startseite und die Rangliste ab. In
+festen Abständen buchen alle Telefone gleichzeitig einen Re-Buy (Pause zwischen den
+Händen), zum Schluss beendet der Organisator das Event.
+
+Jedes Telefon hat seine eigenen Cookies (Session, CSRF-Token) und öffnet pro Request
+eine neue Verbindung. Gemessen wird pro URL-Name und Methode: Latenz, Statuscodes
+und Verbindungsfehler.
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+
+TIMEOUT = 30  # seconds per request
+
+
+class Recorder:
+    """Sammelt ``(Sekunden, Status)`` pro ``"<url_name> <METHOD>"``; Status None = Verbindungsfehler."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, status):
+        with self._lock:
+            self.samples.setdefault(name, []).append((elapsed, status))
+
+
+class Session:
+    """Ein Telefon: eigene Cookies, eine Verbindung pro Request wie bei einem Browser ohne Keep-Alive."""
+
+    def __init__(self, base_url, recorder):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.recorder = recorder
+        self.cookies = {}
+
+    def request(self, method, path, data=None, json_data=None):
+        headers = {'Host': f'{self.host}:{self.port}', 'Accept': 'text/html,application/json'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={value}' for key, value in self.cookies.items())
+        body = None
+        if method == 'POST':
+            headers['X-CSRFToken'] = self.cookies.get('csrftoken', '')
+            if json_data is not None:
+                body, headers['Content-Type'] = json.dumps(json_data), 'application/json'
+            else:
+                body, headers['Content-Type'] = urlencode(data or {}, doseq=True), 'application/x-www-form-urlencoded'
+
+        try:
+            name = f"{resolve(urlsplit(path).path).url_name} {method}"
+        except Resolver404:
+            name = f"{path} {method}"
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=TIMEOUT)
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException):
+            self.recorder.record(name, time.perf_counter() - started, None)
+            return None, {}, b''
+        finally:
+            connection.close()
+        self.recorder.record(name, time.perf_counter() - started, response.status)
+
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for key, morsel in SimpleCookie(header).items():
+                self.cookies[key] = morsel.value
+        return response.status, response.headers, content
+
+
+class EventNightError(RuntimeError):
+    pass
+
+
+def _expect(result, *statuses):
+    status, headers, content = result
+    if status not in statuses:
+        raise EventNightError(f"Unexpected status {status}: {content[:200]!r}")
+    return headers, content
+
+
+def event_night(base_url, phones=20, seconds=30, think=1.0, rebuy_every=10.0, entrants=None, seed=None,
+                recorder=None):
+    """Spielt einen Spielabend gegen ``base_url``; gibt ``(Recorder, Event-ID, Sekunden)`` zurück."""
+    recorder = recorder or Recorder()
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    # The organizer creates the event and registers the players
+    organizer = Session(base_url, recorder)
+    _expect(organizer.request('GET', reverse('home')), 200)
+    _expect(organizer.request('GET', reverse('add_event')), 200)
+    headers, _ = _expect(organizer.request('POST', reverse('add_event'), {
+        'host_location': 'Load test', 'date': timezone.localdate().isoformat(),
+        'pot': '1000000', 'active': 'on', 'asop': 'on',
+    }), 302)
+    event_id = resolve(urlsplit(headers['Location']).path).kwargs['event_id']
+
+    _, content = _expect(organizer.request(
+        'GET', f"{reverse('player_search_api')}?limit={entrants or phones}"
+    ), 200)
+    player_ids = [player['id'] for player in json.loads(content)['players']]
+    if not player_ids:
+        raise EventNightError("No players to register")
+    _expect(organizer.request('POST', reverse('add_players_api', args=[event_id]), json_data={
+        'players': [{'player_id': player_id, 'initial_buy_in': '20'} for player_id in player_ids],
+    }), 200)
+
+    # Every phone polls the home page and the ranking; at each re-buy break all phones book at once
+    deadline = time.perf_counter() + seconds
+    first_break = time.perf_counter() + rebuy_every
+
+    def phone(index, seed):
+        rng = random.Random(seed)
+        session = Session(base_url, recorder)
+        player_id = player_ids[index % len(player_ids)]
+        next_break = first_break
+        session.request('GET', reverse('home'))
+        while time.perf_counter() < deadline:
+            time.sleep(think * rng.uniform(0.5, 1.5))
+            if time.perf_counter() >= next_break:
+                session.request('POST', reverse('re_buy_api', args=[event_id]),
+                                json_data={'re_buys': {str(player_id): '10'}})
+                next_break += rebuy_every
+            elif rng.random() < 0.2:
+                session.request('GET', reverse('leaderboard_api', args=['top']))
+            else:
+                session.request('GET', reverse('home'))
+
+    threads = [threading.Thread(target=phone, args=(i, rng.random())) for i in range(phones)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    _expect(organizer.request('GET', reverse('end_event', args=[event_id])), 302)
+    return recorder, event_id, time.perf_counter() - started
@@ -0,0 +1,32 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from poker_data import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves the participations and chip ledger of settled events older than the cutoff into the '
+        'archive tables. Per-player carry-forward totals keep all rankings unchanged.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=datetime.date.fromisoformat,
+                            help='Archive events before this date (YYYY-MM-DD); default: ARCHIVE_AFTER_DAYS ago.')
+        parser.add_argument('--event', type=int, action='append', dest='events',
+                            help='Only archive this event id (repeatable).')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Run VACUUM and ANALYZE afterwards to shrink the database file.')
+
+    def handle(self, *args, **options):
+        cutoff = options['before'] or archive.default_cutoff()
+        if options['events'] and not options['before']:
+            cutoff = datetime.date.max
+        events, participations = archive.archive(cutoff, options['events'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {events} event(s) with {participations} participation(s) before {cutoff}."
+        ))
+        if options['vacuum']:
+            archive.vacuum()
+            self.stdout.write("Database compacted.")
@@ -0,0 +1,100 @@
+import datetime
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from poker_data import archive, earnings, leaderboards, rollups, synthetic
+from poker_data.management.commands.benchmark_views import percentile
+from poker_data.models import Event, EventParticipation, LeaderboardEntry, Player
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the queries that read the participation history (total_earnings, ASOP and trend rankings, '
+        'period rollups, standings, cold home page) on a throw-away database with synthetic data, '
+        'before and after archiving the events older than --keep-days.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=2000)
+        parser.add_argument('--events', type=int, default=1000, help='One per week, so 1000 is about 19 years.')
+        parser.add_argument('--participations', type=int, default=100000)
+        parser.add_argument('--keep-days', type=int, default=365, help='Events newer than this stay hot.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            synthetic.generate(
+                players=options['players'], events=options['events'],
+                participations=options['participations'], seed=options['seed'],
+            )
+            self.sample_players = list(Player.objects.order_by('id').values_list('id', flat=True)[::50])
+            hot_before = EventParticipation.objects.count()
+            before = self.measure(options)
+            ranking_before = self.rankings()
+
+            cutoff = Event.objects.latest('date').date - datetime.timedelta(days=options['keep_days'])
+            started = time.perf_counter()
+            events, participations = archive.archive(cutoff)
+            archive_seconds = time.perf_counter() - started
+            archive.vacuum()
+
+            hot_after = EventParticipation.objects.count()
+            after = self.measure(options)
+            assert self.rankings() == ranking_before, 'archiving changed a ranking'
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"Archived {events} events / {participations} participations before {cutoff} "
+            f"in {archive_seconds * 1000:.0f} ms; rankings unchanged\n"
+            f"hot participations: {hot_before} before, {hot_after} after\n"
+            f"{'query':<28} {'before ms':>10} {'after ms':>10}"
+        )
+        for name in before:
+            self.stdout.write(f"{name:<28} {before[name] * 1000:>10.2f} {after[name] * 1000:>10.2f}")
+
+    def rankings(self):
+        return (
+            list(Player.objects.order_by('id').values_list('id', 'total_earnings', 'last_played')),
+            list(LeaderboardEntry.objects.order_by('board', 'player_id').values_list('board', 'player_id', 'earnings')),
+            list(rollups.period_ranking('year', Event.objects.earliest('date').date, limit=100)),
+        )
+
+    def measure(self, options):
+        client = Client()
+        today = Event.objects.latest('date').date
+
+        def home():
+            cache.clear()
+            assert client.get(reverse('home')).status_code == 200
+
+        hot_queries = {
+            'recompute all earnings': earnings.recompute,
+            'recompute player earnings': lambda: earnings.recompute(self.sample_players),
+            'rebuild ASOP ranking': leaderboards.rebuild_asop,
+            'refresh ASOP players': lambda: leaderboards.refresh_asop_players(self.sample_players),
+            'recompute player rollups': lambda: rollups.recompute(self.sample_players),
+            'standings last 10 events': lambda: rollups.last_events_ranking(10),
+            'standings last 45 days': lambda: rollups.range_ranking(today - datetime.timedelta(days=45), today),
+            'home (cold cache)': home,
+        }
+        results = {}
+        for name, func in hot_queries.items():
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            results[name] = percentile(timings, 50)
+        return results
@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from poker_data import chips, leaderboards, live, synthetic
+from poker_data.management.commands.benchmark_views import percentile
+from poker_data.models import Event, EventParticipation, LeaderboardEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs concurrent readers (home page queries) and writers (re-buys) against a throw-away '
+        'SQLite database, once per database profile from settings.DB_PROFILES, and reports throughput.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=list(settings.DB_PROFILES),
+                            choices=list(settings.DB_PROFILES))
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--players', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=100)
+        parser.add_argument('--participations', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        original = {key: connection.settings_dict.get(key) for key in ('OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            synthetic.generate(
+                players=options['players'], events=options['events'],
+                participations=options['participations'], seed=options['seed'], active_last=True,
+            )
+            event = Event.objects.filter(active=True).get()
+            Event.objects.filter(id=event.id).update(remaining_chips=10 ** 7, pot=10 ** 7)
+            player_ids = list(EventParticipation.objects.filter(event=event).values_list('player_id', flat=True))
+
+            results = {}
+            for profile in options['profiles']:
+                self.use_profile(profile)
+                results[profile] = self.run_profile(event.id, player_ids, options)
+        finally:
+            connections.close_all()
+            connection.settings_dict.update(original)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results, options)
+
+    def use_profile(self, profile):
+        # New connections (one per thread) are created from this settings dict
+        connections.close_all()
+        config = {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, **settings.DB_PROFILES[profile]}
+        connection.settings_dict.update(config)
+        with connection.cursor() as cursor:
+            # journal_mode is stored in the database file; reset it for profiles that don't set it
+            if 'journal_mode' not in config['OPTIONS'].get('init_command', ''):
+                cursor.execute('PRAGMA journal_mode=DELETE')
+        connections.close_all()
+
+    def run_profile(self, event_id, player_ids, options):
+        deadline = time.perf_counter() + options['seconds']
+        stats = {'reads': [], 'writes': [], 'errors': 0}
+        lock = threading.Lock()
+
+        def read(rng):
+            leaderboards.Page(leaderboards.TOP).rows
+            leaderboards.Page(LeaderboardEntry.TREND).rows
+            live.event_snapshot(event_id)
+
+        def write(rng):
+            chips.re_buy(event_id, {rng.choice(player_ids): Decimal('5')})
+
+        def worker(kind, action, seed):
+            rng = random.Random(seed)
+            timings, errors = [], 0
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        action(rng)
+                        timings.append(time.perf_counter() - started)
+                    except OperationalError:  # "database is locked"
+                        errors += 1
+                    close_old_connections()  # end of a "request": honours CONN_MAX_AGE
+            finally:
+                connections.close_all()
+            with lock:
+                stats[kind] += timings
+                stats['errors'] += errors
+
+        threads = [threading.Thread(target=worker, args=('reads', read, i)) for i in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=('writes', write, i)) for i in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return stats
+
+    def report(self, results, options):
+        seconds = options['seconds']
+        self.stdout.write(
+            f"{options['readers']} readers, {options['writers']} writers, {seconds:g}s per profile\n"
+            f"{'profile':<8} {'reads/s':>9} {'writes/s':>9} {'read p95 ms':>12} {'write p95 ms':>13} {'locked':>7}"
+        )
+        for profile, stats in results.items():
+            read_p95 = percentile(stats['reads'], 95) * 1000 if stats['reads'] else 0
+            write_p95 = percentile(stats['writes'], 95) * 1000 if stats['writes'] else 0
+            self.stdout.write(
+                f"{profile:<8} {len(stats['reads']) / seconds:>9.1f} {len(stats['writes']) / seconds:>9.1f} "
+                f"{read_p95:>12.2f} {write_p95:>13.2f} {stats['errors']:>7}"
+            )
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from poker_data import parallel, synthetic
+from poker_data.management.commands.benchmark_views import percentile
+from poker_events import views
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the latency of the sync home view with the async one (concurrent queries, '
+        'views.home_async) on a throw-away file-backed SQLite database with synthetic data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=5000)
+        parser.add_argument('--events', type=int, default=500)
+        parser.add_argument('--participations', type=int, default=50000)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warm', action='store_true', help='Keep the cached fragments between requests.')
+        parser.add_argument('--query-latency', type=float, default=0,
+                            help='Milliseconds added to every query, to model a database server on the network.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            synthetic.generate(
+                players=options['players'], events=options['events'],
+                participations=options['participations'], seed=options['seed'], active_last=True,
+            )
+            factory = RequestFactory()
+            delay = options['query_latency'] / 1000
+
+            def add_latency(execute, sql, params, many, context):
+                time.sleep(delay)
+                return execute(sql, params, many, context)
+
+            # Also applies to the worker threads of the async view
+            with parallel.execute_wrapper(add_latency):
+                results = {
+                    'sync': self.run_sync(factory, options),
+                    'async': asyncio.run(self.run_async(factory, options)),
+                }
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results, options)
+
+    def request(self, factory):
+        request = factory.get('/')
+        request.user = AnonymousUser()
+        return request
+
+    def run_sync(self, factory, options):
+        timings = []
+        for _ in range(options['requests']):
+            if not options['warm']:
+                cache.clear()
+            started = time.perf_counter()
+            response = views.home(self.request(factory))
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+        return timings
+
+    async def run_async(self, factory, options):
+        timings = []
+        for _ in range(options['requests']):
+            if not options['warm']:
+                await cache.aclear()
+            started = time.perf_counter()
+            response = await views.home_async(self.request(factory))
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+        return timings
+
+    def report(self, results, options):
+        self.stdout.write(
+            f"{options['requests']} {'warm' if options['warm'] else 'cold'} requests, "
+            f"{options['participations']} participations, +{options['query_latency']:g} ms per query\n"
+            f"{'view':<6} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}"
+        )
+        for name, timings in results.items():
+            self.stdout.write(
+                f"{name:<6} {percentile(timings, 50) * 1000:>8.2f} {percentile(timings, 95) * 1000:>8.2f} "
+                f"{sum(timings) / len(timings) * 1000:>8.2f}"
+            )
@@ -0,0 +1,127 @@
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from poker_data import synthetic
+from poker_data.models import EventParticipation, Player
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(pct / 100 * (len(values) - 1)))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Times home, add_event, add_players, re_buy and end_event through the Django test client '
+        'on a throw-away database filled with synthetic data, and reports query counts and p50/p95 latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=200)
+        parser.add_argument('--participations', type=int, default=10000)
+        parser.add_argument('--iterations', type=int, default=20, help='Event nights to simulate.')
+        parser.add_argument('--entrants', type=int, default=20, help='Players registered per simulated event.')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Append the results as one JSON line to this file.')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            synthetic.generate(
+                players=options['players'], events=options['events'],
+                participations=options['participations'], seed=options['seed'],
+            )
+            samples = self.run_scenario(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(samples, options)
+
+    def run_scenario(self, options):
+        client = Client()
+        samples = {}
+        player_ids = list(Player.objects.order_by('?').values_list('id', flat=True)[:options['entrants']])
+
+        def request(method, url, data=None):
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method.upper()} {url} returned {response.status_code}")
+            name = f"{resolve(url).url_name} {method.upper()}"
+            samples.setdefault(name, []).append((elapsed * 1000, len(queries)))
+            return response
+
+        for i in range(options['iterations']):
+            request('get', reverse('home'))
+            request('get', reverse('add_event'))
+            response = request('post', reverse('add_event'), {
+                'host_location': 'Benchmark', 'date': timezone.now().date().isoformat(),
+                'pot': '5000', 'active': 'on', 'asop': 'on',
+            })
+            event_id = resolve(response['Location']).kwargs['event_id']
+
+            add_players_url = reverse('add_players', args=[event_id])
+            request('get', add_players_url)
+            request('post', add_players_url, {
+                'players': player_ids, **{f'initial_buy_in_{player_id}': '20' for player_id in player_ids},
+            })
+            request('get', reverse('home'))
+
+            re_buy_url = reverse('re_buy', args=[event_id])
+            request('get', re_buy_url)
+            participations = list(EventParticipation.objects.filter(event_id=event_id).order_by('id'))
+            data = {'form-TOTAL_FORMS': len(participations), 'form-INITIAL_FORMS': len(participations)}
+            for j, participation in enumerate(participations):
+                data[f'form-{j}-id'] = participation.id
+                data[f'form-{j}-re_buy'] = participation.re_buy + (Decimal('10') if j == i % len(participations) else 0)
+            request('post', re_buy_url, data)
+
+            request('get', reverse('end_event', args=[event_id]))
+        return samples
+
+    def report(self, samples, options):
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        self.stdout.write(f"{'view':<20} {'n':>4} {'queries':>8} {'budget':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        results = {}
+        for name, values in samples.items():
+            times = [t for t, _ in values]
+            queries = max(q for _, q in values)
+            budget = budgets.get(name.split()[0], '')
+            results[name] = {
+                'n': len(values), 'queries': queries,
+                'p50_ms': round(percentile(times, 50), 2), 'p95_ms': round(percentile(times, 95), 2),
+                'max_ms': round(max(times), 2),
+            }
+            self.stdout.write(
+                f"{name:<20} {len(values):>4} {queries:>8} {budget:>7} "
+                f"{results[name]['p50_ms']:>8.2f} {results[name]['p95_ms']:>8.2f} {results[name]['max_ms']:>8.2f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'a') as f:
+                f.write(json.dumps({
+                    'timestamp': timezone.now().isoformat(),
+                    'options': {k: options[k] for k in ('players', 'events', 'participations', 'iterations', 'entrants', 'cold')},
+                    'results': results,
+                }) + '\n')
+            self.stdout.write(f"Results appended to {options['output']}")
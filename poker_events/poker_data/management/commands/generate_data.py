@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from poker_data import synthetic
+
+
+class Command(BaseCommand):
+    help = 'Fills the database with synthetic players, events and participations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=100)
+        parser.add_argument('--participations', type=int, default=10000,
+                            help='Total participations, spread evenly over the events.')
+        parser.add_argument('--asop-ratio', type=float, default=0.3, help='Share of ASOP events (the rest has a host).')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--active-last', action='store_true', help='Leave the most recent event active.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        synthetic.generate(
+            players=options['players'],
+            events=options['events'],
+            participations=options['participations'],
+            asop_ratio=options['asop_ratio'],
+            seed=options['seed'],
+            active_last=options['active_last'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s."))
@@ -0,0 +1,41 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from poker_data import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports events with their participations from a CSV or JSON Lines file '
+        f"(columns: {', '.join(transfer.COLUMNS)})."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='File format; defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=transfer.CHUNK_SIZE,
+                            help='Rows per transaction.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if format not in ('csv', 'jsonl'):
+            raise CommandError(f"Cannot guess the format of {path}, use --format csv|jsonl.")
+
+        started = time.perf_counter()
+        importer = transfer.Importer(chunk_size=options['chunk_size'], log=self.stdout.write)
+        try:
+            with open(path, newline='', encoding='utf-8') as stream:
+                events, participations = importer.run(transfer.read_rows(stream, format))
+        except OSError as e:
+            raise CommandError(str(e))
+        except transfer.InvalidRow as e:
+            raise CommandError(
+                f"{e} (imported before the error: {len(importer.events)} events, {importer.participations} participations)"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {events} events with {participations} participations in {time.perf_counter() - started:.1f}s."
+        ))
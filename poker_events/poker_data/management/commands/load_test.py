@@ -0,0 +1,216 @@
+import json
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from importlib import import_module, reload
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import clear_url_caches
+from django.utils import timezone
+
+from poker_data import loadtest, synthetic
+from poker_data.management.commands.benchmark_views import percentile
+from poker_data.middleware import QueryBudgetExceeded
+
+HOST = '127.0.0.1'
+
+
+class LoadTestServer(ThreadedWSGIServer):
+    # runserver's listen backlog (10) drops connections when all phones re-buy at once
+    request_queue_size = 256
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Plays an event night over real HTTP: phones poll the home page and the ranking in parallel, '
+        're-buy in bursts, and the organizer creates, fills and ends the event. Runs against a WSGI or '
+        'ASGI server started on a throw-away database with synthetic data, or against --url. Reports '
+        'throughput, p50/p99 latency per view and the error and "database is locked" rates. On the '
+        'throw-away database a request over its query budget (settings.QUERY_BUDGETS) fails the run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi',
+                            help='asgi serves the async home view and needs uvicorn (pip install uvicorn).')
+        parser.add_argument('--url', help='Run against an already running server instead (e.g. http://127.0.0.1:8000).')
+        parser.add_argument('--phones', type=int, default=20, help='Concurrent clients.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds of polling and re-buying.')
+        parser.add_argument('--think', type=float, default=1.0, help='Mean seconds between requests of one phone.')
+        parser.add_argument('--rebuy-every', type=float, default=10.0, help='Seconds between re-buy bursts.')
+        parser.add_argument('--entrants', type=int, help='Players registered (default: one per phone, at most 50).')
+        parser.add_argument('--players', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=200)
+        parser.add_argument('--participations', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Append the results as one JSON line to this file.')
+
+    def handle(self, *args, **options):
+        if options['url']:
+            # External server: its own database; lock errors only show up as 500s
+            results = self.play(options['url'], options)
+            self.report(*results, None, None, options)
+            return
+
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        locked, over_budget = [], []
+
+        def count_errors(sender, **kwargs):
+            exc = sys.exc_info()[1]
+            if isinstance(exc, OperationalError) and 'locked' in str(exc):
+                locked.append(exc)
+            elif isinstance(exc, QueryBudgetExceeded):
+                over_budget.append(str(exc))
+
+        got_request_exception.connect(count_errors, dispatch_uid='load_test_errors')
+        try:
+            synthetic.generate(
+                players=options['players'], events=options['events'],
+                participations=options['participations'], seed=options['seed'],
+            )
+            connections.close_all()  # the server threads open their own connections
+            # DEBUG=False like production: no query log growing in every thread, real 500 pages.
+            # The budgets fail the request (QueryBudgetMiddleware) and with it the run.
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=[HOST], QUERY_BUDGET_MODE='raise'):
+                with self.server(options['server']) as base_url:
+                    results = self.play(base_url, options)
+        finally:
+            got_request_exception.disconnect(dispatch_uid='load_test_errors')
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(*results, len(locked), over_budget, options)
+
+    def play(self, base_url, options):
+        entrants = options['entrants'] or min(options['phones'], 50)
+        try:
+            recorder, event_id, elapsed = loadtest.event_night(
+                base_url, phones=options['phones'], seconds=options['duration'], think=options['think'],
+                rebuy_every=options['rebuy_every'], entrants=entrants, seed=options['seed'],
+            )
+        except loadtest.EventNightError as e:
+            raise CommandError(str(e))
+        return recorder.samples, elapsed, settings.ASYNC_HOME
+
+    @contextmanager
+    def server(self, kind):
+        if kind == 'asgi':
+            with self.asgi_server() as base_url:
+                yield base_url
+            return
+
+        server = LoadTestServer((HOST, 0), QuietHandler, allow_reuse_address=False)
+        server.set_app(get_internal_wsgi_application())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f'http://{HOST}:{server.server_port}'
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    @contextmanager
+    def async_home(self):
+        # urls.py picks the home view when it is imported; import it again with ASYNC_HOME set
+        urlconf = import_module(settings.ROOT_URLCONF)
+        try:
+            with override_settings(ASYNC_HOME=True):
+                reload(urlconf)
+                clear_url_caches()
+                yield
+        finally:
+            reload(urlconf)
+            clear_url_caches()
+
+    @contextmanager
+    def asgi_server(self):
+        try:
+            import uvicorn
+        except ImportError:
+            raise CommandError('--server asgi needs uvicorn: pip install uvicorn')
+        from django.core.asgi import get_asgi_application
+
+        # Like poker_events/asgi.py: under ASGI the home page is the async view
+        with self.async_home(), self.uvicorn_server(uvicorn, get_asgi_application()) as base_url:
+            yield base_url
+
+    @contextmanager
+    def uvicorn_server(self, uvicorn, application):
+        sock = socket.socket()
+        sock.bind((HOST, 0))
+        config = uvicorn.Config(application, log_level='warning', lifespan='off')
+        server = uvicorn.Server(config)
+        thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise CommandError('The ASGI server did not start')
+            time.sleep(0.05)
+        try:
+            yield f'http://{HOST}:{sock.getsockname()[1]}'
+        finally:
+            server.should_exit = True
+            thread.join()
+            sock.close()
+
+    def report(self, samples, elapsed, async_home, locked, over_budget, options):
+        requests = sum(len(values) for values in samples.values())
+        errors = sum(1 for values in samples.values() for _, status in values if status is None or status >= 500)
+        if options['url']:
+            server = options['url']
+        else:
+            server = f"{options['server']}, {'async' if async_home else 'sync'} home"
+        self.stdout.write(
+            f"{options['phones']} phones, {elapsed:.1f} s ({server}): {requests} requests, "
+            f"{requests / elapsed:.1f} req/s, errors {errors / requests:.2%}"
+            + (f", database is locked {locked / requests:.2%}" if locked is not None else '')
+            + (f", over query budget {len(over_budget)}" if over_budget is not None else '')
+        )
+        self.stdout.write(
+            f"{'view':<22} {'n':>5} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>6} {'4xx':>5}"
+        )
+        results = {}
+        for name, values in sorted(samples.items()):
+            times = [t * 1000 for t, _ in values]
+            results[name] = {
+                'n': len(values), 'rps': round(len(values) / elapsed, 2),
+                'p50_ms': round(percentile(times, 50), 2), 'p99_ms': round(percentile(times, 99), 2),
+                'max_ms': round(max(times), 2),
+                'errors': sum(1 for _, status in values if status is None or status >= 500),
+                '4xx': sum(1 for _, status in values if status is not None and 400 <= status < 500),
+            }
+            row = results[name]
+            self.stdout.write(
+                f"{name:<22} {row['n']:>5} {row['rps']:>7.1f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+                f"{row['max_ms']:>8.2f} {row['errors']:>6} {row['4xx']:>5}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'a') as f:
+                f.write(json.dumps({
+                    'timestamp': timezone.now().isoformat(),
+                    'options': {k: options[k] for k in (
+                        'server', 'url', 'phones', 'duration', 'think', 'rebuy_every', 'players', 'participations',
+                    )},
+                    'requests': requests, 'seconds': round(elapsed, 2), 'errors': errors, 'locked': locked,
+                    'over_budget': len(over_budget) if over_budget is not None else None, 'results': results,
+                }) + '\n')
+            self.stdout.write(f"Results appended to {options['output']}")
+
+        if over_budget:
+            raise CommandError(f"{len(over_budget)} requests over their query budget, e.g. {over_budget[0]}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from poker_data import caching, leaderboards, rank_history, rollups
+from poker_data.models import LeaderboardEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the materialized leaderboard tables and period totals from all event participations, '
+        'and the rank history from the results of all settled events.'
+    )
+
+    def handle(self, *args, **options):
+        leaderboards.rebuild_all()
+        periods = rollups.recompute()
+        snapshots = rank_history.rebuild()
+        caching.bump_version(caching.DATA)
+        for board, label in LeaderboardEntry.BOARD_CHOICES:
+            count = LeaderboardEntry.objects.filter(board=board).count()
+            self.stdout.write(f"{label}: {count} players")
+        self.stdout.write(f"Period totals: {periods} rows")
+        self.stdout.write(f"Rank history: {snapshots} rows")
+        self.stdout.write(self.style.SUCCESS('Leaderboards rebuilt.'))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from poker_data import earnings
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Player.total_earnings for all players with one grouped UPDATE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--player', type=int, action='append', dest='players',
+                            help='Only recompute this player id (repeatable).')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = earnings.recompute(options['players'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed total_earnings for {updated} player(s) in {time.perf_counter() - started:.2f}s."
+        ))
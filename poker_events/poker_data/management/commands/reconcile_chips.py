@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q, Sum
+
+from poker_data.models import ChipTransaction, Event, EventParticipation
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares Event.remaining_chips with the chip ledger and the participations '
+        'and optionally rewrites remaining_chips from the ledger.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, help='Only check this event id.')
+        parser.add_argument('--fix', action='store_true', help='Rewrite remaining_chips from the ledger.')
+
+    def handle(self, *args, **options):
+        # Archived events are settled and their ledger lives in the archive (see poker_data/archive.py)
+        events = Event.objects.filter(archived=False).order_by('date', 'id')
+        if options['event']:
+            events = events.filter(id=options['event'])
+
+        # One grouped query each for the ledger and the participations of all events
+        ledger = {
+            row['event_id']: row
+            for row in ChipTransaction.objects.filter(event__in=events).values('event_id').annotate(
+                taken=Sum('amount', filter=~Q(kind=ChipTransaction.CASH_OUT)),
+                returned=Sum('amount', filter=Q(kind=ChipTransaction.CASH_OUT)),
+            )
+        }
+        bought = dict(
+            EventParticipation.objects.filter(event__in=events).values('event_id')
+            .annotate(total=Sum(F('initial_buy_in') + F('re_buy')))
+            .values_list('event_id', 'total')
+        )
+
+        mismatches = 0
+        for event in events:
+            row = ledger.get(event.id, {})
+            taken = row.get('taken') or 0
+            from_ledger = max(event.pot - taken + (row.get('returned') or 0), 0)
+            if taken != (bought.get(event.id) or 0):
+                self.stdout.write(self.style.WARNING(
+                    f"Event {event.id} ({event.date}): ledger buy-ins {taken} != participations {bought.get(event.id) or 0}"
+                ))
+            if from_ledger == event.remaining_chips:
+                continue
+
+            mismatches += 1
+            self.stdout.write(self.style.WARNING(
+                f"Event {event.id} ({event.date}): remaining_chips {event.remaining_chips}, ledger says {from_ledger}"
+            ))
+            if options['fix']:
+                event.update_remaining_chips()
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All events match the chip ledger.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {mismatches} event(s)."))
+        else:
+            self.stdout.write(f"{mismatches} event(s) out of sync, run with --fix to repair.")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from poker_data import archive
+
+
+class Command(BaseCommand):
+    help = 'Moves archived events back into the hot tables, e.g. to correct their participations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='events',
+                            help='Restore this event id (repeatable).')
+        parser.add_argument('--all', action='store_true', help='Restore all archived events.')
+
+    def handle(self, *args, **options):
+        if not options['events'] and not options['all']:
+            raise CommandError('Pass --event <id> or --all.')
+        events, participations = archive.restore(None if options['all'] else options['events'])
+        self.stdout.write(self.style.SUCCESS(f"Restored {events} event(s) with {participations} participation(s)."))
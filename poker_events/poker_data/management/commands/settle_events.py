@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from poker_data import settlement
+
+
+class Command(BaseCommand):
+    help = (
+        'Settles ended events that have no EventSummary yet. With --resettle the summaries and '
+        'results are rebuilt, e.g. after correcting participations of a settled event.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='events',
+                            help='Only settle this event id (repeatable).')
+        parser.add_argument('--resettle', action='store_true', help='Replace existing summaries and results.')
+
+    def handle(self, *args, **options):
+        settled = settlement.settle_finished(options['events'], resettle=options['resettle'])
+        self.stdout.write(self.style.SUCCESS(f"Settled {settled} event(s)."))
@@ -0,0 +1,178 @@
+# poker_data/metrics.py
+"""Request-Metriken im Prozess, ausgegeben im Prometheus-Textformat unter /metrics.
+
+``RequestMetricsMiddleware`` (middleware.py) misst pro URL-Name die Gesamtdauer, Anzahl
+und Dauer der SQL-Queries sowie die Renderzeit der Templates. Die Renderzeit kommt vom
+Template-Backend ``InstrumentedDjangoTemplates``; Queries aus lazy Querysets im Template
+zählen deshalb sowohl zur SQL- als auch zur Renderzeit.
+
+Die Werte leben im Speicher des Prozesses: mit mehreren Worker-Prozessen liefert jeder
+Prozess seine eigenen Zahlen, und ein Neustart setzt sie zurück.
+"""
+import contextvars
+import heapq
+import threading
+import time
+
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+TOP_QUERIES = 5
+
+# Stats of the request being handled in this thread/task, set by the middleware
+current = contextvars.ContextVar('request_stats', default=None)
+
+
+def _labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, label='view'):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.label = label
+        self._series = {}  # label value -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.setdefault(label_value, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for label_value, (counts, total, count) in sorted(series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _labels([(self.label, label_value), ('le', bound)])
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_labels([(self.label, label_value), ('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_labels([(self.label, label_value)])} {total}")
+            lines.append(f"{self.name}_count{_labels([(self.label, label_value)])} {count}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(zip(self.labels, label_values))} {value}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+requests_total = Counter('poker_requests_total', 'Handled requests.', ['view', 'status'])
+request_seconds = Histogram('poker_request_duration_seconds', 'Total request latency.', LATENCY_BUCKETS)
+sql_queries = Histogram('poker_request_sql_queries', 'SQL queries per request.', QUERY_COUNT_BUCKETS)
+sql_seconds = Histogram('poker_request_sql_duration_seconds', 'Time spent in SQL per request.', LATENCY_BUCKETS)
+render_seconds = Histogram('poker_request_render_duration_seconds', 'Template render time per request.', LATENCY_BUCKETS)
+METRICS = [requests_total, request_seconds, sql_queries, sql_seconds, render_seconds]
+
+
+class RequestStats:
+    """Sammelt die Messwerte eines Requests."""
+
+    def __init__(self, keep_queries=False):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self.keep_queries = keep_queries
+        self.slowest = []  # heap of (seconds, sql)
+        self._lock = threading.Lock()  # async views run queries in several threads (parallel.py)
+
+    def record_query(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.queries += 1
+                self.sql_seconds += elapsed
+                if self.keep_queries:
+                    entry = (elapsed, sql)
+                    if len(self.slowest) < TOP_QUERIES:
+                        heapq.heappush(self.slowest, entry)
+                    else:
+                        heapq.heappushpop(self.slowest, entry)
+
+    def top_queries(self):
+        return sorted(self.slowest, reverse=True)
+
+
+def observe(view, status, seconds, stats):
+    requests_total.inc(view, status)
+    request_seconds.observe(view, seconds)
+    sql_queries.observe(view, stats.queries)
+    sql_seconds.observe(view, stats.sql_seconds)
+    render_seconds.observe(view, stats.render_seconds)
+
+
+def expose():
+    lines = []
+    for metric in METRICS:
+        lines += metric.expose()
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    for metric in METRICS:
+        metric.reset()
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats = current.get()
+            if stats is not None:
+                stats.render_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Django-Template-Backend, das die Renderzeit dem laufenden Request zuschreibt."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
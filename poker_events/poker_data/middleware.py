@@ -0,0 +1,171 @@
+# poker_data/middleware.py
+import logging
+import mimetypes
+import os
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from poker_data import metrics, parallel, staticfiles
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryBudgetMiddleware:
+    """Zählt die SQL-Queries pro Request und meldet Überschreitungen von settings.QUERY_BUDGETS.
+
+    QUERY_BUDGET_MODE = 'warn' schreibt eine Warnung ins Log, 'raise' lässt den Request fehlschlagen,
+    None deaktiviert die Middleware.
+    """
+
+    def __init__(self, get_response):
+        self.mode = getattr(settings, 'QUERY_BUDGET_MODE', None)
+        if self.mode not in ('warn', 'raise'):
+            raise MiddlewareNotUsed
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with parallel.execute_wrapper(count_query):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        budget = self.budgets.get(match.url_name) if match else None
+        if budget is not None and len(queries) > budget:
+            message = f"{request.method} {request.path} ({match.url_name}) ran {len(queries)} queries, budget is {budget}"
+            if self.mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class RequestMetricsMiddleware:
+    """Misst Latenz, SQL-Queries und Renderzeit pro URL-Name (siehe metrics.py).
+
+    REQUEST_METRICS = False deaktiviert die Middleware. Mit SLOW_REQUEST_SECONDS werden
+    langsamere Requests mit ihren langsamsten Queries geloggt.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS', True):
+            raise MiddlewareNotUsed
+        self.slow_seconds = getattr(settings, 'SLOW_REQUEST_SECONDS', None)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = metrics.RequestStats(keep_queries=self.slow_seconds is not None)
+        token = metrics.current.set(stats)
+        started = time.perf_counter()
+        try:
+            with parallel.execute_wrapper(stats.record_query):
+                response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        metrics.observe(view, response.status_code, elapsed, stats)
+
+        if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+            top = '\n'.join(f"  {seconds * 1000:.1f} ms  {sql[:300]}" for seconds, sql in stats.top_queries())
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({view}): {elapsed * 1000:.0f} ms, "
+                f"{stats.queries} queries in {stats.sql_seconds * 1000:.0f} ms, "
+                f"render {stats.render_seconds * 1000:.0f} ms\n{top}"
+            )
+        return response
+
+
+def accepted_codings(header):
+    """``{coding: q}`` aus einem Accept-Encoding-Header (``gzip;q=0.5, br;q=0, *``)."""
+    weights = {}
+    for part in header.split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0  # unparsable weight: better not to send that coding
+        weights[coding.lower()] = q
+    return weights
+
+
+class StaticFilesMiddleware:
+    """Liefert STATIC_ROOT (nach collectstatic) aus, bevorzugt vorkomprimiert (siehe staticfiles.py).
+
+    Dateien mit Hash im Namen bekommen ``immutable`` mit einem Jahr Laufzeit, alle anderen
+    STATIC_MAX_AGE Sekunden. Ohne STATIC_ROOT ist die Middleware deaktiviert; runserver
+    liefert im DEBUG-Modus die Quelldateien wie bisher selbst aus.
+    """
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'STATIC_ROOT', None):
+            raise MiddlewareNotUsed
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.max_age = getattr(settings, 'STATIC_MAX_AGE', 60)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            return self.cache_headers(HttpResponseNotModified(), name)
+
+        # Highest q wins, ties in the order of staticfiles.ENCODINGS; q=0 means "not acceptable"
+        weights = accepted_codings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        served_path, encoding, best = path, None, 0.0
+        for candidate, suffix, _ in staticfiles.ENCODINGS:
+            q = weights.get(candidate, weights.get('*', 0.0))
+            if q > best and os.path.isfile(path + suffix):
+                served_path, encoding, best = path + suffix, candidate, q
+
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(open(served_path, 'rb'), content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        return self.cache_headers(response, name)
+
+    def cache_headers(self, response, name):
+        # Also on 304s, which refresh the cached copy's headers
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = (
+            self.IMMUTABLE if staticfiles_storage.is_hashed(name) else f'public, max-age={self.max_age}'
+        )
+        return response
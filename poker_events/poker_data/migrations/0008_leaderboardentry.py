@@ -0,0 +1,48 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_leaderboards(apps, schema_editor):
+    Event = apps.get_model('poker_data', 'Event')
+    EventParticipation = apps.get_model('poker_data', 'EventParticipation')
+    LeaderboardEntry = apps.get_model('poker_data', 'LeaderboardEntry')
+
+    recent_event_ids = list(Event.objects.order_by('-date').values_list('id', flat=True)[:3])
+    last_asop_event_id = Event.objects.filter(asop=True).order_by('-date').values_list('id', flat=True).first()
+    boards = {
+        'trend': EventParticipation.objects.filter(event_id__in=recent_event_ids),
+        'asop': EventParticipation.objects.filter(event__asop=True),
+        'last_asop': EventParticipation.objects.filter(event_id=last_asop_event_id),
+    }
+    for board, participations in boards.items():
+        LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(board=board, player_id=row['player_id'], earnings=row['total'] or 0)
+            for row in participations.values('player_id').annotate(total=Sum('earnings'))
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0007_rename_buy_in_eventparticipation_initial_buy_in_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('trend', 'Trend (last 3 events)'), ('asop', 'ASOP (all events)'), ('last_asop', 'ASOP (recent event)')], max_length=20)),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='poker_data.player')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', '-earnings'], name='leaderboard_board_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('board', 'player'), name='unique_leaderboard_player')],
+            },
+        ),
+        migrations.RunPython(populate_leaderboards, migrations.RunPython.noop),
+    ]
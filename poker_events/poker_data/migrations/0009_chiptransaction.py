@@ -0,0 +1,46 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_ledger(apps, schema_editor):
+    # Existing buy-ins and re-buys become the opening entries of the ledger
+    EventParticipation = apps.get_model('poker_data', 'EventParticipation')
+    ChipTransaction = apps.get_model('poker_data', 'ChipTransaction')
+
+    transactions = []
+    for participation in EventParticipation.objects.all().iterator():
+        if participation.initial_buy_in > 0:
+            transactions.append(ChipTransaction(
+                event_id=participation.event_id, player_id=participation.player_id,
+                kind='buy_in', amount=participation.initial_buy_in,
+            ))
+        if participation.re_buy > 0:
+            transactions.append(ChipTransaction(
+                event_id=participation.event_id, player_id=participation.player_id,
+                kind='re_buy', amount=participation.re_buy,
+            ))
+    ChipTransaction.objects.bulk_create(transactions, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0008_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChipTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('buy_in', 'Buy-In'), ('re_buy', 'Re-Buy'), ('cash_out', 'Cash-Out')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chip_transactions', to='poker_data.event')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chip_transactions', to='poker_data.player')),
+            ],
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:13
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_participations(apps, schema_editor):
+    # Duplicates would break the new unique constraint; fold them into the oldest row
+    EventParticipation = apps.get_model('poker_data', 'EventParticipation')
+
+    duplicates = (
+        EventParticipation.objects.values('event_id', 'player_id')
+        .annotate(count=Count('id')).filter(count__gt=1)
+    )
+    for row in duplicates:
+        keep, *extra = EventParticipation.objects.filter(
+            event_id=row['event_id'], player_id=row['player_id']
+        ).order_by('id')
+        for participation in extra:
+            keep.earnings += participation.earnings
+            keep.initial_buy_in += participation.initial_buy_in
+            keep.re_buy += participation.re_buy
+        keep.save(update_fields=['earnings', 'initial_buy_in', 're_buy'])
+        EventParticipation.objects.filter(id__in=[p.id for p in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0009_chiptransaction'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_participations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-date'], name='event_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-date'], name='event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('asop', True)), fields=['-date'], name='event_asop_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['-total_earnings'], name='player_earnings_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='eventparticipation',
+            constraint=models.UniqueConstraint(fields=('event', 'player'), name='unique_event_player'),
+        ),
+    ]
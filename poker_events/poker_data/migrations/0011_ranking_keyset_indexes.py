@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0010_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='leaderboardentry',
+            name='leaderboard_board_rank_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='player',
+            name='player_earnings_idx',
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['board', '-earnings', 'player'], name='leaderboard_board_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['-total_earnings', 'id'], name='player_earnings_idx'),
+        ),
+    ]
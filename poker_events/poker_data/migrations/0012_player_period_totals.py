@@ -0,0 +1,65 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:21
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_period_totals(apps, schema_editor):
+    EventParticipation = apps.get_model('poker_data', 'EventParticipation')
+    PlayerPeriodTotal = apps.get_model('poker_data', 'PlayerPeriodTotal')
+
+    totals = defaultdict(lambda: [0, 0, 0])
+    months = (
+        EventParticipation.objects.annotate(month=TruncMonth('event__date'))
+        .values('player_id', 'month')
+        .annotate(earnings=Sum('earnings'), buy_in=Sum(F('initial_buy_in') + F('re_buy')), events=Count('id'))
+        .order_by()
+    )
+    for row in months:
+        month = row['month']
+        starts = {
+            'month': month,
+            'season': month.replace(month=(month.month - 1) // 3 * 3 + 1),
+            'year': month.replace(month=1),
+        }
+        for period, start in starts.items():
+            total = totals[row['player_id'], period, start]
+            total[0] += row['earnings'] or 0
+            total[1] += row['buy_in'] or 0
+            total[2] += row['events']
+    PlayerPeriodTotal.objects.bulk_create([
+        PlayerPeriodTotal(player_id=player_id, period=period, period_start=start,
+                          earnings=earnings, buy_in=buy_in, events=events)
+        for (player_id, period, start), (earnings, buy_in, events) in totals.items()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0011_ranking_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerPeriodTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('month', 'Month'), ('season', 'Season (quarter)'), ('year', 'Year')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('buy_in', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_totals', to='poker_data.player')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'period_start', '-earnings', 'player'], name='period_total_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('player', 'period', 'period_start'), name='unique_player_period')],
+            },
+        ),
+        migrations.RunPython(populate_period_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:35
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def settle_finished_events(apps, schema_editor):
+    # Same computation as poker_data.settlement, for the events that ended before it existed
+    Event = apps.get_model('poker_data', 'Event')
+    EventParticipation = apps.get_model('poker_data', 'EventParticipation')
+    ChipTransaction = apps.get_model('poker_data', 'ChipTransaction')
+    EventSummary = apps.get_model('poker_data', 'EventSummary')
+    EventResult = apps.get_model('poker_data', 'EventResult')
+
+    events = list(Event.objects.filter(active=False))
+    participations = defaultdict(list)
+    for row in EventParticipation.objects.filter(event__active=False).values_list(
+        'event_id', 'player_id', 'initial_buy_in', 're_buy', 'earnings'
+    ):
+        participations[row[0]].append(row[1:])
+    cashed_out = dict(
+        ChipTransaction.objects.filter(kind='cash_out').values('event_id')
+        .annotate(total=Sum('amount')).values_list('event_id', 'total')
+    )
+
+    summaries, results = [], []
+    for event in events:
+        rows = sorted(
+            ((earnings - initial_buy_in - re_buy, player_id, initial_buy_in, re_buy, earnings)
+             for player_id, initial_buy_in, re_buy, earnings in participations[event.id]),
+            key=lambda row: (-row[0], row[1]),
+        )
+        results += [
+            EventResult(event_id=event.id, player_id=player_id, date=event.date, asop=event.asop,
+                        initial_buy_in=initial_buy_in, re_buy=re_buy, earnings=earnings, net=net,
+                        position=position)
+            for position, (net, player_id, initial_buy_in, re_buy, earnings) in enumerate(rows, start=1)
+        ]
+        initial = sum((row[2] for row in rows), 0)
+        re_buys = sum((row[3] for row in rows), 0)
+        returned = cashed_out.get(event.id) or 0
+        summaries.append(EventSummary(
+            event_id=event.id, date=event.date, asop=event.asop, host_location=event.host_location,
+            players=len(rows), pot=event.pot, total_initial_buy_in=initial, total_re_buy=re_buys,
+            total_buy_in=initial + re_buys, total_earnings=sum((row[4] for row in rows), 0),
+            cashed_out=returned, remaining_chips=event.remaining_chips,
+            chip_difference=event.remaining_chips - (event.pot - initial - re_buys + returned),
+        ))
+    EventSummary.objects.bulk_create(summaries, batch_size=500)
+    EventResult.objects.bulk_create(results, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0012_player_period_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('asop', models.BooleanField(default=False)),
+                ('initial_buy_in', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('re_buy', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('net', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('position', models.PositiveIntegerField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='poker_data.event')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_results', to='poker_data.player')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['player', 'date', 'event'], name='event_result_player_idx')],
+                'constraints': [models.UniqueConstraint(fields=('event', 'player'), name='unique_event_result')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('asop', models.BooleanField(default=False)),
+                ('host_location', models.CharField(blank=True, max_length=100, null=True)),
+                ('players', models.PositiveIntegerField(default=0)),
+                ('pot', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_initial_buy_in', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_re_buy', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_buy_in', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('cashed_out', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('remaining_chips', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('chip_difference', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('settled_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='poker_data.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-date'], name='event_summary_date_idx')],
+            },
+        ),
+        migrations.RunPython(settle_finished_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:47
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0013_event_settlement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), name='player_name_search_idx'),
+        ),
+    ]
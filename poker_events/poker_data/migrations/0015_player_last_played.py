@@ -0,0 +1,35 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:49
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def fill_last_played(apps, schema_editor):
+    # Same UPDATE as poker_data.earnings.recompute
+    Player = apps.get_model('poker_data', 'Player')
+    EventParticipation = apps.get_model('poker_data', 'EventParticipation')
+    last_played = (
+        EventParticipation.objects.filter(player=OuterRef('pk')).values('player')
+        .annotate(last=Max('event__date')).values('last')
+    )
+    Player.objects.update(last_played=Subquery(last_played))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0014_player_name_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='last_played',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['-last_played', 'id'], name='player_recent_idx'),
+        ),
+        migrations.RunPython(fill_last_played, migrations.RunPython.noop),
+    ]
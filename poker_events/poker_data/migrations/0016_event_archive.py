@@ -0,0 +1,55 @@
+# Generated by Django 5.1.2 on 2026-10-18 16:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0015_player_last_played'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerArchiveTotal',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive_total', serialize=False, to='poker_data.player')),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('buy_in', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('asop_events', models.PositiveIntegerField(default=0)),
+                ('asop_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_played', models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='ArchivedChipTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('buy_in', 'Buy-In'), ('re_buy', 'Re-Buy'), ('cash_out', 'Cash-Out')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_chip_transactions', to='poker_data.event')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_chip_transactions', to='poker_data.player')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedParticipation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('asop', models.BooleanField(default=False)),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('initial_buy_in', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('re_buy', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_participations', to='poker_data.event')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_participations', to='poker_data.player')),
+            ],
+        ),
+    ]
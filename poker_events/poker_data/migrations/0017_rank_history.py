@@ -0,0 +1,70 @@
+# Generated by Django 5.1.2 on 2026-10-18 17:10
+
+from bisect import bisect_left, insort
+from decimal import Decimal
+from itertools import groupby, zip_longest
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_rank_history(apps, schema_editor):
+    # Same replay as poker_data.rank_history.rebuild, over the results of all settled events
+    EventResult = apps.get_model('poker_data', 'EventResult')
+    RankSnapshot = apps.get_model('poker_data', 'RankSnapshot')
+    depth = getattr(settings, 'RANK_HISTORY_DEPTH', 100)
+    for board, results in (('top', EventResult.objects.all()), ('asop', EventResult.objects.filter(asop=True))):
+        standings, ranking, snapshots = {}, [], []
+        rows = results.order_by('date', 'event_id').values_list('event_id', 'date', 'player_id', 'earnings')
+        for (event_id, date), group in groupby(rows, key=lambda row: row[:2]):
+            top_before = ranking[:depth]
+            played = set()
+            for _, _, player_id, earnings in group:
+                total = standings.get(player_id)
+                if total is not None:
+                    del ranking[bisect_left(ranking, (-total, player_id))]
+                standings[player_id] = (total or Decimal('0.00')) + earnings
+                insort(ranking, (-standings[player_id], player_id))
+                played.add(player_id)
+            top = ranking[:depth]
+            changed = {
+                key[1]: position
+                for position, (key, old) in enumerate(zip_longest(top, top_before), start=1)
+                if key != old or key[1] in played
+            }
+            for player_id in (({key[1] for key in top_before} - {key[1] for key in top}) | played) - changed.keys():
+                changed[player_id] = bisect_left(ranking, (-standings[player_id], player_id)) + 1
+            snapshots += [
+                RankSnapshot(board=board, event_id=event_id, date=date, player_id=player_id, position=position,
+                             earnings=standings[player_id])
+                for player_id, position in changed.items()
+            ]
+        RankSnapshot.objects.bulk_create(snapshots, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker_data', '0016_event_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('top', 'All-time'), ('asop', 'ASOP (all events)')], max_length=10)),
+                ('date', models.DateField()),
+                ('position', models.PositiveIntegerField()),
+                ('earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rank_snapshots', to='poker_data.event')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rank_snapshots', to='poker_data.player')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'player', 'date', 'event'], name='rank_history_idx')],
+                'constraints': [models.UniqueConstraint(fields=('board', 'event', 'player'), name='unique_rank_snapshot')],
+            },
+        ),
+        migrations.RunPython(fill_rank_history, migrations.RunPython.noop),
+    ]
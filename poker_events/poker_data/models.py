@@ -1,6 +1,9 @@
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.db.models import Sum
+from django.db.models import Case, F, Q, Sum, When
+from django.db.models.functions import Collate
+from poker_data import caching
+from poker_data.sqlite import immediate_atomic
 
 class Player(models.Model):
     # Add logic for an inactive player
@@ -8,11 +11,23 @@ class Player(models.Model):
     founding_member = models.BooleanField(default=False)
     first_participation = models.DateField(blank=True, null=True)
     total_earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    last_played = models.DateField(blank=True, null=True)  # Datum des letzten Events, siehe poker_data/earnings.py
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-total_earnings', 'id'], name='player_earnings_idx'),  # Top Players Ranking
+            models.Index(fields=['-last_played', 'id'], name='player_recent_idx'),  # zuletzt aktive Spieler
+            # Präfixsuche (name LIKE 'abc%'); SQLite vergleicht LIKE ohne Groß-/Kleinschreibung
+            # und nutzt dafür nur einen Index mit NOCASE-Collation
+            models.Index(Collate('name', 'NOCASE'), name='player_name_search_idx'),
+        ]
 
     def update_total_earnings(self):
         # Update total_earnings based on all related EventParticipation instances
-        self.total_earnings = self.event_participations.aggregate(total=Sum('earnings'))['total'] or 0
-        self.save()
+        # Teilnahmen markieren den Spieler sonst nur vor, siehe poker_data/earnings.py
+        from poker_data import earnings
+        earnings.recompute([self.pk])
+        self.refresh_from_db(fields=['total_earnings'])
 
     def __str__(self):
         return self.name
@@ -26,6 +41,16 @@ class Event(models.Model):
     asop = models.BooleanField(default=False)  # formerly "asop"
     host_player = models.ForeignKey(Player, on_delete=models.SET_NULL, blank=True, null=True, related_name='hosted_events')  # formerly "gastgeber_spieler"
     remaining_chips = models.DecimalField(max_digits=10, decimal_places=2, default=0) #Neuer Wert für verfügbare Chips
+    archived = models.BooleanField(default=False)  # Teilnahmen und Ledger liegen im Archiv, siehe poker_data/archive.py
+
+    class Meta:
+        # Django schreibt filter(active=True) auf SQLite als WHERE "active"; einen Index auf der
+        # Spalte selbst nutzt SQLite dafür nicht, partielle Indizes mit derselben Bedingung schon.
+        indexes = [
+            models.Index(fields=['-date'], condition=Q(active=True), name='event_active_idx'),  # aktive Events
+            models.Index(fields=['-date'], name='event_date_idx'),  # letzte Events (Trend)
+            models.Index(fields=['-date'], condition=Q(asop=True), name='event_asop_date_idx'),  # ASOP-Ranglisten
+        ]
 
     def clean(self):
         # Custom validation to ensure either `asop` is True or `gastgeber_spieler` is provided
@@ -36,19 +61,33 @@ class Event(models.Model):
         elif not self.asop and self.host_player is None:
             raise ValidationError("Wenn ASOP nicht aktiviert ist, muss ein Gastgeber-Spieler ausgewählt werden.")
 
+    def save(self, *args, **kwargs):
+        # Summen der archivierten Teilnahmen stecken in PlayerArchiveTotal; Datum/ASOP dürfen sich nicht mehr ändern
+        if self.archived:
+            raise ValidationError("Archivierte Events können nicht geändert werden, erst mit restore_events zurückholen.")
+        super().save(*args, **kwargs)
+
     def update_remaining_chips(self):
-        """Aktualisiert die verbleibenden Chips im Event, basierend auf den Buy-Ins und Re-Buys."""
-        total_buy_in = sum(ep.initial_buy_in for ep in self.eventparticipation_set.all())
-        total_re_buy = sum(ep.re_buy for ep in self.eventparticipation_set.all())
-        self.remaining_chips = self.pot - total_buy_in - total_re_buy
-        if self.remaining_chips < 0:
-            self.remaining_chips = 0  # Verhindern, dass remaining_chips negativ wird.
-        self.__class__.objects.filter(id=self.id).update(remaining_chips=self.remaining_chips)
+        """Berechnet die verbleibenden Chips aus dem Chip-Ledger neu (ein Aggregat, Event-Zeile gesperrt)."""
+        with immediate_atomic():  # select_for_update sperrt auf SQLite nicht, BEGIN IMMEDIATE schon
+            pot = self.__class__.objects.select_for_update().values_list('pot', flat=True).get(id=self.id)
+            self.remaining_chips = max(pot + ChipTransaction.balance(self.chip_transactions.all()), 0)  # Verhindern, dass remaining_chips negativ wird.
+            self.__class__.objects.filter(id=self.id).update(remaining_chips=self.remaining_chips)
+            caching.bump_on_commit(caching.DATA)
 
     def __str__(self):
         return f"Event on {self.date} with Pot: {self.pot}, Remaining Chips: {self.remaining_chips}"
 
 
+class EventParticipationQuerySet(models.QuerySet):
+    def with_player(self):
+        return self.select_related('player')
+
+    def with_total_buy_in(self):
+        # Summe aus Initial-Buy-In und Re-Buys direkt in der Datenbank
+        return self.annotate(total_buy_in=F('initial_buy_in') + F('re_buy'))
+
+
 class EventParticipation(models.Model):
     player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='event_participations')
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
@@ -56,15 +95,251 @@ class EventParticipation(models.Model):
     initial_buy_in = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # Umbenannt
     re_buy = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # Für spätere Re-Buys
 
+    objects = EventParticipationQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Ein Spieler nimmt höchstens einmal an einem Event teil; dient auch als (event, player)-Index
+            models.UniqueConstraint(fields=['event', 'player'], name='unique_event_player'),
+        ]
+
+    def __str__(self):
+        return f"{self.player.name} in {self.event.date}"
+
+
+class LeaderboardEntry(models.Model):
+    """Denormalisierte Ranglisten-Zeile, wird über Signale inkrementell gepflegt (siehe leaderboards.py)."""
+    TREND = 'trend'
+    ASOP = 'asop'
+    LAST_ASOP = 'last_asop'
+    BOARD_CHOICES = [
+        (TREND, 'Trend (last 3 events)'),
+        (ASOP, 'ASOP (all events)'),
+        (LAST_ASOP, 'ASOP (recent event)'),
+    ]
+
+    board = models.CharField(max_length=20, choices=BOARD_CHOICES)
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'player'], name='unique_leaderboard_player'),
+        ]
+        indexes = [
+            models.Index(fields=['board', '-earnings', 'player'], name='leaderboard_board_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.board}: {self.player_id} ({self.earnings})"
+
+
+class PlayerPeriodTotal(models.Model):
+    """Summen eines Spielers pro Monat, Saison (Quartal) und Jahr, gepflegt von rollups.py."""
+    MONTH = 'month'
+    SEASON = 'season'
+    YEAR = 'year'
+    PERIOD_CHOICES = [
+        (MONTH, 'Month'),
+        (SEASON, 'Season (quarter)'),
+        (YEAR, 'Year'),
+    ]
+
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='period_totals')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField()  # erster Tag der Periode
+    earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    buy_in = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # Initial-Buy-In + Re-Buys
+    events = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'period', 'period_start'], name='unique_player_period'),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'period_start', '-earnings', 'player'], name='period_total_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start}: {self.player_id} ({self.earnings})"
+
+
+class ChipTransaction(models.Model):
+    """Append-only Ledger aller Chip-Bewegungen eines Events.
+
+    Buy-Ins und Re-Buys nehmen Chips aus dem Pot, Cash-Outs geben sie zurück.
+    remaining_chips ist immer pot + balance() aller Einträge des Events.
+    """
+    BUY_IN = 'buy_in'
+    RE_BUY = 're_buy'
+    CASH_OUT = 'cash_out'
+    KIND_CHOICES = [
+        (BUY_IN, 'Buy-In'),
+        (RE_BUY, 'Re-Buy'),
+        (CASH_OUT, 'Cash-Out'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='chip_transactions')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='chip_transactions')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
     def save(self, *args, **kwargs):
-        """Beim Speichern eines EventParticipation-Objekts wird das Event aktualisiert."""
+        if not self._state.adding:
+            raise ValidationError("Chip-Transaktionen können nicht geändert werden.")
         super().save(*args, **kwargs)
-        self.event.update_remaining_chips()  # Aktualisiert die verbleibenden Chips im Event
-    
+
+    @property
+    def signed_amount(self):
+        return self.amount if self.kind == self.CASH_OUT else -self.amount
+
+    @classmethod
+    def balance(cls, queryset):
+        """Summe der Chip-Bewegungen (negativ = aus dem Pot genommen) in einer Query."""
+        signed = Case(When(kind=cls.CASH_OUT, then=F('amount')), default=-F('amount'))
+        return queryset.aggregate(total=Sum(signed))['total'] or 0
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount} ({self.player_id} in event {self.event_id})"
+
+
+class EventSummary(models.Model):
+    """Abrechnung eines beendeten Events; wird einmal von settlement.py geschrieben und nicht mehr geändert.
+
+    Datum, ASOP und Ort sind vom Event kopiert, damit Verlaufsseiten ohne Join auskommen.
+    chip_difference ist remaining_chips - (pot - total_buy_in + cashed_out), bei stimmigem Ledger 0.
+    """
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='summary')
+    date = models.DateField()
+    asop = models.BooleanField(default=False)
+    host_location = models.CharField(max_length=100, blank=True, null=True)
+    players = models.PositiveIntegerField(default=0)
+    pot = models.DecimalField(max_digits=10, decimal_places=2)
+    total_initial_buy_in = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_re_buy = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_buy_in = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    cashed_out = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    remaining_chips = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    chip_difference = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    settled_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-date'], name='event_summary_date_idx'),  # vergangene Events
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Abgerechnete Events können nicht geändert werden.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Summary of event {self.event_id} on {self.date}"
+
+
+class EventResult(models.Model):
+    """Ergebnis eines Spielers in einem abgerechneten Event (net = earnings - Buy-Ins)."""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='results')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='event_results')
+    date = models.DateField()  # Kopie von Event.date
+    asop = models.BooleanField(default=False)  # Kopie von Event.asop
+    initial_buy_in = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    re_buy = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    net = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    position = models.PositiveIntegerField()  # 1 = höchstes Netto-Ergebnis im Event
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'player'], name='unique_event_result'),
+        ]
+        indexes = [
+            models.Index(fields=['player', 'date', 'event'], name='event_result_player_idx'),  # Statistiken
+        ]
+
     def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Abgerechnete Events können nicht geändert werden.")
         super().save(*args, **kwargs)
-        # Update the player's total earnings whenever an EventParticipation is saved
-        self.player.update_total_earnings()
 
     def __str__(self):
-        return f"{self.player.name} in {self.event.date}"
\ No newline at end of file
+        return f"{self.player_id} in event {self.event_id}: {self.net}"
+
+
+class RankSnapshot(models.Model):
+    """Neuer Ranglistenplatz eines Spielers nach einem abgerechneten Event, gepflegt von rank_history.py.
+
+    Nur Spieler, deren Platz oder Summe sich durch das Event geändert hat, bekommen eine Zeile.
+    """
+    TOP = 'top'
+    ASOP = 'asop'
+    BOARD_CHOICES = [
+        (TOP, 'All-time'),
+        (ASOP, 'ASOP (all events)'),
+    ]
+
+    board = models.CharField(max_length=10, choices=BOARD_CHOICES)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='rank_snapshots')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='rank_snapshots')
+    date = models.DateField()  # Kopie von Event.date
+    position = models.PositiveIntegerField()  # 1 = höchste Summe nach dem Event
+    earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # Summe bis einschließlich Event
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'event', 'player'], name='unique_rank_snapshot'),
+        ]
+        indexes = [
+            models.Index(fields=['board', 'player', 'date', 'event'], name='rank_history_idx'),  # Rang-Charts
+        ]
+
+    def __str__(self):
+        return f"{self.board}: {self.player_id} #{self.position} after event {self.event_id}"
+
+
+class ArchivedParticipation(models.Model):
+    """Teilnahme an einem archivierten Event, mit der ID aus EventParticipation (siehe poker_data/archive.py)."""
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='archived_participations')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='archived_participations')
+    date = models.DateField()  # Kopie von Event.date
+    asop = models.BooleanField(default=False)  # Kopie von Event.asop
+    earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    initial_buy_in = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    re_buy = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.player_id} in archived event {self.event_id}"
+
+
+class ArchivedChipTransaction(models.Model):
+    """Ledger-Eintrag eines archivierten Events, mit ID und Zeitpunkt aus ChipTransaction."""
+    id = models.BigIntegerField(primary_key=True)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='archived_chip_transactions')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='archived_chip_transactions')
+    kind = models.CharField(max_length=10, choices=ChipTransaction.KIND_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount} ({self.player_id} in archived event {self.event_id})"
+
+
+class PlayerArchiveTotal(models.Model):
+    """Summen aller archivierten Teilnahmen eines Spielers (Carry-Forward).
+
+    total_earnings, die ASOP-Rangliste und last_played rechnen diese eine Zeile zu den
+    Teilnahmen in EventParticipation hinzu, statt das Archiv zu lesen.
+    """
+    player = models.OneToOneField(Player, on_delete=models.CASCADE, primary_key=True, related_name='archive_total')
+    events = models.PositiveIntegerField(default=0)
+    earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    buy_in = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # Initial-Buy-In + Re-Buys
+    asop_events = models.PositiveIntegerField(default=0)
+    asop_earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_played = models.DateField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Archive totals of {self.player_id}: {self.earnings}"
@@ -0,0 +1,49 @@
+# poker_data/parallel.py
+"""Unabhängige ORM-Abfragen gleichzeitig ausführen, für async Views.
+
+Djangos async ORM (``aget``, ``aiterator`` …) gibt jede Query an denselben einen
+Thread weiter (``thread_sensitive``); mehrere ``await``s laufen damit trotzdem
+nacheinander. ``gather`` führt jede Funktion stattdessen in einem eigenen Thread mit
+eigener Datenbankverbindung aus. Auf SQLite lesen diese Verbindungen im WAL-Modus
+parallel, ohne sich zu blockieren.
+
+Die Threads sehen keine offenen Transaktionen des aufrufenden Threads; für Abfragen,
+die eigene, noch nicht committete Schreibzugriffe lesen müssen, ist das nichts.
+"""
+import asyncio
+import contextvars
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+
+# execute_wrappers of the current request, also installed in the worker threads
+query_wrappers = contextvars.ContextVar('query_wrappers', default=())
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """``connection.execute_wrapper``, das auch für Queries aus ``gather`` gilt."""
+    token = query_wrappers.set(query_wrappers.get() + (wrapper,))
+    try:
+        with connection.execute_wrapper(wrapper):
+            yield
+    finally:
+        query_wrappers.reset(token)
+
+
+def _in_worker(func):
+    def run():
+        try:
+            with ExitStack() as stack:
+                for wrapper in query_wrappers.get():
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+                return func()
+        finally:
+            close_old_connections()  # honours CONN_MAX_AGE, like the end of a request
+    return run
+
+
+async def gather(*funcs):
+    """Ruft die (synchronen) Funktionen gleichzeitig in Worker-Threads auf; Ergebnisse in Reihenfolge."""
+    return await asyncio.gather(*(sync_to_async(_in_worker(func), thread_sensitive=False)() for func in funcs))
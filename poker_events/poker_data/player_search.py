@@ -0,0 +1,26 @@
+# poker_data/player_search.py
+"""Spielerauswahl für die Formulare, ohne den ganzen Kader auszuliefern.
+
+Die Seiten zeigen nur die zuletzt aktiven Spieler (``recent``, über player_recent_idx);
+alle anderen holt das Suchfeld bei Bedarf über /api/players/search/ (``search``). Die
+Suche ist ein Präfix-Vergleich ohne Groß-/Kleinschreibung (``name LIKE 'abc%'``), den
+SQLite über den NOCASE-Index player_name_search_idx beantwortet; Treffer kommen
+nach letzter Teilnahme sortiert, Spieler ohne Teilnahme zuletzt.
+"""
+from poker_data.models import Player
+
+RECENT_LIMIT = 30  # players rendered into add_event/add_players
+MAX_RESULTS = 50
+FIELDS = ('id', 'name', 'last_played')
+
+
+def recent(limit=RECENT_LIMIT):
+    return Player.objects.order_by('-last_played', 'id').only(*FIELDS)[:limit]
+
+
+def search(term, limit=MAX_RESULTS):
+    """Spieler, deren Name mit ``term`` beginnt; ein leerer Suchbegriff liefert ``recent``."""
+    term = term.strip()
+    if not term:
+        return recent(limit)
+    return Player.objects.filter(name__istartswith=term).order_by('-last_played', 'id').only(*FIELDS)[:limit]
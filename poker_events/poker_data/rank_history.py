@@ -0,0 +1,150 @@
+# poker_data/rank_history.py
+"""Verlauf der Ranglistenplätze, Event für Event.
+
+Nach jedem abgerechneten Event schreibt ``RankSnapshot`` für die All-Time- und die
+ASOP-Rangliste den neuen Platz und die neue Summe der Teilnehmer und jedes Spielers,
+dessen Platz sich innerhalb der ersten ``settings.RANK_HISTORY_DEPTH`` geändert hat
+(auch wer dabei herausfällt). Für diese Plätze ist der Platz nach einem beliebigen Event
+die letzte Zeile bis dahin; weiter unten verschiebt jeder Neueinsteiger tausende Spieler
+um einen Platz, dort zeichnet der Verlauf nur die eigenen Events auf. Ein Rang-Chart
+liest nur die Zeilen des Spielers aus dem Index ``rank_history_idx``, ohne die
+Ranglisten pro Event neu zu aggregieren.
+
+Grundlage sind die eingefrorenen Ergebnisse (``EventResult``, settlement.py), auch
+die archivierter Events; offene Events zählen noch nicht. Events folgen nach Datum und
+ID aufeinander, sortiert wird wie in leaderboards.py nach ``(-Summe, player_id)``.
+
+``settlement.settle`` spielt das neue Event auf die Summen davor ab. Wird ein älteres
+Event abgerechnet, verschoben oder gelöscht, schreibt ``rebuild(since)`` den Verlauf ab
+dieser Stelle neu.
+"""
+from bisect import bisect_left, insort
+from decimal import Decimal
+from itertools import groupby, islice, zip_longest
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Subquery, Sum
+
+from poker_data.models import EventResult, RankSnapshot
+
+ZERO = Decimal('0.00')
+BATCH_SIZE = 2000
+
+
+def depth():
+    return getattr(settings, 'RANK_HISTORY_DEPTH', 100)
+
+
+def _from(since):
+    # Events ab (Datum, Event-ID) in der Reihenfolge des Verlaufs
+    date, event_id = since
+    return Q(date__gt=date) | Q(date=date, event_id__gte=event_id)
+
+
+def replay(standings, events, depth):
+    """Spielt Events auf ``standings`` (``{player_id: Summe}``, wird geändert) ab.
+
+    ``events`` liefert ``(event_id, date, [(player_id, earnings), ...])`` in Reihenfolge;
+    erzeugt ``(event_id, date, player_id, position, Summe)`` für die Teilnehmer und die
+    geänderten Plätze bis ``depth``.
+    """
+    ranking = sorted((-total, player_id) for player_id, total in standings.items())
+    for event_id, date, results in events:
+        top_before = ranking[:depth]
+        played = set()
+        for player_id, earnings in results:
+            total = standings.get(player_id)
+            if total is not None:
+                del ranking[bisect_left(ranking, (-total, player_id))]
+            standings[player_id] = (total or ZERO) + earnings
+            insort(ranking, (-standings[player_id], player_id))
+            played.add(player_id)
+
+        top = ranking[:depth]
+        changed = {
+            key[1]: position
+            for position, (key, old) in enumerate(zip_longest(top, top_before), start=1)
+            if key != old or key[1] in played
+        }
+        pushed_out = {player_id for _, player_id in top_before} - {player_id for _, player_id in top}
+        for player_id in (played | pushed_out) - changed.keys():
+            changed[player_id] = bisect_left(ranking, (-standings[player_id], player_id)) + 1
+        for player_id, position in sorted(changed.items(), key=lambda item: item[1]):
+            yield event_id, date, player_id, position, standings[player_id]
+
+
+def _events(results):
+    rows = results.order_by('date', 'event_id').values_list('event_id', 'date', 'asop', 'player_id', 'earnings')
+    for (event_id, date, asop), group in groupby(rows, key=lambda row: row[:3]):
+        yield event_id, date, asop, [(player_id, earnings) for _, _, _, player_id, earnings in group]
+
+
+def rebuild(since=None):
+    """Schreibt den Verlauf ab ``since`` (``(Datum, Event-ID)``, None = alles) neu; gibt die Anzahl Zeilen zurück.
+
+    Beide Ranglisten zusammen: eine Query für die Summen davor, eine für die Ergebnisse danach.
+    """
+    # One transaction for all rows (autocommit would sync every INSERT); no savepoint inside settle()
+    with transaction.atomic(savepoint=False):
+        return _rebuild(since)
+
+
+def _rebuild(since):
+    results = EventResult.objects.all()
+    snapshots = RankSnapshot.objects.all()
+    top, asop = {}, {}
+    if since is not None:
+        for player_id, total, asop_total in (
+            results.exclude(_from(since)).values('player_id')
+            .annotate(total=Sum('earnings'), asop_total=Sum('earnings', filter=Q(asop=True)))
+            .values_list('player_id', 'total', 'asop_total').order_by()
+        ):
+            top[player_id] = total
+            if asop_total is not None:
+                asop[player_id] = asop_total
+        results = results.filter(_from(since))
+        snapshots = snapshots.filter(_from(since))
+    snapshots.delete()
+
+    events = list(_events(results))
+    rows = (
+        (board, event_id, player_id, date.isoformat(), position, str(total))
+        for board, standings, board_events in (
+            (RankSnapshot.TOP, top, events),
+            (RankSnapshot.ASOP, asop, [event for event in events if event[2]]),
+        )
+        for event_id, date, player_id, position, total in replay(
+            standings, ((event_id, date, results) for event_id, date, _, results in board_events), depth()
+        )
+    )
+    # Plain INSERT: with bulk_create, building a model instance per row costs more than the INSERT itself
+    sql = 'INSERT INTO {} (board, event_id, player_id, date, position, earnings) VALUES (%s, %s, %s, %s, %s, %s)'
+    written = 0
+    with connection.cursor() as cursor:
+        while batch := list(islice(rows, BATCH_SIZE)):
+            cursor.executemany(sql.format(connection.ops.quote_name(RankSnapshot._meta.db_table)), batch)
+            written += len(batch)
+    return written
+
+
+def record(event):
+    """Schreibt die Plätze nach dem gerade abgerechneten ``event`` (und nach allen späteren)."""
+    return rebuild(since=(event.date, event.id))
+
+
+def history(player_id, board=RankSnapshot.TOP, start=None, end=None):
+    """``(event_id, date, position, earnings)`` eines Spielers nach jedem Event, das ihn bewegt hat.
+
+    Nur Events mit ``start <= Datum <= end``.
+    Mit ``start`` steht vorne die letzte Zeile davor (der Platz zu Beginn des Zeitraums).
+    Eine Query, die nur die Zeilen des Spielers aus ``rank_history_idx`` liest.
+    """
+    snapshots = RankSnapshot.objects.filter(board=board, player_id=player_id)
+    rows = snapshots.order_by('date', 'event_id')
+    if end is not None:
+        rows = rows.filter(date__lte=end)
+    if start is not None:
+        previous = snapshots.filter(date__lt=start).order_by('-date', '-event_id').values('pk')[:1]
+        rows = rows.filter(Q(date__gte=start) | Q(pk=Subquery(previous)))
+    return rows.values_list('event_id', 'date', 'position', 'earnings')
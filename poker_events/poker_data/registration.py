@@ -0,0 +1,84 @@
+# poker_data/registration.py
+"""Gebündelte Anmeldung von Spielern zu einem Event.
+
+Unabhängig von der Spielerzahl braucht eine Anmeldung eine feste Anzahl an Queries:
+Spieler und bestehende Teilnahmen werden je einmal geladen, alle Schreibzugriffe laufen
+über bulk_create/bulk_update in einer Transaktion und remaining_chips wird einmal über
+das Chip-Ledger angepasst (siehe chips.py).
+"""
+from decimal import Decimal
+
+from django.db.models import F
+
+from poker_data import caching, chips, earnings, leaderboards, live, settlement
+from poker_data.sqlite import immediate_atomic
+from poker_data.models import ChipTransaction, EventParticipation, Player
+
+ZERO = Decimal('0.00')
+
+
+def register_participants(event, entries):
+    """Meldet Spieler zu einem Event an.
+
+    ``entries`` bildet player_id auf ``(initial_buy_in, re_buy)`` ab. Wie im Formular gilt:
+    neue Teilnahmen bekommen das Initial-Buy-In, bestehende Teilnahmen ohne Initial-Buy-In
+    bekommen den Re-Buy gutgeschrieben, Teilnahmen mit Initial-Buy-In werden übersprungen.
+    Alle Beträge werden als Buy-In/Re-Buy im Chip-Ledger gebucht; reichen die Chips des
+    Events nicht, schlägt die ganze Anmeldung mit ``chips.InsufficientChips`` fehl.
+    """
+    result = {'created': [], 'updated': [], 'skipped': [], 'unknown': [], 'total_buy_in': ZERO}
+
+    # Liest zuerst und schreibt dann: ohne IMMEDIATE würde der Wechsel zum Schreiben auf
+    # SQLite bei gleichzeitigen Buchungen mit "database is locked" scheitern
+    with immediate_atomic():
+        players = Player.objects.in_bulk(list(entries))
+        existing = {
+            participation.player_id: participation
+            for participation in EventParticipation.objects.filter(event=event, player_id__in=players)
+        }
+
+        to_create = []
+        to_update = []
+        ledger = []
+        total_buy_in = ZERO
+        for player_id, (initial_buy_in, re_buy) in entries.items():
+            if player_id not in players:
+                result['unknown'].append(player_id)
+                continue
+
+            participation = existing.get(player_id)
+            if participation is None:
+                initial_buy_in = max(initial_buy_in, ZERO)
+                to_create.append(EventParticipation(event=event, player_id=player_id, initial_buy_in=initial_buy_in))
+                ledger.append(ChipTransaction(
+                    event=event, player_id=player_id, kind=ChipTransaction.BUY_IN, amount=initial_buy_in
+                ))
+                total_buy_in += initial_buy_in
+                result['created'].append(player_id)
+            elif participation.initial_buy_in > 0:
+                result['skipped'].append(player_id)
+            else:
+                re_buy = max(re_buy, ZERO)
+                participation.re_buy = F('re_buy') + re_buy
+                to_update.append(participation)
+                ledger.append(ChipTransaction(event=event, player_id=player_id, kind=ChipTransaction.RE_BUY, amount=re_buy))
+                total_buy_in += re_buy
+                result['updated'].append(player_id)
+
+        EventParticipation.objects.bulk_create(to_create)
+        if to_update:
+            EventParticipation.objects.bulk_update(to_update, ['re_buy'])
+
+        chips.apply_transactions(event.pk, ledger, check_remaining=True)
+
+        # bulk_create/bulk_update senden keine post_save-Signale
+        touched = result['created'] + result['updated']
+        if touched:
+            leaderboards.refresh_for_participations(touched, [event.pk])
+            earnings.mark_dirty(touched)  # buy-ins and event counts in the period rollups
+            settlement.mark_stale([event.pk])
+            caching.bump_on_commit(caching.DATA)
+            live.notify(event.pk)
+
+    result['total_buy_in'] = total_buy_in
+    return result
@@ -0,0 +1,166 @@
+# poker_data/rollups.py
+"""Vorberechnete Spieler-Summen pro Monat, Saison (Quartal) und Jahr.
+
+``PlayerPeriodTotal`` wird zusammen mit total_earnings gepflegt: Teilnahmen markieren
+den Spieler über ``earnings.mark_dirty`` vor, nach dem Commit werden alle Perioden der
+markierten Spieler mit einer gruppierten Query neu berechnet. Re-Buys ändern nur die
+Buy-In-Summen; ``add_buy_in`` zählt sie direkt auf die drei Perioden des Events auf.
+
+Ranglisten einer Periode lesen nur deren Zeilen. Beliebige Datumsbereiche werden in
+ganze Jahre und Monate zerlegt; nur angebrochene Monate am Rand lesen Teilnahmen.
+Teilnahmen archivierter Events (archive.py) werden dabei jeweils mitgelesen.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Subquery, Sum, Value, When
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncYear
+
+from poker_data import leaderboards
+from poker_data.models import ArchivedParticipation, Event, EventParticipation, Player, PlayerPeriodTotal
+
+ZERO = Decimal('0.00')
+BATCH_SIZE = 2000
+
+
+def period_start(period, date):
+    """Erster Tag der Periode, in der ``date`` liegt."""
+    if period == PlayerPeriodTotal.MONTH:
+        return date.replace(day=1)
+    if period == PlayerPeriodTotal.SEASON:
+        return date.replace(month=(date.month - 1) // 3 * 3 + 1, day=1)
+    if period == PlayerPeriodTotal.YEAR:
+        return date.replace(month=1, day=1)
+    raise KeyError(period)
+
+
+def _totals(participations, *group_by):
+    # One row per player (and group_by) with earnings, buy-ins and number of events
+    return participations.values('player_id', *group_by).annotate(
+        earnings=Sum('earnings'),
+        buy_in=Sum(F('initial_buy_in') + F('re_buy')),
+        events=Count('id'),
+    ).order_by()
+
+
+def recompute(player_ids=None):
+    """Berechnet alle Perioden der Spieler neu; ohne IDs für alle Spieler."""
+    participations = EventParticipation.objects.annotate(month=TruncMonth('event__date'))
+    archived = ArchivedParticipation.objects.annotate(month=TruncMonth('date'))  # siehe archive.py
+    existing = PlayerPeriodTotal.objects.all()
+    if player_ids is not None:
+        participations = participations.filter(player_id__in=player_ids)
+        archived = archived.filter(player_id__in=player_ids)
+        existing = existing.filter(player_id__in=player_ids)
+
+    # Monate kommen aus der Datenbank, Saisons und Jahre sind Summen über die Monate
+    totals = defaultdict(lambda: [ZERO, ZERO, 0])
+    for row in _totals(participations, 'month').union(_totals(archived, 'month'), all=True):
+        for period, _ in PlayerPeriodTotal.PERIOD_CHOICES:
+            total = totals[row['player_id'], period, period_start(period, row['month'])]
+            total[0] += row['earnings'] or ZERO
+            total[1] += row['buy_in'] or ZERO
+            total[2] += row['events']
+
+    with transaction.atomic(savepoint=False):
+        existing.delete()
+        PlayerPeriodTotal.objects.bulk_create([
+            PlayerPeriodTotal(player_id=player_id, period=period, period_start=start,
+                              earnings=earnings, buy_in=buy_in, events=events)
+            for (player_id, period, start), (earnings, buy_in, events) in totals.items()
+        ], batch_size=BATCH_SIZE)
+    return len(totals)
+
+
+def add_buy_in(event_id, amounts):
+    """Zählt Re-Buys ``{player_id: amount}`` eines Events auf die Buy-In-Summen seiner Perioden.
+
+    Ein UPDATE ``buy_in = buy_in + CASE player_id ...`` statt der Neuberechnung, die Perioden
+    kommen aus dem Datum des Events in derselben Query. Gibt False zurück, wenn
+    Periodenzeilen fehlen (dann muss ``recompute`` die Spieler nachholen).
+    """
+    date = Subquery(Event.objects.filter(pk=event_id).values('date'))
+    updated = PlayerPeriodTotal.objects.filter(player_id__in=amounts, period_start=Case(
+        When(period=PlayerPeriodTotal.MONTH, then=TruncMonth(date)),
+        When(period=PlayerPeriodTotal.SEASON, then=TruncQuarter(date)),
+        When(period=PlayerPeriodTotal.YEAR, then=TruncYear(date)),
+    )).update(buy_in=F('buy_in') + Case(
+        *[When(player_id=player_id, then=Value(amount)) for player_id, amount in amounts.items()],
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    ))
+    return updated == len(PlayerPeriodTotal.PERIOD_CHOICES) * len(amounts)
+
+
+def period_ranking(period, date, limit=leaderboards.PAGE_SIZE):
+    """Rangliste der Periode, in der ``date`` liegt (liest nur vorberechnete Zeilen)."""
+    return list(
+        PlayerPeriodTotal.objects.filter(period=period, period_start=period_start(period, date))
+        .order_by('-earnings', 'player_id')
+        .values('player_id', 'earnings', 'buy_in', 'events', name=F('player__name'))[:limit]
+    )
+
+
+def split_range(date_from, date_to):
+    """Zerlegt ``[date_from, date_to]`` in ganze Jahre, ganze Monate und Resttage.
+
+    Gibt ``(periods, days)`` zurück: ``periods`` sind ``(period, period_start)``-Paare,
+    ``days`` sind ``(von, bis)``-Bereiche, die nicht in einen ganzen Monat fallen.
+    """
+    periods, days = [], []
+    day = date_from
+    while day <= date_to:
+        next_year = datetime.date(day.year + 1, 1, 1)
+        next_month = datetime.date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        if day.month == 1 and day.day == 1 and next_year - datetime.timedelta(days=1) <= date_to:
+            periods.append((PlayerPeriodTotal.YEAR, day))
+            day = next_year
+        elif day.day == 1 and next_month - datetime.timedelta(days=1) <= date_to:
+            periods.append((PlayerPeriodTotal.MONTH, day))
+            day = next_month
+        else:
+            end = min(next_month - datetime.timedelta(days=1), date_to)
+            days.append((day, end))
+            day = end + datetime.timedelta(days=1)
+    return periods, days
+
+
+def _ranked(rows, limit):
+    # Merge partial totals per player, sort like the leaderboards and add the names
+    merged = defaultdict(lambda: {'earnings': ZERO, 'buy_in': ZERO, 'events': 0})
+    for row in rows:
+        total = merged[row['player_id']]
+        total['earnings'] += row['earnings'] or ZERO
+        total['buy_in'] += row['buy_in'] or ZERO
+        total['events'] += row['events']
+    ranked = sorted(merged.items(), key=lambda item: (-item[1]['earnings'], item[0]))[:limit]
+    names = dict(Player.objects.filter(pk__in=[player_id for player_id, _ in ranked]).values_list('id', 'name'))
+    return [{'player_id': player_id, 'name': names.get(player_id), **total} for player_id, total in ranked]
+
+
+def range_ranking(date_from, date_to, limit=leaderboards.PAGE_SIZE):
+    """Rangliste über einen Datumsbereich (beide Grenzen inklusive)."""
+    periods, days = split_range(date_from, date_to)
+    rows = []
+    if periods:
+        rows += PlayerPeriodTotal.objects.filter(
+            Q(*[Q(period=period, period_start=start) for period, start in periods], _connector=Q.OR)
+        ).values('player_id').annotate(
+            earnings=Sum('earnings'), buy_in=Sum('buy_in'), events=Sum('events'),
+        ).order_by()
+    if days:
+        rows += _totals(EventParticipation.objects.filter(
+            Q(*[Q(event__date__range=span) for span in days], _connector=Q.OR)
+        )).union(_totals(ArchivedParticipation.objects.filter(
+            Q(*[Q(date__range=span) for span in days], _connector=Q.OR)
+        )), all=True)
+    return _ranked(rows, limit)
+
+
+def last_events_ranking(count, limit=leaderboards.PAGE_SIZE):
+    """Rangliste über die letzten ``count`` Events (liest nur deren Teilnahmen)."""
+    event_ids = leaderboards.recent_event_ids(count)
+    return _ranked(_totals(EventParticipation.objects.filter(event_id__in=event_ids)).union(
+        _totals(ArchivedParticipation.objects.filter(event_id__in=event_ids)), all=True,
+    ), limit)
@@ -0,0 +1,155 @@
+# poker_data/settlement.py
+"""Abrechnung beendeter Events.
+
+Beim Beenden eines Events werden Netto-Ergebnisse, Buy-In- und Re-Buy-Summen und der
+Abgleich des Pots in einem Durchlauf über die Teilnahmen berechnet und als
+``EventSummary`` plus eine ``EventResult``-Zeile pro Spieler gespeichert. Verlaufsseiten,
+die "Last ASOP"-Rangliste und die Statistiken (stats.py) lesen danach diese Zeilen,
+ohne Joins oder Aggregate über die Teilnahmen. Aus den Ergebnissen schreibt
+rank_history.py den Verlauf der Ranglistenplätze fort.
+
+Werden Teilnahmen eines abgerechneten Events nachträglich gespeichert oder gelöscht,
+merkt ``mark_stale`` (Signal in signals.py) das Event vor; nach dem Commit wird es wie mit
+``python manage.py settle_events --resettle --event <id>`` neu abgerechnet, samt
+Rangverlauf und "Last ASOP"-Rangliste.
+"""
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from poker_data import caching, leaderboards, rank_history
+from poker_data.models import ChipTransaction, Event, EventParticipation, EventResult, EventSummary
+from poker_data.sqlite import immediate_atomic
+
+ZERO = Decimal('0.00')
+BATCH_SIZE = 500  # events per settlement transaction
+
+_state = threading.local()
+
+
+class AlreadySettled(Exception):
+    pass
+
+
+def _build(events):
+    """Summaries und Ergebnisse für ``events``: eine Query für Teilnahmen, eine für Cash-Outs."""
+    by_id = {event.id: event for event in events}
+    participations = defaultdict(list)
+    for event_id, player_id, initial_buy_in, re_buy, earnings in (
+        EventParticipation.objects.filter(event_id__in=by_id).order_by()
+        .values_list('event_id', 'player_id', 'initial_buy_in', 're_buy', 'earnings')
+    ):
+        participations[event_id].append((player_id, initial_buy_in, re_buy, earnings))
+    cashed_out = dict(
+        ChipTransaction.objects.filter(event_id__in=by_id, kind=ChipTransaction.CASH_OUT)
+        .values('event_id').annotate(total=Sum('amount')).values_list('event_id', 'total')
+    )
+
+    summaries, results = [], []
+    for event_id, event in by_id.items():
+        totals = [ZERO, ZERO, ZERO]  # initial buy-ins, re-buys, earnings
+        rows = []
+        for player_id, initial_buy_in, re_buy, earnings in participations[event_id]:
+            totals[0] += initial_buy_in
+            totals[1] += re_buy
+            totals[2] += earnings
+            rows.append((earnings - initial_buy_in - re_buy, player_id, initial_buy_in, re_buy, earnings))
+        rows.sort(key=lambda row: (-row[0], row[1]))
+        results += [
+            EventResult(event_id=event_id, player_id=player_id, date=event.date, asop=event.asop,
+                        initial_buy_in=initial_buy_in, re_buy=re_buy, earnings=earnings, net=net,
+                        position=position)
+            for position, (net, player_id, initial_buy_in, re_buy, earnings) in enumerate(rows, start=1)
+        ]
+        total_buy_in = totals[0] + totals[1]
+        returned = cashed_out.get(event_id) or ZERO
+        summaries.append(EventSummary(
+            event_id=event_id, date=event.date, asop=event.asop, host_location=event.host_location,
+            players=len(rows), pot=event.pot, total_initial_buy_in=totals[0], total_re_buy=totals[1],
+            total_buy_in=total_buy_in, total_earnings=totals[2], cashed_out=returned,
+            remaining_chips=event.remaining_chips,
+            chip_difference=event.remaining_chips - (event.pot - total_buy_in + returned),
+        ))
+    return summaries, results
+
+
+def _write(events, replace=False):
+    summaries, results = _build(events)
+    if replace:
+        event_ids = [event.id for event in events]
+        EventResult.objects.filter(event_id__in=event_ids).delete()
+        EventSummary.objects.filter(event_id__in=event_ids).delete()
+    EventSummary.objects.bulk_create(summaries)
+    EventResult.objects.bulk_create(results, batch_size=2000)
+    return summaries
+
+
+def settle(event_id):
+    """Beendet ein Event und rechnet es ab; gibt die ``EventSummary`` zurück."""
+    with immediate_atomic():
+        event = Event.objects.get(pk=event_id)
+        if EventSummary.objects.filter(event_id=event_id).exists():
+            raise AlreadySettled(f"Event {event_id} ist bereits abgerechnet.")
+        if event.active:
+            # save() löst die Signale aus (aktive Events im Cache, Live-Stream)
+            event.active = False
+            event.save(update_fields=['active'])
+        # The rankings already match the participations, the results just freeze them
+        summary, = _write([event])
+        rank_history.record(event)
+        caching.bump_on_commit(caching.DATA)
+    return summary
+
+
+def settle_finished(event_ids=None, resettle=False):
+    """Rechnet beendete Events ab, die noch keine Summary haben (mit ``resettle`` alle erneut).
+
+    Für Importe, synthetische Daten und bestehende Datenbanken; gibt die Anzahl zurück.
+    """
+    # Archivierte Events haben keine Teilnahmen mehr; erst mit restore_events zurückholen
+    events = Event.objects.filter(active=False, archived=False).order_by('id')
+    if event_ids is not None:
+        events = events.filter(id__in=event_ids)
+    if not resettle:
+        events = events.filter(summary__isnull=True)
+    settled = 0
+    last_id = 0
+    since = None  # earliest settled event, the rank history is rewritten from there
+    while batch := list(events.filter(id__gt=last_id)[:BATCH_SIZE]):
+        with immediate_atomic():
+            settled += len(_write(batch, replace=resettle))
+        last_id = batch[-1].id
+        first = min((event.date, event.id) for event in batch)
+        since = min(since, first) if since else first
+    if settled:
+        with immediate_atomic():
+            rank_history.rebuild(since)
+            leaderboards.rebuild_last_asop()
+            caching.bump_on_commit(caching.DATA)
+    return settled
+
+
+def _pending():
+    if not hasattr(_state, 'event_ids'):
+        _state.event_ids = set()
+    return _state.event_ids
+
+
+def _flush():
+    # Like earnings.mark_dirty: the first callback per commit re-settles all marked events
+    pending = _pending()
+    if pending:
+        event_ids = set(pending)
+        pending.clear()
+        settled = Event.objects.filter(id__in=event_ids, summary__isnull=False).values_list('id', flat=True)
+        if settled := list(settled):
+            settle_finished(settled, resettle=True)
+
+
+def mark_stale(event_ids):
+    """Merkt Events vor, deren Teilnahmen sich geändert haben; abgerechnete werden nach dem Commit neu abgerechnet."""
+    _pending().update(event_ids)
+    transaction.on_commit(_flush)
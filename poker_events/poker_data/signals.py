@@ -0,0 +1,124 @@
+# poker_data/signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from poker_data import archive, caching, earnings, leaderboards, live, rank_history, settlement
+from poker_data.models import Event, EventParticipation, EventResult, EventSummary, Player
+
+
+@receiver(post_save, sender=EventParticipation, dispatch_uid='leaderboards_participation_saved')
+@receiver(post_delete, sender=EventParticipation, dispatch_uid='leaderboards_participation_deleted')
+def participation_changed(sender, instance, **kwargs):
+    leaderboards.refresh_for_participations([instance.player_id], [instance.event_id])
+
+
+@receiver(pre_save, sender=Event, dispatch_uid='leaderboards_event_snapshot')
+def remember_event_ranking_fields(sender, instance, **kwargs):
+    # Keep the old asop/date values so post_save knows whether the rankings are affected
+    instance._ranking_fields = (
+        Event.objects.filter(pk=instance.pk).values_list('asop', 'date').first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Event, dispatch_uid='leaderboards_event_saved')
+def event_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_ranking_fields', None)
+    if created or previous is None:
+        leaderboards.refresh_for_event_change(instance, asop_changed=False)
+        return
+    old_asop, old_date = previous
+    if old_asop != instance.asop or str(old_date) != str(instance.date):
+        leaderboards.refresh_for_event_change(instance, asop_changed=old_asop != instance.asop)
+
+
+@receiver(post_delete, sender=Event, dispatch_uid='leaderboards_event_deleted')
+def event_deleted(sender, instance, **kwargs):
+    leaderboards.refresh_for_event_change(instance, asop_changed=False)
+
+
+@receiver(pre_delete, sender=Event, dispatch_uid='archive_event_deleted')
+def forget_archived_event(sender, instance, **kwargs):
+    # The archived participations only count through the carry-forward totals, take them out there
+    if instance.archived:
+        player_ids = archive.forget(instance)
+        leaderboards.refresh_asop_players(player_ids)
+        earnings.mark_dirty(player_ids)
+
+
+@receiver(post_save, sender=Event, dispatch_uid='active_events_saved')
+@receiver(post_delete, sender=Event, dispatch_uid='active_events_deleted')
+def invalidate_active_events(sender, **kwargs):
+    caching.bump_on_commit(caching.ACTIVE_EVENTS, caching.DATA)
+
+
+@receiver(post_save, sender=Player, dispatch_uid='data_player_saved')
+@receiver(post_delete, sender=Player, dispatch_uid='data_player_deleted')
+@receiver(post_save, sender=EventParticipation, dispatch_uid='data_participation_saved')
+@receiver(post_delete, sender=EventParticipation, dispatch_uid='data_participation_deleted')
+def invalidate_data(sender, **kwargs):
+    # Bulk writes (registration, chips, leaderboard rebuilds) bump the version themselves
+    caching.bump_on_commit(caching.DATA)
+
+
+@receiver(post_save, sender=Event, dispatch_uid='live_event_saved')
+@receiver(post_delete, sender=Event, dispatch_uid='live_event_deleted')
+def push_event(sender, instance, **kwargs):
+    live.notify(instance.pk)
+
+
+@receiver(post_save, sender=EventParticipation, dispatch_uid='live_participation_saved')
+@receiver(post_delete, sender=EventParticipation, dispatch_uid='live_participation_deleted')
+def push_participation(sender, instance, **kwargs):
+    live.notify(instance.event_id)
+
+
+@receiver(post_save, sender=EventParticipation, dispatch_uid='earnings_participation_saved')
+@receiver(post_delete, sender=EventParticipation, dispatch_uid='earnings_participation_deleted')
+def mark_earnings_dirty(sender, instance, **kwargs):
+    earnings.mark_dirty([instance.player_id])
+
+
+@receiver(post_save, sender=EventParticipation, dispatch_uid='settlement_participation_saved')
+@receiver(post_delete, sender=EventParticipation, dispatch_uid='settlement_participation_deleted')
+def mark_settlement_stale(sender, instance, **kwargs):
+    # Results, summary, stats and rank history of a settled event would keep the old values
+    settlement.mark_stale([instance.event_id])
+
+
+@receiver(post_save, sender=Event, dispatch_uid='rollups_event_saved')
+def mark_rollups_dirty(sender, instance, created, **kwargs):
+    # A new date moves the event's participations into other months/seasons/years
+    previous = getattr(instance, '_ranking_fields', None)
+    if not created and previous is not None and str(previous[1]) != str(instance.date):
+        earnings.mark_dirty(EventParticipation.objects.filter(event=instance).values_list('player_id', flat=True))
+
+
+@receiver(post_save, sender=Event, dispatch_uid='settlement_event_saved')
+def sync_settled_event(sender, instance, created, update_fields=None, **kwargs):
+    # Summary and results keep copies of date/asop/host_location so readers don't need a join
+    if created or (update_fields is not None and not {'date', 'asop', 'host_location'} & set(update_fields)):
+        return
+    EventSummary.objects.filter(event=instance).update(
+        date=instance.date, asop=instance.asop, host_location=instance.host_location
+    )
+    settled = EventResult.objects.filter(event=instance).update(date=instance.date, asop=instance.asop)
+    previous = getattr(instance, '_ranking_fields', None)
+    if settled and previous is not None and (previous[0] != instance.asop or str(previous[1]) != str(instance.date)):
+        # The event moved in the history (or between the boards): rewrite from the earlier date on
+        rank_history.rebuild((min(str(previous[1]), str(instance.date)), 0))
+
+
+@receiver(pre_delete, sender=Event, dispatch_uid='rank_history_event_deleting')
+@receiver(pre_delete, sender=Player, dispatch_uid='rank_history_player_deleting')
+def remember_rank_history_start(sender, instance, **kwargs):
+    # The results are deleted with the event/player; everybody's places change from the first one on
+    results = EventResult.objects.filter(**{'event' if sender is Event else 'player': instance})
+    instance._rank_history_since = results.order_by('date', 'event_id').values_list('date', 'event_id').first()
+
+
+@receiver(post_delete, sender=Event, dispatch_uid='rank_history_event_deleted')
+@receiver(post_delete, sender=Player, dispatch_uid='rank_history_player_deleted')
+def rewrite_rank_history(sender, instance, **kwargs):
+    since = getattr(instance, '_rank_history_since', None)
+    if since is not None:
+        rank_history.rebuild(since)
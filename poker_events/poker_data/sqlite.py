@@ -0,0 +1,36 @@
+# poker_data/sqlite.py
+"""SQLite-spezifische Helfer für Schreibzugriffe unter Last.
+
+Eine normale (DEFERRED) Transaktion startet als Leser und braucht erst beim ersten
+Schreibzugriff die Schreibsperre. Hält dann eine andere Verbindung die Sperre, bricht
+SQLite sofort mit "database is locked" ab, busy_timeout hilft an dieser Stelle nicht.
+``immediate_atomic()`` nimmt die Sperre schon beim BEGIN und wartet dort bis zum
+busy_timeout. Die Chip-Buchungen (chips.py, registration.py) laufen darin.
+"""
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+
+
+@contextmanager
+def immediate_atomic(using='default', savepoint=True):
+    """``transaction.atomic()`` mit ``BEGIN IMMEDIATE`` auf SQLite.
+
+    Innerhalb einer bestehenden Transaktion und auf anderen Datenbanken verhält es sich
+    wie ``transaction.atomic(savepoint=savepoint)``.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using, savepoint=savepoint):
+            yield
+        return
+
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = previous  # BEGIN IMMEDIATE has been sent
+            yield
+    finally:
+        connection.transaction_mode = previous
@@ -0,0 +1,84 @@
+# poker_data/staticfiles.py
+"""Statische Dateien mit Hash im Namen, vorkomprimiert für gzip und Brotli.
+
+``collectstatic`` schreibt jede Datei zusätzlich unter einem Namen mit Inhalts-Hash
+(``JS/re_buy.3f2a9c1b7e4d.js``) und legt für Textdateien ``.gz``- und, falls das Paket
+``brotli`` installiert ist, ``.br``-Varianten daneben. ``StaticFilesMiddleware``
+(middleware.py) liefert die passende Variante aus; Dateien mit Hash im Namen ändern sich
+nie und bekommen ``Cache-Control: immutable`` für ein Jahr.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml'}
+MIN_COMPRESS_SIZE = 200  # bytes; below that the headers cost more than compression saves
+
+# (encoding, file suffix, compress function); preferred first
+ENCODINGS = [('gzip', '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+if brotli is not None:
+    ENCODINGS.insert(0, ('br', '.br', lambda data: brotli.compress(data, quality=11)))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        # Without collectstatic (tests, fresh checkouts) fall back to the plain name
+        # instead of failing every page that uses {% static %}
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        """Schreibt die komprimierten Varianten einer Datei, wenn sie kleiner sind."""
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+            return []
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return []
+        written = []
+        for _, suffix, compress in ENCODINGS:
+            compressed = compress(data)
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                written.append(name + suffix)
+        return written
+
+    def manifest_mtime(self):
+        try:
+            return os.path.getmtime(self.manifest_storage.path(self.manifest_name))
+        except OSError:  # no collectstatic yet
+            return None
+
+    def is_hashed(self, name):
+        """True für Namen aus dem Manifest, deren Inhalt sich also nie ändert.
+
+        Ein neues ``collectstatic`` (neue mtime des Manifests) wird ohne Neustart übernommen.
+        """
+        mtime = self.manifest_mtime()
+        cached = getattr(self, '_hashed_names', None)
+        if cached is None or cached[0] != mtime:
+            if cached is not None:
+                self.hashed_files, self.manifest_hash = self.load_manifest()
+            cached = self._hashed_names = (
+                mtime, {value for key, value in self.hashed_files.items() if value != key},
+            )
+        return name in cached[1]
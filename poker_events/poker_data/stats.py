@@ -0,0 +1,165 @@
+# poker_data/stats.py
+"""Spieler-Statistiken: Netto-Ergebnis, ROI, Varianz, Serien und Head-to-Head.
+
+Alle Ergebnisse abgerechneter Events (``EventResult``, siehe settlement.py) werden
+mit einer Query ohne Join in spaltenweise NumPy-Arrays geladen; die Kennzahlen aller Spieler entstehen daraus in wenigen
+vektorisierten Durchläufen statt in Schleifen pro Spieler. Das Ergebnis liegt pro
+Datenversion (caching.DATA) im Cache und wird nach jeder Änderung neu aufgebaut.
+
+Beträge werden in Cent (int64) gerechnet, damit Summen exakt bleiben. Das
+Netto-Ergebnis einer Teilnahme ist ``earnings - (initial_buy_in + re_buy)``.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+
+from poker_data import caching
+from poker_data.models import EventResult, Player
+
+CACHE_TIMEOUT = 3600
+
+
+def _cents(values):
+    # Decimal amounts with two places; rounding removes the float error of the conversion
+    return np.rint(np.array(values, dtype=np.float64) * 100).astype(np.int64)
+
+
+def _money(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _group_starts(keys):
+    # Index of the first row of every run of equal keys (keys must be sorted)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+
+
+def _longest_runs(flags, starts):
+    """Längste Folge von True pro Gruppe; Gruppen beginnen an ``starts``."""
+    index = np.arange(len(flags))
+    group_start = np.zeros(len(flags), dtype=bool)
+    group_start[starts] = True
+    # Position before the current run: the last False, or the row before the group start
+    breaks = np.where(~flags, index, np.where(group_start, index - 1, -1))
+    run_length = np.where(flags, index - np.maximum.accumulate(breaks), 0)
+    return np.maximum.reduceat(run_length, starts)
+
+
+class PlayerStats:
+    """Spaltenweise Teilnahmen und die daraus berechneten Kennzahlen aller Spieler."""
+
+    def __init__(self, player, event, net, buy_in):
+        # Sorted by player, then chronologically (the order the rows were loaded in)
+        self.player = player
+        self.event = event
+        self.net = net
+        self.buy_in = buy_in
+        self.starts = _group_starts(player)
+        self.player_ids = player[self.starts]
+        self.summary = self._summarize()
+
+    @classmethod
+    def load(cls):
+        rows = (
+            EventResult.objects.order_by('player_id', 'date', 'event_id')
+            .values_list('player_id', 'event_id', 'net', 'initial_buy_in', 're_buy')
+        )
+        player, event, net, initial_buy_in, re_buy = zip(*rows) if rows else ((),) * 5
+        return cls(
+            np.array(player, dtype=np.int64), np.array(event, dtype=np.int64),
+            _cents(net), _cents(initial_buy_in) + _cents(re_buy),
+        )
+
+    def _summarize(self):
+        if not len(self.player):
+            return {}
+        starts = self.starts
+        counts = np.diff(np.r_[starts, len(self.player)])
+        net = np.add.reduceat(self.net, starts)
+        buy_in = np.add.reduceat(self.buy_in, starts)
+        # Two passes (mean, then squared deviations) stay exact enough for large sums
+        mean = net / counts
+        deviation = self.net - np.repeat(mean, counts)
+        variance = np.add.reduceat(deviation ** 2, starts) / counts
+        wins = np.add.reduceat((self.net > 0).astype(np.int64), starts)
+        losses = np.add.reduceat((self.net < 0).astype(np.int64), starts)
+        best_streak = _longest_runs(self.net > 0, starts)
+        worst_streak = _longest_runs(self.net < 0, starts)
+        best_result = np.maximum.reduceat(self.net, starts)
+        worst_result = np.minimum.reduceat(self.net, starts)
+
+        summary = {}
+        for i, player_id in enumerate(self.player_ids.tolist()):
+            summary[player_id] = {
+                'events': int(counts[i]),
+                'net': _money(net[i]),
+                'buy_in': _money(buy_in[i]),
+                'roi': float(net[i] / buy_in[i]) if buy_in[i] else None,
+                'average': float(mean[i]) / 100,
+                'variance': float(variance[i]) / 10000,
+                'std_dev': float(np.sqrt(variance[i])) / 100,
+                'wins': int(wins[i]),
+                'losses': int(losses[i]),
+                'best_streak': int(best_streak[i]),
+                'worst_streak': int(worst_streak[i]),
+                'best_result': _money(best_result[i]),
+                'worst_result': _money(worst_result[i]),
+            }
+        return summary
+
+    def for_player(self, player_id):
+        return self.summary.get(player_id)
+
+    def head_to_head(self, player_id):
+        """Bilanz gegen jeden Spieler, der mit ``player_id`` an einem Event teilgenommen hat.
+
+        Gewonnen hat, wer im gemeinsamen Event das höhere Netto-Ergebnis erzielt hat.
+        Gibt eine Liste von Dicts, nach Anzahl gemeinsamer Events sortiert.
+        """
+        own = self.player == player_id
+        if not own.any():
+            return []
+        order = np.argsort(self.event[own])
+        own_events, own_nets = self.event[own][order], self.net[own][order]
+        shared = np.isin(self.event, own_events) & ~own
+        opponents, events, nets = self.player[shared], self.event[shared], self.net[shared]
+        difference = own_nets[np.searchsorted(own_events, events)] - nets
+
+        # Rows are still sorted by player, so each opponent is one contiguous group
+        starts = _group_starts(opponents)
+        if not len(starts):
+            return []
+        counts = np.diff(np.r_[starts, len(opponents)])
+        wins = np.add.reduceat((difference > 0).astype(np.int64), starts)
+        losses = np.add.reduceat((difference < 0).astype(np.int64), starts)
+        net_difference = np.add.reduceat(difference, starts)
+        records = [
+            {'player_id': int(opponent), 'events': int(count), 'wins': int(won), 'losses': int(lost),
+             'ties': int(count - won - lost), 'net_difference': _money(diff)}
+            for opponent, count, won, lost, diff
+            in zip(opponents[starts], counts, wins, losses, net_difference)
+        ]
+        records.sort(key=lambda record: (-record['events'], record['player_id']))
+        return records
+
+
+def current():
+    """Statistiken zum aktuellen Datenstand; eine Query, wenn sie nicht im Cache liegen."""
+    key = caching.versioned_key(caching.DATA, 'player_stats')
+    stats = cache.get(key)
+    if stats is None:
+        stats = PlayerStats.load()
+        cache.set(key, stats, timeout=CACHE_TIMEOUT)
+    return stats
+
+
+def player_report(player):
+    """Kennzahlen und Head-to-Head-Bilanz eines Spielers (Namen der Gegner: eine Query)."""
+    stats = current()
+    records = stats.head_to_head(player.id)
+    names = {}
+    if records:
+        names = dict(Player.objects.filter(pk__in=[r['player_id'] for r in records]).values_list('id', 'name'))
+    for record in records:
+        record['name'] = names.get(record['player_id'])
+    return {'summary': stats.for_player(player.id), 'head_to_head': records}
@@ -0,0 +1,100 @@
+# poker_data/synthetic.py
+"""Synthetische Testdaten für Last- und Performance-Messungen.
+
+Jedes Event bekommt eine zufällige Auswahl an Spielern mit Buy-Ins und Re-Buys; die
+ausgezahlten Chips werden so verteilt, dass sich die Gewinne eines Events zu null
+summieren. ASOP-Events haben keinen Gastgeber, alle anderen einen Gastgeber-Spieler.
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from django.db import transaction
+
+from poker_data import caching, earnings, leaderboards, rollups, settlement
+from poker_data.models import ChipTransaction, Event, EventParticipation, Player
+
+BUY_INS = [Decimal('20'), Decimal('25'), Decimal('50')]
+BATCH_SIZE = 2000
+
+
+def _payouts(rng, total, count):
+    """Verteilt ``total`` Chips in 5er-Schritten zufällig auf ``count`` Spieler."""
+    weights = [rng.expovariate(1) ** 2 for _ in range(count)]
+    scale = sum(weights)
+    steps = int(total / 5)
+    payouts = [int(steps * w / scale) for w in weights]
+    payouts[max(range(count), key=weights.__getitem__)] += steps - sum(payouts)
+    return [Decimal(p * 5) for p in payouts]
+
+
+def generate(players=1000, events=100, participations=10000, asop_ratio=0.3, seed=None,
+             start_date=datetime.date(2015, 1, 2), active_last=False, log=None):
+    """Legt Spieler, Events und Teilnahmen (inkl. Chip-Ledger) per bulk_create an.
+
+    Danach werden total_earnings und die Ranglisten einmal neu berechnet.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    per_event = max(2, min(players, round(participations / max(events, 1))))
+
+    with transaction.atomic():
+        offset = Player.objects.count()
+        new_players = Player.objects.bulk_create(
+            (Player(name=f"Player {offset + i + 1}", founding_member=rng.random() < 0.05) for i in range(players)),
+            batch_size=BATCH_SIZE,
+        )
+        log(f"{len(new_players)} players")
+
+        event_rows = []
+        for i in range(events):
+            asop = rng.random() < asop_ratio
+            event_rows.append(Event(
+                date=start_date + datetime.timedelta(days=7 * i + rng.randrange(7)),
+                host_location=None if asop else f"Location {rng.randrange(50)}",
+                asop=asop,
+                host_player=None if asop else rng.choice(new_players),
+                active=active_last and i == events - 1,
+                pot=0,
+            ))
+        new_events = Event.objects.bulk_create(event_rows, batch_size=BATCH_SIZE)
+
+        participation_rows = []
+        ledger_rows = []
+        for event in new_events:
+            seated = rng.sample(new_players, per_event)
+            bought = []
+            for player in seated:
+                initial_buy_in = rng.choice(BUY_INS)
+                re_buy = Decimal(rng.choice([0, 0, 0, 10, 20, 25, 50]))
+                bought.append((player, initial_buy_in, re_buy))
+                ledger_rows.append(ChipTransaction(
+                    event=event, player=player, kind=ChipTransaction.BUY_IN, amount=initial_buy_in
+                ))
+                if re_buy:
+                    ledger_rows.append(ChipTransaction(
+                        event=event, player=player, kind=ChipTransaction.RE_BUY, amount=re_buy
+                    ))
+
+            total = sum(initial_buy_in + re_buy for _, initial_buy_in, re_buy in bought)
+            event.pot = total + Decimal(rng.randrange(0, 20) * 50)
+            event.remaining_chips = event.pot - total
+            for (player, initial_buy_in, re_buy), payout in zip(bought, _payouts(rng, total, len(bought))):
+                participation_rows.append(EventParticipation(
+                    event=event, player=player, initial_buy_in=initial_buy_in, re_buy=re_buy,
+                    earnings=0 if event.active else payout - initial_buy_in - re_buy,
+                ))
+
+        Event.objects.bulk_update(new_events, ['pot', 'remaining_chips'], batch_size=BATCH_SIZE)
+        EventParticipation.objects.bulk_create(participation_rows, batch_size=BATCH_SIZE)
+        ChipTransaction.objects.bulk_create(ledger_rows, batch_size=BATCH_SIZE)
+        log(f"{len(new_events)} events, {len(participation_rows)} participations, {len(ledger_rows)} chip transactions")
+
+        # bulk_create umgeht die Signale: Summen und Ranglisten einmal am Ende nachziehen
+        earnings.recompute()
+        rollups.recompute()
+        leaderboards.rebuild_all()
+        settlement.settle_finished([event.id for event in new_events])
+        caching.bump_on_commit(caching.DATA, caching.ACTIVE_EVENTS)
+
+    return new_players, new_events
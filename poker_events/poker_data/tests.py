@@ -1,3 +1,1613 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Q, Sum
+from django.test import LiveServerTestCase, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from poker_data import (
+    archive, chips, earnings, leaderboards, live, loadtest, metrics, parallel, player_search, rank_history, rollups,
+    settlement, stats, synthetic, transfer,
+)
+from poker_data.context_processors import active_events_exist, active_events_status
+from poker_data.management.commands.load_test import Command as LoadTestCommand
+from poker_data.middleware import QueryBudgetExceeded
+from poker_data.models import (
+    ChipTransaction, Event, EventParticipation, EventResult, EventSummary, LeaderboardEntry, Player, PlayerArchiveTotal,
+    PlayerPeriodTotal, RankSnapshot,
+)
+from poker_data.registration import register_participants
+from poker_events import views
+
+
+class QueryBudgetTests(TestCase):
+    """Jede View muss mit ihrem Query-Budget aus settings.QUERY_BUDGETS auskommen, unabhängig von der Spielerzahl."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = [Player.objects.create(name=f"Player {i}") for i in range(10)]
+        cls.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=1000, asop=True)
+        cls.past_event = Event.objects.create(
+            date=datetime.date(2025, 2, 1), pot=500, active=False, host_player=cls.players[0]
+        )
+        with cls.captureOnCommitCallbacks(execute=True):  # totals and period rollups like in production
+            for player in cls.players[:3]:
+                EventParticipation.objects.create(event=cls.event, player=player, initial_buy_in=50, earnings=10)
+                EventParticipation.objects.create(event=cls.past_event, player=player, initial_buy_in=20, earnings=-5)
+
+    def add_participants(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for player in self.players[3:3 + count]:
+                EventParticipation.objects.create(event=self.event, player=player, initial_buy_in=50, earnings=5)
+
+    def count_queries(self, method, url, data=None, **kwargs):
+        cache.clear()  # count cold requests, independent of earlier tests
+        # The work deferred to the commit (earnings.mark_dirty, settlement) belongs to the request
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, **kwargs)
+        self.assertLess(response.status_code, 400)
+        return len(ctx)
+
+    def assertWithinBudget(self, url_name, method, url, data=None, **kwargs):
+        queries = self.count_queries(method, url, data, **kwargs)
+        self.assertLessEqual(queries, settings.QUERY_BUDGETS[url_name], f"{method.upper()} {url}")
+        return queries
+
+    def test_home(self):
+        self.assertWithinBudget('home', 'get', reverse('home'))
+
+    def test_home_does_not_grow_with_participants(self):
+        before = self.count_queries('get', reverse('home'))
+        self.add_participants(5)
+        self.assertEqual(self.count_queries('get', reverse('home')), before)
+
+    def test_add_event(self):
+        self.assertWithinBudget('add_event', 'get', reverse('add_event'))
+        self.assertWithinBudget('add_event', 'post', reverse('add_event'), {
+            'host_location': 'Keller', 'date': '2025-04-01', 'pot': '800', 'host_player': self.players[1].id,
+        })
+
+    def test_add_players_form(self):
+        self.assertWithinBudget('add_players', 'get', reverse('add_players', args=[self.event.id]))
+
+    def test_add_players_does_not_grow_with_selection(self):
+        event = Event.objects.create(date=datetime.date(2025, 3, 2), pot=5000, remaining_chips=5000, asop=True)
+        url = reverse('add_players', args=[event.id])
+        few = self.assertWithinBudget('add_players', 'post', url, {
+            'players': [p.id for p in self.players[:2]], f'initial_buy_in_{self.players[0].id}': '50',
+        })
+        many = self.assertWithinBudget('add_players', 'post', url, {
+            'players': [p.id for p in self.players[2:]], **{f'initial_buy_in_{p.id}': '20' for p in self.players},
+        })
+        self.assertEqual(few, many)
+
+    def test_re_buy_form(self):
+        url = reverse('re_buy', args=[self.event.id])
+        before = self.assertWithinBudget('re_buy', 'get', url)
+        self.add_participants(5)
+        self.assertEqual(self.count_queries('get', url), before)
+
+    def post_re_buys(self):
+        participations = list(EventParticipation.objects.filter(event=self.event).order_by('id'))
+        data = {'form-TOTAL_FORMS': len(participations), 'form-INITIAL_FORMS': len(participations)}
+        for i, participation in enumerate(participations):
+            data[f'form-{i}-id'] = participation.id
+            data[f'form-{i}-re_buy'] = str(participation.re_buy + 10)
+        return self.assertWithinBudget('re_buy', 'post', reverse('re_buy', args=[self.event.id]), data)
+
+    def test_re_buy_post_does_not_grow_with_players(self):
+        Event.objects.filter(id=self.event.id).update(remaining_chips=1000)
+        few = self.post_re_buys()
+        self.add_participants(7)
+        self.assertEqual(self.post_re_buys(), few)
+        self.assertEqual(ChipTransaction.objects.filter(event=self.event, kind=ChipTransaction.RE_BUY).count(), 13)
+
+    def test_re_buy_api_does_not_grow_with_players(self):
+        Event.objects.filter(id=self.event.id).update(remaining_chips=1000)
+        url = reverse('re_buy_api', args=[self.event.id])
+        one = self.assertWithinBudget('re_buy_api', 'post', url, {'re_buys': {self.players[0].id: '10'}},
+                                      content_type='application/json')
+        three = self.assertWithinBudget('re_buy_api', 'post', url, {'re_buys': {p.id: '5' for p in self.players[:3]}},
+                                        content_type='application/json')
+        self.assertEqual(one, three)
+
+    def test_end_event_does_not_grow_with_players(self):
+        event = Event.objects.create(date=datetime.date(2025, 3, 2), pot=1000, asop=True)
+        EventParticipation.objects.create(event=event, player=self.players[0], initial_buy_in=50)
+        few = self.assertWithinBudget('end_event', 'get', reverse('end_event', args=[event.id]))
+        self.add_participants(5)
+        many = self.assertWithinBudget('end_event', 'get', reverse('end_event', args=[self.event.id]))
+        self.assertEqual(few, many)
+
+    def test_player_search_api(self):
+        self.assertWithinBudget('player_search_api', 'get', reverse('player_search_api'), {'q': 'player'})
+
+    def test_player_stats_do_not_grow_with_opponents(self):
+        url = reverse('player_stats_api', args=[self.players[0].id])
+        before = self.assertWithinBudget('player_stats_api', 'get', url)
+        self.add_participants(5)
+        Event.objects.filter(id=self.event.id).update(active=False)
+        self.assertEqual(self.count_queries('get', url), before)
+        self.assertWithinBudget('player_detail', 'get', reverse('player_detail', args=[self.players[0].id]))
+
+    def test_player_ranks_api(self):
+        url = reverse('player_ranks_api', args=[self.players[0].id])
+        self.assertWithinBudget('player_ranks_api', 'get', url, {'board': 'asop', 'from': '2025-01-01'})
+
+
+class AdminTests(TestCase):
+    """Die Admin-Listen kommen mit einer festen Anzahl Queries aus, egal wie viele Zeilen eine Seite zeigt."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        cls.players = Player.objects.bulk_create(Player(name=f"Player {i}") for i in range(40))
+        cls.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=1000, host_player=cls.players[0])
+        EventParticipation.objects.create(event=cls.event, player=cls.players[0], initial_buy_in=50, re_buy=20,
+                                          earnings=100)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def count_queries(self, url, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response
+
+    def add_rows(self, count):
+        for i, player in enumerate(self.players[1:1 + count], start=1):
+            event = Event.objects.create(date=datetime.date(2025, 3, 1 + i), pot=1000, host_player=player)
+            EventParticipation.objects.create(event=event, player=player, initial_buy_in=10, earnings=i)
+            EventParticipation.objects.create(event=self.event, player=player, initial_buy_in=20)
+
+    def test_changelists_do_not_grow_with_rows(self):
+        urls = [reverse(f'admin:poker_data_{model}_changelist') for model in ('player', 'event', 'eventparticipation')]
+        before = [self.count_queries(url)[0] for url in urls]
+        self.add_rows(10)
+        self.assertEqual([self.count_queries(url)[0] for url in urls], before)
+
+    def test_columns_are_annotated(self):
+        _, response = self.count_queries(reverse('admin:poker_data_eventparticipation_changelist'))
+        participation = response.context['cl'].result_list[0]
+        self.assertEqual((participation.total_buy_in, participation.net), (Decimal('70.00'), Decimal('30.00')))
+        _, response = self.count_queries(reverse('admin:poker_data_event_changelist'))
+        event = response.context['cl'].result_list[0]
+        self.assertEqual((event.participations, event.total_buy_in), (1, Decimal('70.00')))
+
+    def test_filtered_search_skips_full_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin:poker_data_player_changelist'),
+                                       {'q': '"player 1"', 'founding_member__exact': '0'})
+        self.assertEqual(response.context['cl'].result_count, 11)  # Player 1, Player 10 … Player 19
+        # Only the filtered COUNT(*), not a second one over the whole table
+        counts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT COUNT(*)')]
+        self.assertEqual(len(counts), 1, counts)
+
+    def test_change_forms_use_autocomplete(self):
+        url = reverse('admin:poker_data_eventparticipation_change', args=[EventParticipation.objects.get().id])
+        self.client.get(url)  # warm the ContentType cache
+        queries, response = self.count_queries(url)
+        self.assertContains(response, 'admin-autocomplete')
+        # Only the selected player is rendered, not one <option> per player
+        self.assertNotContains(response, f'value="{self.players[1].id}"')
+        self.add_rows(10)
+        self.assertEqual(self.count_queries(url)[0], queries)
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'poker_data', 'model_name': 'event', 'field_name': 'host_player', 'term': '"player 39"',
+        })
+        self.assertEqual([row['text'] for row in response.json()['results']], ['Player 39'])
+
+
+class RegistrationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = [Player.objects.create(name=f"Player {i}") for i in range(4)]
+        cls.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=1000, remaining_chips=1000, asop=True)
+
+    def test_register_participants(self):
+        EventParticipation.objects.create(event=self.event, player=self.players[0], initial_buy_in=100)
+        EventParticipation.objects.create(event=self.event, player=self.players[1])
+        result = register_participants(self.event, {
+            self.players[0].id: (Decimal('50'), Decimal('0')),
+            self.players[1].id: (Decimal('0'), Decimal('30')),
+            self.players[2].id: (Decimal('40'), Decimal('0')),
+            self.players[3].id: (Decimal('-10'), Decimal('0')),
+            999: (Decimal('10'), Decimal('0')),
+        })
+        self.assertEqual(result['skipped'], [self.players[0].id])
+        self.assertEqual(result['updated'], [self.players[1].id])
+        self.assertEqual(result['created'], [self.players[2].id, self.players[3].id])
+        self.assertEqual(result['unknown'], [999])
+        self.assertEqual(result['total_buy_in'], Decimal('70'))
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.remaining_chips, Decimal('930'))
+        self.assertEqual(EventParticipation.objects.get(event=self.event, player=self.players[1]).re_buy, 30)
+        self.assertEqual(EventParticipation.objects.get(event=self.event, player=self.players[3]).initial_buy_in, 0)
+        self.assertEqual(
+            LeaderboardEntry.objects.filter(board=LeaderboardEntry.LAST_ASOP).count(), 4
+        )
+
+    def test_add_players_api(self):
+        url = reverse('add_players_api', args=[self.event.id])
+        response = self.client.post(url, {
+            'players': [{'player_id': p.id, 'initial_buy_in': '25'} for p in self.players],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['remaining_chips'], '900.00')
+        self.assertEqual(len(response.json()['created']), 4)
+
+        response = self.client.post(url, {'players': 'nope'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_registration_cannot_overdraw_the_pot(self):
+        response = self.client.post(reverse('add_players_api', args=[self.event.id]), {
+            'players': [{'player_id': p.id, 'initial_buy_in': '300'} for p in self.players],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.remaining_chips, 1000)
+        self.assertFalse(EventParticipation.objects.filter(event=self.event).exists())
+        self.assertFalse(ChipTransaction.objects.filter(event=self.event).exists())
+
+
+class ChipLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = [Player.objects.create(name=f"Player {i}") for i in range(3)]
+        cls.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=300, remaining_chips=300, asop=True)
+        register_participants(cls.event, {p.id: (Decimal('50'), Decimal('0')) for p in cls.players})
+
+    def test_re_buy_books_ledger_and_chips(self):
+        chips.re_buy(self.event.id, {self.players[0].id: Decimal('20'), self.players[1].id: Decimal('10')})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.remaining_chips, Decimal('120'))
+        self.assertEqual(EventParticipation.objects.get(event=self.event, player=self.players[0]).re_buy, 20)
+        self.assertEqual(ChipTransaction.balance(self.event.chip_transactions.all()), Decimal('-180'))
+
+    def test_insufficient_chips_changes_nothing(self):
+        with self.assertRaises(chips.InsufficientChips):
+            chips.re_buy(self.event.id, {self.players[0].id: Decimal('100'), self.players[1].id: Decimal('100')})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.remaining_chips, Decimal('150'))
+        self.assertFalse(ChipTransaction.objects.filter(kind=ChipTransaction.RE_BUY).exists())
+
+    def test_cash_out_and_reconcile(self):
+        chips.cash_out(self.event.id, self.players[2].id, Decimal('30'))
+        Event.objects.filter(id=self.event.id).update(remaining_chips=0)
+        self.event.update_remaining_chips()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.remaining_chips, Decimal('180'))
+
+    def test_ledger_is_append_only(self):
+        entry = ChipTransaction.objects.first()
+        entry.amount = 1
+        with self.assertRaises(ValidationError):
+            entry.save()
+
+    def test_re_buy_form_books_only_the_increase(self):
+        participations = list(EventParticipation.objects.filter(event=self.event).order_by('id'))
+        data = {'form-TOTAL_FORMS': '3', 'form-INITIAL_FORMS': '3'}
+        for i, participation in enumerate(participations):
+            data[f'form-{i}-id'] = participation.id
+            data[f'form-{i}-re_buy'] = '25' if i == 0 else '0'
+        self.client.post(reverse('re_buy', args=[self.event.id]), data)
+        self.client.post(reverse('re_buy', args=[self.event.id]), data)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.remaining_chips, Decimal('125'))
+        participations[0].refresh_from_db()
+        self.assertEqual(participations[0].re_buy, 25)
+        self.assertFalse(ChipTransaction.objects.filter(kind=ChipTransaction.RE_BUY, amount=0).exists())
+
+    def test_re_buy_form_refuses_ended_event(self):
+        Event.objects.filter(id=self.event.id).update(active=False)
+        participation = EventParticipation.objects.filter(event=self.event).order_by('id').first()
+        response = self.client.post(reverse('re_buy', args=[self.event.id]), {
+            'form-TOTAL_FORMS': '1', 'form-INITIAL_FORMS': '1',
+            'form-0-id': participation.id, 'form-0-re_buy': '25',
+        })
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        self.assertFalse(ChipTransaction.objects.filter(kind=ChipTransaction.RE_BUY).exists())
+
+
+class ReBuyApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = [Player.objects.create(name=f"Player {i}") for i in range(3)]
+        cls.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=200, remaining_chips=150, asop=True, active=True)
+        for player in cls.players:
+            EventParticipation.objects.create(event=cls.event, player=player, initial_buy_in=50)
+
+    def post(self, re_buys, client=None, **extra):
+        return (client or self.client).post(
+            reverse('re_buy_api', args=[self.event.id]), {'re_buys': re_buys}, content_type='application/json', **extra
+        )
+
+    def test_books_only_sent_players(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post({self.players[0].id: '25', self.players[2].id: '10.50'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'remaining_chips': '114.50',
+            'players': [{'id': self.players[0].id, 'total_buy_in': '75.00'},
+                        {'id': self.players[2].id, 'total_buy_in': '60.50'}],
+        })
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "poker_data_eventparticipation"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            sorted(EventParticipation.objects.filter(event=self.event).values_list('re_buy', flat=True)),
+            [0, Decimal('10.50'), 25],
+        )
+        self.assertEqual(ChipTransaction.objects.filter(event=self.event, kind=ChipTransaction.RE_BUY).count(), 2)
+
+    def test_rejected_re_buys_change_nothing(self):
+        outsider = Player.objects.create(name="Outsider")
+        self.assertEqual(self.post({self.players[0].id: '500'}).status_code, 409)
+        self.assertEqual(self.post({self.players[0].id: '5', outsider.id: '5'}).status_code, 400)
+        for re_buys in ({}, {self.players[0].id: '-5'}, {self.players[0].id: 'abc'}, ['x'], {'x': '5'}):
+            self.assertEqual(self.post(re_buys).status_code, 400, re_buys)
+        Event.objects.filter(id=self.event.id).update(active=False)
+        self.assertEqual(self.post({self.players[0].id: '5'}).status_code, 409)  # ended
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.remaining_chips, 150)
+        self.assertFalse(ChipTransaction.objects.filter(kind=ChipTransaction.RE_BUY).exists())
+
+    def test_home_buttons_and_csrf(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        response = client.get(reverse('home'))
+        self.assertContains(response, f'data-re-buy-url="{reverse("re_buy_api", args=[self.event.id])}"')
+        token = response.cookies['csrftoken'].value
+        self.assertEqual(self.post({self.players[1].id: '5'}, client=client).status_code, 403)
+        self.assertEqual(self.post({self.players[1].id: '5'}, client=client, HTTP_X_CSRFTOKEN=token).status_code, 200)
+
+
+class ConcurrentReBuyTests(TransactionTestCase):
+    """Viele gleichzeitige Re-Buys auf dasselbe Event dürfen keine Updates verlieren."""
+    THREADS = 8
+    RE_BUYS_PER_THREAD = 10
+
+    def setUp(self):
+        self.players = [Player.objects.create(name=f"Player {i}") for i in range(self.THREADS)]
+        self.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=10000, remaining_chips=10000, asop=True)
+        for player in self.players:
+            EventParticipation.objects.create(event=self.event, player=player)
+
+    def run_threads(self, target):
+        errors = []
+
+        def worker(player):
+            try:
+                target(player)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(player,)) for player in self.players]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_no_lost_updates(self):
+        def re_buy_repeatedly(player):
+            for _ in range(self.RE_BUYS_PER_THREAD):
+                chips.re_buy(self.event.id, {player.id: Decimal('10')})
+
+        self.assertEqual(self.run_threads(re_buy_repeatedly), [])
+        self.event.refresh_from_db()
+        expected = 10000 - self.THREADS * self.RE_BUYS_PER_THREAD * 10
+        self.assertEqual(self.event.remaining_chips, expected)
+        self.assertEqual(
+            ChipTransaction.objects.filter(event=self.event).count(), self.THREADS * self.RE_BUYS_PER_THREAD
+        )
+        for participation in EventParticipation.objects.filter(event=self.event):
+            self.assertEqual(participation.re_buy, self.RE_BUYS_PER_THREAD * 10)
+
+    def test_read_then_write_bookings_do_not_lock(self):
+        # Registration and update_remaining_chips read before they write; with a deferred
+        # BEGIN concurrent lock upgrades fail at once with "database is locked"
+        events = [
+            Event.objects.create(date=datetime.date(2025, 4, i + 1), pot=1000, remaining_chips=1000, asop=True)
+            for i in range(4)
+        ]
+
+        def book(player):
+            for event in events:
+                register_participants(event, {player.id: (Decimal('20'), Decimal('0'))})
+                event.update_remaining_chips()
+
+        self.assertEqual(self.run_threads(book), [])
+        for event in events:
+            event.refresh_from_db()
+            self.assertEqual(event.remaining_chips, 1000 - 20 * self.THREADS)
+
+    def test_chip_bookings_begin_immediate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            chips.re_buy(self.event.id, {self.players[0].id: Decimal('10')})
+        self.assertEqual(ctx.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
+        self.assertIsNone(connection.transaction_mode)
+        with CaptureQueriesContext(connection) as ctx, transaction.atomic():
+            chips.re_buy(self.event.id, {self.players[0].id: Decimal('10')})
+        self.assertEqual(ctx.captured_queries[0]['sql'], 'BEGIN')
+
+    @skipUnless(settings.DB_PROFILE == 'tuned', "the pragmas are only set by the 'tuned' DB profile")
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            pragmas = {
+                name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('journal_mode', 'synchronous', 'busy_timeout')
+            }
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000})
+
+    def test_pot_never_goes_negative(self):
+        Event.objects.filter(id=self.event.id).update(remaining_chips=250)
+
+        def re_buy_until_empty(player):
+            for _ in range(self.RE_BUYS_PER_THREAD):
+                try:
+                    chips.re_buy(self.event.id, {player.id: Decimal('10')})
+                except chips.InsufficientChips:
+                    pass
+
+        self.assertEqual(self.run_threads(re_buy_until_empty), [])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.remaining_chips, 0)
+        self.assertEqual(ChipTransaction.objects.filter(event=self.event).count(), 25)
+
+
+class AsyncHomeTests(TransactionTestCase):
+    """Die async Startseite liest in Worker-Threads mit eigenen Verbindungen, die Daten müssen committet sein."""
+
+    def setUp(self):
+        cache.clear()
+        self.players = [Player.objects.create(name=f"Player {i}") for i in range(3)]
+        past = Event.objects.create(date=datetime.date(2025, 2, 1), pot=300, asop=True)
+        self.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=500, remaining_chips=500, asop=True)
+        for i, player in enumerate(self.players):
+            EventParticipation.objects.create(event=past, player=player, initial_buy_in=20, earnings=10 * i)
+            EventParticipation.objects.create(event=self.event, player=player, initial_buy_in=50)
+        settlement.settle(past.id)
+
+    def get(self, view):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return async_to_sync(view)(request) if view is views.home_async else view(request)
+
+    def test_same_page_as_sync_view(self):
+        sync_page = self.get(views.home)
+        cache.clear()
+        async_page = self.get(views.home_async)
+        self.assertEqual(async_page.status_code, 200)
+        self.assertEqual(async_page.content.decode(), sync_page.content.decode())
+        self.assertContains(async_page, 'data-live-player="%d"' % self.players[2].id)
+
+    def test_cached_fragments_skip_queries(self):
+        self.get(views.home_async)
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with parallel.execute_wrapper(count):
+            response = self.get(views.home_async)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_gather_runs_in_worker_threads_with_wrappers(self):
+        seen = []
+
+        def record(execute, sql, params, many, context):
+            seen.append(threading.get_ident())
+            return execute(sql, params, many, context)
+
+        async def run():
+            with parallel.execute_wrapper(record):
+                return await parallel.gather(
+                    lambda: Player.objects.count(), lambda: Event.objects.count(),
+                )
+
+        self.assertEqual(async_to_sync(run)(), [3, 2])
+        self.assertEqual(len(seen), 2)
+        self.assertNotIn(threading.get_ident(), seen)
+
+
+class LoadTestTests(LiveServerTestCase):
+    """Der Spielabend aus loadtest.py über echtes HTTP: Event anlegen, Re-Buy-Runden, Event beenden."""
+
+    def test_event_night(self):
+        for i in range(4):
+            Player.objects.create(name=f"Player {i}")
+        recorder, event_id, _ = loadtest.event_night(
+            self.live_server_url, phones=4, seconds=1, think=0.1, rebuy_every=0.4, seed=1,
+        )
+
+        statuses = {name: {status for _, status in values} for name, values in recorder.samples.items()}
+        self.assertEqual(statuses['re_buy_api POST'], {200})
+        self.assertEqual(statuses['home GET'], {200})
+        event = Event.objects.get(id=event_id)
+        self.assertFalse(event.active)
+        re_buys = len(recorder.samples['re_buy_api POST'])
+        self.assertEqual(event.remaining_chips, 1000000 - 4 * 20 - re_buys * 10)
+
+    def test_asgi_server_serves_the_async_home(self):
+        with LoadTestCommand().async_home():
+            self.assertIs(resolve(reverse('home')).func, views.home_async)
+        self.assertIs(resolve(reverse('home')).func, views.home_async if settings.ASYNC_HOME else views.home)
+
+    def test_query_budget_overrun_fails_the_run(self):
+        options = {'url': None, 'server': 'wsgi', 'phones': 1, 'output': None}
+        samples = {'home GET': [(0.01, 500), (0.01, 200)]}
+        command = LoadTestCommand(stdout=io.StringIO())
+        command.report(samples, 1.0, False, 0, [], options)
+        with self.assertRaisesMessage(CommandError, '1 requests over their query budget'):
+            command.report(samples, 1.0, False, 0, ['GET / (home) ran 9 queries, budget is 8'], options)
+
+
+class ActiveEventsStatusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_until_an_event_changes(self):
+        event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=100, asop=True, active=False)
+        with self.assertNumQueries(1):
+            self.assertFalse(active_events_exist())
+        with self.assertNumQueries(0):
+            self.assertFalse(active_events_exist())
+
+        event.active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            event.save(update_fields=['active'])
+        self.assertTrue(active_events_exist())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.delete()
+        self.assertFalse(active_events_exist())
+
+    def test_lazy_until_read(self):
+        with self.assertNumQueries(0):
+            context = active_events_status(None)
+        with self.assertNumQueries(1):
+            self.assertFalse(context['active_events_exist'])
+
+
+class HomeCachingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.player = Player.objects.create(name="Klaus")
+        cls.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=500, remaining_chips=500, asop=True)
+        EventParticipation.objects.create(event=cls.event, player=cls.player, initial_buy_in=50, earnings=20)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_cache_renders_without_queries(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Klaus')
+
+    def test_conditional_get(self):
+        response = self.client.get(reverse('home'))
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            chips.re_buy(self.event.id, {self.player.id: Decimal('25')})
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, '<span data-live="remaining_chips">475.00</span>')
+
+    def test_etag_does_not_repeat_after_cache_restart(self):
+        etag = self.client.get(reverse('home'))['ETag']
+        cache.clear()  # like a restart or another worker with its own LocMemCache
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class IndexUsageTests(TestCase):
+    """EXPLAIN QUERY PLAN der heißen Queries auf einer größeren synthetischen Datenbank."""
+
+    @classmethod
+    def setUpTestData(cls):
+        players = Player.objects.bulk_create(
+            Player(name=f"Player {i}", total_earnings=(i * 37) % 1000) for i in range(2000)
+        )
+        events = Event.objects.bulk_create(
+            Event(date=datetime.date(2015, 1, 1) + datetime.timedelta(days=7 * i), pot=1000,
+                  asop=i % 3 == 0, active=i == 399, host_player=None if i % 3 == 0 else players[i])
+            for i in range(400)
+        )
+        EventParticipation.objects.bulk_create(
+            EventParticipation(event=event, player=players[(i * 13 + j) % len(players)], earnings=j - 5)
+            for i, event in enumerate(events) for j in range(25)
+        )
+        leaderboards.rebuild_all()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.query_plan(queryset)
+        self.assertTrue(any(index_name in line for line in plan), plan)
+
+    def assertNoFullScan(self, queryset):
+        plan = self.query_plan(queryset)
+        self.assertFalse([line for line in plan if line.startswith('SCAN') and 'INDEX' not in line], plan)
+
+    def test_home_queries(self):
+        self.assertUsesIndex(Event.objects.filter(active=True), 'event_active_idx')
+        self.assertUsesIndex(Event.objects.order_by('-date')[:3], 'event_date_idx')
+        self.assertUsesIndex(Event.objects.filter(asop=True).order_by('-date')[:1], 'event_asop_date_idx')
+        self.assertUsesIndex(leaderboards.ranking(leaderboards.TOP), 'player_earnings_idx')
+        for board in (LeaderboardEntry.TREND, LeaderboardEntry.ASOP, LeaderboardEntry.LAST_ASOP):
+            self.assertUsesIndex(leaderboards.ranking(board), 'leaderboard_board_rank_idx')
+
+    def test_keyset_pages_seek_into_index(self):
+        for board, index_name in [(leaderboards.TOP, 'player_earnings_idx'),
+                                  (LeaderboardEntry.ASOP, 'leaderboard_board_rank_idx')]:
+            page = leaderboards.Page(board)
+            queryset = leaderboards.seek(leaderboards.ranking(board), page.next_cursor)[:25]
+            plan = self.query_plan(queryset)
+            self.assertTrue(any(index_name in line and '<' in line for line in plan), plan)
+            self.assertFalse([line for line in plan if 'TEMP B-TREE' in line], plan)
+
+    def test_add_players_lookup(self):
+        event = Event.objects.filter(active=True).get()
+        lookup = EventParticipation.objects.filter(event=event, player_id__in=[1, 2, 3])
+        self.assertNoFullScan(lookup)
+        # The unique constraint on (event, player) is what SQLite picks for this lookup
+        self.assertUsesIndex(lookup, 'autoindex_poker_data_eventparticipation')
+
+    def test_admin_name_search_uses_nocase_index(self):
+        # PlayerAdmin.search_fields = ['^name'] wird zu name LIKE 'player 1%' ESCAPE '\'
+        self.assertUsesIndex(Player.objects.filter(name__istartswith='player 1'), 'player_name_search_idx')
+
+    def test_player_search(self):
+        plan = self.query_plan(player_search.search('player 1', 20))
+        self.assertTrue(any('player_name_search_idx' in line for line in plan), plan)
+        plan = self.query_plan(player_search.recent())
+        self.assertTrue(any('player_recent_idx' in line for line in plan), plan)
+        self.assertFalse([line for line in plan if 'TEMP B-TREE' in line], plan)
+
+    def test_rank_history(self):
+        rows = rank_history.history(1, RankSnapshot.ASOP, datetime.date(2025, 1, 1), datetime.date(2025, 12, 31))
+        plan = self.query_plan(rows)
+        self.assertTrue(any('rank_history_idx' in line for line in plan), plan)
+        self.assertFalse([line for line in plan if 'TEMP B-TREE' in line], plan)
+
+    def test_duplicate_participation_rejected(self):
+        participation = EventParticipation.objects.first()
+        with self.assertRaises(IntegrityError):
+            EventParticipation.objects.create(event=participation.event, player=participation.player)
+
+
+class LeaderboardPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Lots of ties on earnings, so the player id has to break them
+        Player.objects.bulk_create(Player(name=f"Player {i}", total_earnings=i % 7) for i in range(60))
+        event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=1000, asop=True)
+        EventParticipation.objects.bulk_create(
+            EventParticipation(event=event, player=player, earnings=player.id % 4) for player in Player.objects.all()
+        )
+        leaderboards.rebuild_all()
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, board, limit):
+        players, after = [], None
+        while True:
+            response = self.client.get(
+                reverse('leaderboard_api', args=[board]), {'limit': limit, **({'after': after} if after else {})}
+            )
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            players += page['players']
+            after = page['next']
+            if after is None:
+                return players
+
+    def test_pages_cover_ranking_in_order(self):
+        for board in leaderboards.BOARDS:
+            expected = [
+                {'id': row['player_id'], 'name': row['name'], 'earnings': str(row['earnings'])}
+                for row in leaderboards.ranking(board)
+            ]
+            self.assertEqual(self.walk(board, 7), expected, board)
+
+    def test_one_query_per_page(self):
+        cursor = leaderboards.Page(leaderboards.TOP, limit=10).next_cursor
+        with self.assertNumQueries(1):
+            self.client.get(reverse('leaderboard_api', args=['top']), {'after': cursor, 'limit': 10})
+
+    def test_invalid_requests(self):
+        url = reverse('leaderboard_api', args=['top'])
+        self.assertEqual(self.client.get(reverse('leaderboard_api', args=['nope'])).status_code, 404)
+        for params in ({'after': 'garbage'}, {'after': 'NaN:1'}, {'limit': 'x'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+    def test_home_renders_first_page(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, f'<strong>{leaderboards.PAGE_SIZE}.</strong>')
+        self.assertNotContains(response, f'<strong>{leaderboards.PAGE_SIZE + 1}.</strong>')
+        self.assertContains(response, 'data-leaderboard-more')
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = [Player.objects.create(name=f"Player {i}") for i in range(4)]
+        dates = ['2024-11-20', '2024-12-30', '2025-01-02', '2025-01-31', '2025-02-14', '2025-04-01', '2025-04-15']
+        cls.events = [
+            Event.objects.create(date=datetime.date.fromisoformat(date), pot=1000, remaining_chips=1000, asop=True)
+            for date in dates
+        ]
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, event in enumerate(self.events):
+                for j, player in enumerate(self.players[:2 + i % 3]):
+                    EventParticipation.objects.create(
+                        event=event, player=player, initial_buy_in=20, earnings=(i + 1) * (j - 1)
+                    )
+
+    def expected(self, participations):
+        rows = participations.values('player_id').annotate(total=Sum('earnings')).order_by('-total', 'player_id')
+        return [(row['player_id'], row['total']) for row in rows]
+
+    def ranked(self, rows):
+        return [(row['player_id'], row['earnings']) for row in rows]
+
+    def test_period_rankings(self):
+        january = rollups.period_ranking(PlayerPeriodTotal.MONTH, datetime.date(2025, 1, 17))
+        self.assertEqual(self.ranked(january), self.expected(EventParticipation.objects.filter(
+            event__date__year=2025, event__date__month=1)))
+        first = next(row for row in january if row['player_id'] == self.players[0].id)
+        self.assertEqual((first['events'], first['buy_in']), (2, 40))
+        season = rollups.period_ranking(PlayerPeriodTotal.SEASON, datetime.date(2025, 3, 31))
+        self.assertEqual(self.ranked(season), self.expected(EventParticipation.objects.filter(
+            event__date__range=('2025-01-01', '2025-03-31'))))
+
+    def test_range_ranking_matches_participations(self):
+        for date_from, date_to in [('2024-01-01', '2025-12-31'), ('2024-12-15', '2025-04-10'),
+                                   ('2025-01-02', '2025-01-02'), ('2024-11-01', '2025-02-28')]:
+            expected = self.expected(EventParticipation.objects.filter(event__date__range=(date_from, date_to)))
+            ranking = rollups.range_ranking(datetime.date.fromisoformat(date_from), datetime.date.fromisoformat(date_to))
+            self.assertEqual(self.ranked(ranking), expected, (date_from, date_to))
+
+    def test_whole_months_read_only_rollups(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rollups.range_ranking(datetime.date(2024, 11, 1), datetime.date(2025, 2, 28))
+        self.assertFalse([q for q in ctx.captured_queries if 'poker_data_eventparticipation' in q['sql']])
+
+    def test_split_range(self):
+        periods, days = rollups.split_range(datetime.date(2024, 12, 15), datetime.date(2026, 2, 10))
+        self.assertEqual(periods, [
+            (PlayerPeriodTotal.YEAR, datetime.date(2025, 1, 1)),
+            (PlayerPeriodTotal.MONTH, datetime.date(2026, 1, 1)),
+        ])
+        self.assertEqual(days, [
+            (datetime.date(2024, 12, 15), datetime.date(2024, 12, 31)),
+            (datetime.date(2026, 2, 1), datetime.date(2026, 2, 10)),
+        ])
+
+    def test_last_events_ranking(self):
+        ranking = rollups.last_events_ranking(4)
+        self.assertEqual(self.ranked(ranking), self.expected(EventParticipation.objects.filter(event__in=self.events[-4:])))
+
+    def test_rollups_follow_writes(self):
+        player = self.players[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            chips.re_buy(self.events[-1].id, {player.id: Decimal('30')})
+        april = PlayerPeriodTotal.objects.filter(player=player, period=PlayerPeriodTotal.MONTH, period_start='2025-04-01')
+        self.assertEqual(april.get().buy_in, 70)
+
+        event = self.events[0]
+        event.date = datetime.date(2025, 4, 20)
+        with self.captureOnCommitCallbacks(execute=True):
+            event.save()
+        self.assertFalse(PlayerPeriodTotal.objects.filter(period_start='2024-11-01').exists())
+        self.assertEqual(april.get().events, 3)
+
+    def test_re_buy_adds_to_buy_in_without_recompute(self):
+        player = self.players[1]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            chips.re_buy(self.events[2].id, {player.id: Decimal('15')})
+        self.assertNotIn(earnings._flush, callbacks)  # total_earnings and the periods stay untouched
+        totals = PlayerPeriodTotal.objects.filter(player=player).order_by('period', 'period_start')
+        before = list(totals.values_list('period', 'period_start', 'earnings', 'buy_in', 'events'))
+        rollups.recompute([player.id])
+        self.assertEqual(list(totals.values_list('period', 'period_start', 'earnings', 'buy_in', 'events')), before)
+
+    @override_settings(TREND_EVENT_COUNT=2)
+    def test_configurable_trend_window(self):
+        leaderboards.rebuild_trend()
+        expected = self.expected(EventParticipation.objects.filter(event__in=self.events[-2:]))
+        self.assertEqual([(row['player_id'], row['earnings']) for row in leaderboards.ranking(LeaderboardEntry.TREND)], expected)
+
+    def test_standings_api(self):
+        url = reverse('standings_api')
+        response = self.client.get(url, {'period': 'year', 'date': '2025-06-01', 'limit': 2})
+        self.assertEqual(len(response.json()['players']), 2)
+        response = self.client.get(url, {'from': '2025-01-01', 'to': '2025-01-31'})
+        self.assertEqual(len(response.json()['players']), 4)
+        self.assertEqual(self.client.get(url, {'last': 3}).status_code, 200)
+        for params in ({'period': 'week'}, {'from': '2025-01-01'}, {'last': 0}, {'period': 'month', 'date': 'x'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+
+class PlayerSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        names = ['Anna', 'anton', 'Andreas', 'Bernd', '100% Berta', 'Anja']
+        cls.players = {name: Player.objects.create(name=name) for name in names}
+        for day, names in enumerate([['Anna', 'Bernd'], ['Andreas'], ['anton']], start=1):
+            event = Event.objects.create(date=datetime.date(2025, 3, day), pot=1000, remaining_chips=1000)
+            with cls.captureOnCommitCallbacks(execute=True):
+                register_participants(event, {cls.players[name].id: (Decimal('20'), Decimal('0')) for name in names})
+
+    def search(self, **params):
+        response = self.client.get(reverse('player_search_api'), params)
+        self.assertEqual(response.status_code, 200)
+        return [player['name'] for player in response.json()['players']]
+
+    def test_last_played_follows_registrations(self):
+        self.assertEqual(Player.objects.get(name='Anna').last_played, datetime.date(2025, 3, 1))
+        self.assertIsNone(Player.objects.get(name='Anja').last_played)
+
+    def test_prefix_search_ignores_case_and_orders_by_recency(self):
+        self.assertEqual(self.search(q='AN'), ['anton', 'Andreas', 'Anna', 'Anja'])
+        self.assertEqual(self.search(q='ann'), ['Anna'])
+        self.assertEqual(self.search(q='nna'), [])
+        self.assertEqual(self.search(q='100%'), ['100% Berta'])  # % is matched literally
+        self.assertEqual(self.search(q='an', limit=2), ['anton', 'Andreas'])
+        self.assertEqual(self.client.get(reverse('player_search_api'), {'limit': 'x'}).status_code, 400)
+
+    def test_forms_render_only_recent_players(self):
+        Player.objects.bulk_create(Player(name=f"Zed {i}") for i in range(player_search.RECENT_LIMIT))
+        for response in [self.client.get(reverse('add_event')),
+                         self.client.get(reverse('add_players', args=[Event.objects.first().id]))]:
+            players = [player.name for player in response.context['players']]
+            self.assertEqual(len(players), player_search.RECENT_LIMIT)
+            self.assertEqual(players[:4], ['anton', 'Andreas', 'Anna', 'Bernd'])
+            self.assertNotContains(response, f'Zed {player_search.RECENT_LIMIT - 1}')
+            self.assertContains(response, reverse('player_search_api'))
+
+
+class PlayerStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol = [Player.objects.create(name=name) for name in ('Alice', 'Bob', 'Carol')]
+        # earnings per event; every participation has a buy-in of 20 (+ 10 re-buy for Bob)
+        results = [
+            {cls.alice: 50, cls.bob: 0},
+            {cls.alice: 40, cls.bob: 60, cls.carol: 10},
+            {cls.alice: 0, cls.carol: 30},
+            {cls.alice: 30, cls.bob: 30},
+        ]
+        for day, result in enumerate(results, start=1):
+            event = Event.objects.create(date=datetime.date(2025, 1, day), pot=100, asop=True, active=False)
+            for player, amount in result.items():
+                EventParticipation.objects.create(event=event, player=player, earnings=amount, initial_buy_in=20,
+                                                  re_buy=10 if player == cls.bob else 0)
+        settlement.settle_finished()
+        # Active events are not settled yet and don't count
+        cls.active = Event.objects.create(date=datetime.date(2025, 2, 1), pot=100, asop=True)
+        EventParticipation.objects.create(event=cls.active, player=cls.carol, earnings=100, initial_buy_in=20)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_summary(self):
+        summary = stats.current().for_player(self.alice.id)
+        nets = [30, 20, -20, 10]
+        self.assertEqual(summary['events'], 4)
+        self.assertEqual(summary['net'], Decimal('40.00'))
+        self.assertEqual(summary['buy_in'], Decimal('80.00'))
+        self.assertAlmostEqual(summary['roi'], 0.5)
+        self.assertAlmostEqual(summary['average'], 10)
+        self.assertAlmostEqual(summary['variance'], sum((net - 10) ** 2 for net in nets) / 4)
+        self.assertEqual((summary['wins'], summary['losses']), (3, 1))
+        self.assertEqual((summary['best_streak'], summary['worst_streak']), (2, 1))
+        self.assertEqual((summary['best_result'], summary['worst_result']), (Decimal('30.00'), Decimal('-20.00')))
+
+    def test_streaks_do_not_run_across_players(self):
+        # Bob: -30, 30, 0 -> the streak must not continue with Alice's or Carol's rows
+        bob = stats.current().for_player(self.bob.id)
+        self.assertEqual((bob['best_streak'], bob['worst_streak'], bob['wins'], bob['losses']), (1, 1, 1, 1))
+        self.assertIsNone(stats.current().for_player(Player.objects.create(name='Dave').id))
+
+    def test_head_to_head(self):
+        records = stats.current().head_to_head(self.alice.id)
+        self.assertEqual([(r['player_id'], r['events'], r['wins'], r['losses'], r['ties']) for r in records], [
+            (self.bob.id, 3, 2, 1, 0),
+            (self.carol.id, 2, 1, 1, 0),
+        ])
+        self.assertEqual(records[0]['net_difference'], Decimal('60.00'))  # (30 - -30) + (20 - 30) + (10 - 0)
+        carol = stats.current().head_to_head(self.carol.id)
+        self.assertEqual([(r['player_id'], r['wins'], r['losses']) for r in carol],
+                         [(self.alice.id, 1, 1), (self.bob.id, 0, 1)])
+
+    def test_cached_per_data_version(self):
+        stats.current()
+        with self.assertNumQueries(0):
+            stats.current()
+        self.assertEqual(stats.current().for_player(self.carol.id)['net'], Decimal('0.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            settlement.settle(self.active.id)
+        self.assertEqual(stats.current().for_player(self.carol.id)['net'], Decimal('80.00'))
+
+    def test_api_and_detail_page(self):
+        data = self.client.get(reverse('player_stats_api', args=[self.alice.id])).json()
+        self.assertEqual(data['summary']['net'], '40.00')
+        self.assertEqual([(r['name'], r['wins']) for r in data['head_to_head']], [('Bob', 2), ('Carol', 1)])
+        response = self.client.get(reverse('player_detail', args=[self.alice.id]))
+        self.assertContains(response, '50.0%')
+        self.assertContains(response, reverse('player_detail', args=[self.bob.id]))
+        self.assertEqual(self.client.get(reverse('player_stats_api', args=[999])).status_code, 404)
+
+
+class SettlementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = [Player.objects.create(name=f"Player {i}") for i in range(3)]
+        cls.event = Event.objects.create(date=datetime.date(2025, 5, 1), pot=500, remaining_chips=500, asop=True)
+        register_participants(cls.event, {
+            cls.players[0].id: (Decimal('50'), Decimal('0')),
+            cls.players[1].id: (Decimal('50'), Decimal('0')),
+            cls.players[2].id: (Decimal('20'), Decimal('0')),
+        })
+        chips.re_buy(cls.event.id, {cls.players[1].id: Decimal('30')})
+        chips.cash_out(cls.event.id, cls.players[2].id, Decimal('15'))
+        for player, amount in zip(cls.players, [120, 0, 30]):
+            EventParticipation.objects.filter(event=cls.event, player=player).update(earnings=amount)
+
+    def end_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('end_event', args=[self.event.id]))
+        return EventSummary.objects.get(event=self.event)
+
+    def test_end_event_settles(self):
+        summary = self.end_event()
+        self.assertFalse(Event.objects.get(id=self.event.id).active)
+        self.assertEqual(
+            (summary.players, summary.total_initial_buy_in, summary.total_re_buy, summary.total_buy_in,
+             summary.total_earnings, summary.cashed_out, summary.remaining_chips, summary.chip_difference),
+            (3, 120, 30, 150, 150, 15, 365, 0),
+        )
+        results = EventResult.objects.filter(event=self.event).order_by('position')
+        self.assertEqual([(r.player_id, r.net) for r in results], [
+            (self.players[0].id, 70), (self.players[2].id, 10), (self.players[1].id, -80),
+        ])
+
+    def test_reconciliation_shows_chip_difference(self):
+        Event.objects.filter(id=self.event.id).update(remaining_chips=300)
+        self.assertEqual(self.end_event().chip_difference, -65)
+
+    def test_settled_rows_are_immutable(self):
+        summary = self.end_event()
+        with self.assertRaises(settlement.AlreadySettled):
+            settlement.settle(self.event.id)
+        with self.assertRaises(ValidationError):
+            summary.save()
+        with self.assertRaises(ValidationError):
+            EventResult.objects.filter(event=self.event).first().save()
+        # ending it again is a no-op
+        self.assertEqual(self.client.get(reverse('end_event', args=[self.event.id])).status_code, 302)
+
+    def test_resettle_after_correction(self):
+        self.end_event()
+        EventParticipation.objects.filter(event=self.event, player=self.players[1]).update(earnings=80)
+        call_command('settle_events', event=[self.event.id], resettle=True, stdout=io.StringIO())
+        self.assertEqual(EventResult.objects.get(event=self.event, player=self.players[1]).net, 0)
+        self.assertEqual(EventSummary.objects.get(event=self.event).total_earnings, 230)
+
+    def test_participation_edit_resettles(self):
+        self.end_event()
+        participation = EventParticipation.objects.get(event=self.event, player=self.players[1])
+        participation.earnings = 80
+        with self.captureOnCommitCallbacks(execute=True):
+            participation.save()
+        self.assertEqual(EventResult.objects.get(event=self.event, player=self.players[1]).net, 0)
+        self.assertEqual(EventSummary.objects.get(event=self.event).total_earnings, 230)
+        self.assertEqual(stats.current().for_player(self.players[1].id)['net'], 0)
+        self.assertEqual(rank_history.history(self.players[1].id)[0][3], 80)
+        leaderboards.rebuild_last_asop()
+        board = LeaderboardEntry.objects.filter(board=LeaderboardEntry.LAST_ASOP)
+        self.assertEqual(board.get(player=self.players[1]).earnings, 80)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            EventParticipation.objects.get(event=self.event, player=self.players[2]).delete()
+        self.assertEqual(EventSummary.objects.get(event=self.event).players, 2)
+        self.assertFalse(EventResult.objects.filter(player=self.players[2]).exists())
+        self.assertFalse(RankSnapshot.objects.filter(player=self.players[2]).exists())
+
+    def test_bulk_writes_after_settlement_resettle(self):
+        self.end_event()
+        with self.captureOnCommitCallbacks(execute=True):
+            chips.re_buy(self.event.id, {self.players[0].id: Decimal('25')})
+        self.assertEqual(EventSummary.objects.get(event=self.event).total_re_buy, 55)
+        result = EventResult.objects.get(event=self.event, player=self.players[0])
+        self.assertEqual((result.re_buy, result.net), (25, 45))
+
+        late = Player.objects.create(name="Late Player")
+        with self.captureOnCommitCallbacks(execute=True):
+            register_participants(self.event, {late.id: (Decimal('10'), Decimal('0'))})
+        self.assertEqual(EventSummary.objects.get(event=self.event).players, 4)
+        self.assertTrue(EventResult.objects.filter(event=self.event, player=late).exists())
+
+    def test_last_asop_board_reads_results(self):
+        self.end_event()
+        EventParticipation.objects.filter(event=self.event).update(earnings=0)  # not visible until resettled
+        leaderboards.rebuild_last_asop()
+        board = LeaderboardEntry.objects.filter(board=LeaderboardEntry.LAST_ASOP).order_by('player_id')
+        self.assertEqual([entry.earnings for entry in board], [120, 0, 30])
+
+    def test_home_lists_past_events(self):
+        self.end_event()
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'ASOP - Date: 2025-05-01')
+        self.assertContains(response, '€ 120.00 + € 30.00 Re-Buys')
+
+    def test_date_change_updates_copies(self):
+        self.end_event()
+        event = Event.objects.get(id=self.event.id)
+        event.date = datetime.date(2025, 5, 2)
+        event.save()
+        self.assertEqual(EventSummary.objects.get(event=event).date, event.date)
+        self.assertEqual(set(EventResult.objects.filter(event=event).values_list('date', flat=True)), {event.date})
+
+
+@override_settings(RANK_HISTORY_DEPTH=4)
+class RankHistoryTests(TestCase):
+    """Der fortgeschriebene Verlauf muss den pro Event neu berechneten Ranglisten entsprechen."""
+
+    @classmethod
+    def setUpTestData(cls):
+        synthetic.generate(players=15, events=20, participations=150, asop_ratio=0.5, seed=5,
+                           start_date=datetime.date(2024, 1, 5))
+
+    def rows(self):
+        return list(RankSnapshot.objects.order_by('board', 'event_id', 'player_id').values_list(
+            'board', 'event_id', 'player_id', 'date', 'position', 'earnings'))
+
+    def assertMatchesRebuild(self):
+        rows = self.rows()
+        rank_history.rebuild()
+        self.assertEqual(rows, self.rows())
+
+    def test_matches_rankings_recomputed_per_event(self):
+        events = list(EventResult.objects.order_by('date', 'event_id').values_list('date', 'event_id').distinct())
+        for board, results in ((RankSnapshot.TOP, EventResult.objects.all()),
+                               (RankSnapshot.ASOP, EventResult.objects.filter(asop=True))):
+            places = {}  # player_id -> (position, earnings) of the latest row
+            for date, event_id in events:
+                rows = {
+                    player_id: (position, total) for player_id, position, total in
+                    RankSnapshot.objects.filter(board=board, event_id=event_id)
+                    .values_list('player_id', 'position', 'earnings')
+                }
+                places.update(rows)
+                totals = results.exclude(Q(date__gt=date) | Q(date=date, event_id__gt=event_id)) \
+                    .values('player_id').annotate(total=Sum('earnings')).values_list('player_id', 'total')
+                ranking = sorted(totals, key=lambda row: (-row[1], row[0]))
+                expected = {player_id: (position, total) for position, (player_id, total) in enumerate(ranking, 1)}
+
+                # Every row is exact, participants always get one, and within the top 4 the latest
+                # rows are current (also nobody keeps a top-4 place after dropping out)
+                self.assertEqual(rows, {player_id: expected[player_id] for player_id in rows})
+                self.assertLessEqual(set(results.filter(event_id=event_id).values_list('player_id', flat=True)),
+                                     rows.keys())
+                top = {player_id: place for player_id, place in places.items() if place[0] <= 4}
+                top.update((player_id, place) for player_id, place in expected.items() if place[0] <= 4)
+                self.assertEqual({player_id: places.get(player_id) for player_id in top},
+                                 {player_id: expected[player_id] for player_id in top}, (board, event_id))
+
+    def test_settle_appends_and_later_changes_rewrite(self):
+        event = Event.objects.create(date=datetime.date(2025, 6, 1), pot=1000, remaining_chips=1000, asop=True)
+        register_participants(event, {player.id: (Decimal('20'), Decimal('0')) for player in Player.objects.all()[:4]})
+        EventParticipation.objects.filter(event=event).update(earnings=500)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('end_event', args=[event.id]))
+        self.assertEqual(RankSnapshot.objects.filter(event=event, board=RankSnapshot.TOP, position__lte=4).count(), 4)
+        self.assertMatchesRebuild()
+
+        # An older event settled late, a moved event and a deleted one rewrite the later history
+        old = Event.objects.create(date=datetime.date(2024, 2, 1), pot=100, active=False)
+        EventParticipation.objects.create(event=old, player=Player.objects.last(), earnings=900)
+        settlement.settle_finished([old.id])
+        self.assertMatchesRebuild()
+        old.date = datetime.date(2025, 7, 1)
+        old.save()
+        self.assertMatchesRebuild()
+        Event.objects.filter(id=event.id).delete()
+        self.assertMatchesRebuild()
+        Player.objects.filter(id=Player.objects.first().id).delete()
+        self.assertMatchesRebuild()
+
+    def test_history_range_starts_with_previous_place(self):
+        player_id = EventResult.objects.values_list('player_id', flat=True).first()
+        everything = list(rank_history.history(player_id))
+        start, end = everything[2][1], everything[-2][1]
+        ranged = list(rank_history.history(player_id, start=start + datetime.timedelta(days=1), end=end))
+        self.assertEqual(ranged[0], everything[2])
+        self.assertEqual(ranged[1:], [row for row in everything if start < row[1] <= end])
+
+    def test_api(self):
+        player_id = EventResult.objects.filter(asop=True).values_list('player_id', flat=True).first()
+        url = reverse('player_ranks_api', args=[player_id])
+        data = self.client.get(url, {'board': 'asop'}).json()
+        self.assertEqual(data['board'], 'asop')
+        self.assertEqual(
+            [(point['event_id'], point['position']) for point in data['ranks']],
+            [(event_id, position) for event_id, _, position, _ in rank_history.history(player_id, RankSnapshot.ASOP)],
+        )
+        self.assertEqual(self.client.get(url, {'board': 'trend'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'from': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('player_ranks_api', args=[999999])).status_code, 404)
+
+
+class ArchiveTests(TestCase):
+    """Archivieren verschiebt nur Zeilen: Summen, Ranglisten und Export bleiben gleich, restore holt alles zurück."""
+
+    @classmethod
+    def setUpTestData(cls):
+        synthetic.generate(players=25, events=40, participations=400, asop_ratio=0.4, seed=11,
+                           start_date=datetime.date(2023, 1, 2))
+        cls.cutoff = datetime.date(2023, 7, 1)
+
+    def snapshot(self):
+        return {
+            'players': list(Player.objects.order_by('id').values_list('id', 'total_earnings', 'last_played')),
+            'boards': list(LeaderboardEntry.objects.order_by('board', 'player_id').values_list(
+                'board', 'player_id', 'earnings')),
+            'periods': list(PlayerPeriodTotal.objects.order_by('player_id', 'period', 'period_start').values_list(
+                'player_id', 'period', 'period_start', 'earnings', 'buy_in', 'events')),
+            'range': rollups.range_ranking(datetime.date(2023, 2, 10), datetime.date(2023, 9, 20), limit=100),
+            'last_events': rollups.last_events_ranking(30, limit=100),
+            'export': list(transfer.export_rows()),
+        }
+
+    def archive(self, cutoff=None):
+        return archive.archive(cutoff or self.cutoff)
+
+    def test_archive_keeps_totals_and_rankings(self):
+        before = self.snapshot()
+        old_events = Event.objects.filter(date__lt=self.cutoff)
+        hot = EventParticipation.objects.count()
+
+        events, participations = self.archive()
+        self.assertGreater(participations, 0)
+        self.assertEqual(events, old_events.count())
+        self.assertFalse(EventParticipation.objects.filter(event__in=old_events).exists())
+        self.assertFalse(ChipTransaction.objects.filter(event__in=old_events).exists())
+        self.assertEqual(EventParticipation.objects.count(), hot - participations)
+        self.assertEqual(self.snapshot(), before)
+
+        # Full recomputation from the hot tables plus the carry-forward gives the same numbers
+        earnings.recompute()
+        rollups.recompute()
+        leaderboards.rebuild_all()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_rankings_fed_by_participations_stay_hot(self):
+        self.archive(datetime.date.max)
+        hot = set(Event.objects.filter(archived=False).values_list('id', flat=True))
+        self.assertTrue(set(leaderboards.recent_event_ids()) | {leaderboards.last_asop_event_id()} <= hot)
+
+    def test_trend_window_reaches_into_the_archive(self):
+        self.archive()
+        with override_settings(TREND_EVENT_COUNT=30):
+            event_ids = leaderboards.recent_event_ids()
+            leaderboards.rebuild_trend()
+        self.assertTrue(Event.objects.filter(id__in=event_ids, archived=True).exists())
+        totals = {}
+        for row in transfer.export_rows(Event.objects.filter(id__in=event_ids)):
+            player_id = Player.objects.get(name=row['player']).id
+            totals[player_id] = totals.get(player_id, 0) + row['earnings']
+        board = LeaderboardEntry.objects.filter(board=LeaderboardEntry.TREND)
+        self.assertEqual(dict(board.values_list('player_id', 'earnings')), totals)
+
+    def test_restore_round_trip(self):
+        def rows():
+            return (
+                list(EventParticipation.objects.order_by('id').values_list(
+                    'id', 'event_id', 'player_id', 'earnings', 'initial_buy_in', 're_buy')),
+                list(ChipTransaction.objects.order_by('id').values_list(
+                    'id', 'event_id', 'player_id', 'kind', 'amount', 'created_at')),
+            )
+
+        before, totals = rows(), self.snapshot()
+        events, participations = self.archive()
+        self.assertEqual(archive.restore(), (events, participations))
+        self.assertEqual(rows(), before)
+        self.assertEqual(self.snapshot(), totals)
+        self.assertFalse(PlayerArchiveTotal.objects.exists())
+        self.assertFalse(Event.objects.filter(archived=True).exists())
+
+    def test_archived_events_are_frozen(self):
+        self.archive()
+        event = Event.objects.filter(archived=True).first()
+        event.date = datetime.date(2024, 1, 1)
+        with self.assertRaises(ValidationError):
+            event.save()
+        # Re-settling skips archived events, their participations are no longer in the hot table
+        settlement.settle_finished(resettle=True)
+        self.assertEqual(EventResult.objects.filter(event=event).count(), EventSummary.objects.get(event=event).players)
+
+    def test_deleting_archived_event_updates_totals(self):
+        self.archive()
+        event = Event.objects.filter(archived=True, asop=True).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            event.delete()
+        for player in Player.objects.all():
+            hot = player.event_participations.aggregate(total=Sum('earnings'))['total'] or 0
+            archived = player.archived_participations.aggregate(total=Sum('earnings'))['total'] or 0
+            self.assertEqual(player.total_earnings, hot + archived)
+        before = self.snapshot()
+        leaderboards.rebuild_asop()
+        self.assertEqual(self.snapshot()['boards'], before['boards'])
+
+    def test_commands(self):
+        out = io.StringIO()
+        call_command('archive_events', before=self.cutoff.isoformat(), stdout=out)
+        self.assertIn(f"Archived {Event.objects.filter(archived=True).count()} event(s)", out.getvalue())
+        call_command('restore_events', all=True, stdout=out)
+        self.assertFalse(Event.objects.filter(archived=True).exists())
+        with self.assertRaises(CommandError):
+            call_command('restore_events', stdout=out)
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        synthetic.generate(players=20, events=5, participations=40, asop_ratio=0.4, seed=3)
+
+    def snapshot(self):
+        return sorted(EventParticipation.objects.values_list(
+            'event__date', 'event__asop', 'event__host_player__name', 'event__pot', 'event__remaining_chips',
+            'player__name', 'initial_buy_in', 're_buy', 'earnings',
+        ))
+
+    def export(self, format):
+        response = self.client.get(reverse('export_events', args=[format]))
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def reimport(self, content, format, **kwargs):
+        before = self.snapshot()
+        ledger = ChipTransaction.objects.count()
+        totals = dict(Player.objects.values_list('name', 'total_earnings'))
+        Event.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            transfer.Importer(**kwargs).run(transfer.read_rows(io.StringIO(content), format))
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(dict(Player.objects.values_list('name', 'total_earnings')), totals)
+        self.assertEqual(ChipTransaction.objects.count(), ledger)
+
+    def test_csv_round_trip(self):
+        content = self.export('csv')
+        self.assertTrue(content.startswith(','.join(transfer.COLUMNS)))
+        self.reimport(content, 'csv', chunk_size=7)
+        trend_players = EventParticipation.objects.filter(event__in=leaderboards.recent_event_ids())
+        self.assertEqual(LeaderboardEntry.objects.filter(board=LeaderboardEntry.TREND).count(),
+                         trend_players.values('player').distinct().count())
+
+    def test_jsonl_round_trip(self):
+        content = self.export('jsonl')
+        self.assertEqual(len(content.splitlines()), 40)
+        self.reimport(content, 'jsonl', chunk_size=1000)
+
+    def test_export_queries_do_not_grow_per_row(self):
+        with self.assertNumQueries(1):
+            self.export('jsonl')
+
+    def test_export_streams_async_under_asgi(self):
+        async def export():
+            response = await self.async_client.get(reverse('export_events', args=['jsonl']))
+            self.assertTrue(response.is_async)  # a sync iterator would be read into a list by Django first
+            return [chunk async for chunk in response.streaming_content]
+
+        with self.assertNumQueries(1):
+            chunks = async_to_sync(export)()
+        self.assertEqual(b''.join(chunks).decode(), self.export('jsonl'))
+
+        lines = (f'{i}\n' for i in range(5))
+        chunks = async_to_sync(lambda: self.collect(transfer.aiter_lines(lines, chunk_size=2)))()
+        self.assertEqual(chunks, ['0\n1\n', '2\n3\n', '4\n'])
+
+    async def collect(self, chunks):
+        return [chunk async for chunk in chunks]
+
+    def test_import_command_reports_bad_rows(self):
+        rows = [
+            {'event': 'a', 'date': '2024-01-05', 'asop': 'true', 'pot': '500', 'player': 'New Player',
+             'initial_buy_in': '50', 'earnings': '20'},
+            {'event': 'b', 'date': '2024-01-12', 'asop': 'true', 'pot': '500', 'player': 'New Player',
+             'initial_buy_in': '20', 'earnings': '-5'},
+            {'event': 'b', 'date': '2024-01-12', 'asop': 'true', 'pot': '500', 'player': 'New Player'},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+            f.write('\n'.join(json.dumps(row) for row in rows))
+        self.addCleanup(os.remove, f.name)
+
+        with self.assertRaisesMessage(CommandError, 'Line 3: New Player appears twice in event b'):
+            call_command('import_events', f.name, chunk_size=2, stdout=io.StringIO())
+        # The first chunk was committed and its derived data recomputed
+        player = Player.objects.get(name='New Player')
+        self.assertEqual(player.total_earnings, 15)
+        self.assertEqual(Event.objects.get(date='2024-01-05').remaining_chips, 450)
+
+
+class SyntheticDataTests(TestCase):
+    def test_generate(self):
+        players, events = synthetic.generate(players=30, events=6, participations=60, asop_ratio=0.5, seed=7)
+        self.assertEqual(EventParticipation.objects.count(), 60)
+        for event in events:
+            self.assertTrue(event.asop or event.host_player_id)
+            participations = EventParticipation.objects.filter(event=event)
+            self.assertEqual(participations.aggregate(total=Sum('earnings'))['total'], 0)
+            self.assertEqual(
+                event.pot + ChipTransaction.balance(event.chip_transactions.all()), event.remaining_chips
+            )
+        top = Player.objects.order_by('-total_earnings').first()
+        self.assertEqual(top.total_earnings, top.event_participations.aggregate(total=Sum('earnings'))['total'])
+
+
+class LiveEventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.player = Player.objects.create(name="Klaus")
+        cls.event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=500, remaining_chips=500, asop=True)
+        EventParticipation.objects.create(event=cls.event, player=cls.player, initial_buy_in=50)
+
+    def test_chip_change_is_broadcast_after_commit(self):
+        async def scenario():
+            subscriber = live.broadcaster.subscribe()
+            try:
+                await sync_to_async(self.re_buy)()
+                return json.loads((await asyncio.wait_for(subscriber[1].get(), 1)).split('data: ', 1)[1])
+            finally:
+                live.broadcaster.unsubscribe(subscriber)
+
+        snapshot = async_to_sync(scenario)()
+        self.assertEqual(snapshot['remaining_chips'], '480.00')
+        self.assertEqual(snapshot['players'], [{'id': self.player.id, 'name': 'Klaus', 'total_buy_in': '70'}])
+
+    def re_buy(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            chips.re_buy(self.event.id, {self.player.id: Decimal('20')})
+
+    def test_no_work_without_subscribers(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            live.notify(self.event.id)
+        self.assertEqual(callbacks, [])
+
+    def test_stream_starts_with_active_events(self):
+        async def first_message():
+            response = await self.async_client.get(reverse('live_events'))
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            stream = aiter(response.streaming_content)
+            try:
+                return await anext(stream)
+            finally:
+                await stream.aclose()
+
+        message = async_to_sync(first_message)()
+        self.assertTrue(message.startswith(b'event: event\n'))
+        self.assertIn(b'"remaining_chips": "500.00"', message)
+
+
+class EarningsRecomputationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = [Player.objects.create(name=f"Player {i}") for i in range(3)]
+        cls.events = [
+            Event.objects.create(date=datetime.date(2025, 1, 1) + datetime.timedelta(days=i), pot=100, asop=True)
+            for i in range(10)
+        ]
+
+    def test_one_update_per_commit(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for event in self.events:
+                        for player in self.players:
+                            EventParticipation.objects.create(event=event, player=player, earnings=player.id)
+        player_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "poker_data_player"')]
+        self.assertEqual(len(player_updates), 1)
+        for player in self.players:
+            player.refresh_from_db()
+            self.assertEqual(player.total_earnings, 10 * player.id)
+
+    def test_deleting_an_event_updates_earnings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            EventParticipation.objects.create(event=self.events[0], player=self.players[0], earnings=40)
+            EventParticipation.objects.create(event=self.events[1], player=self.players[0], earnings=-15)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.events[0].delete()
+        self.players[0].refresh_from_db()
+        self.assertEqual(self.players[0].total_earnings, -15)
+
+    def test_recompute_all(self):
+        EventParticipation.objects.bulk_create([
+            EventParticipation(event=self.events[0], player=self.players[1], earnings=25),
+        ])
+        self.assertEqual(earnings.recompute(), 3)
+        self.players[1].refresh_from_db()
+        self.assertEqual(self.players[1].total_earnings, 25)
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(QUERY_BUDGET_MODE='raise', QUERY_BUDGETS={'home': 1})
+    def test_raise_mode_fails_request_over_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('home'))
+
+    @override_settings(QUERY_BUDGET_MODE='warn', QUERY_BUDGETS={'home': 1})
+    def test_warn_mode_logs_request_over_budget(self):
+        with self.assertLogs('poker_data.middleware', level='WARNING'):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGET_MODE='raise', QUERY_BUDGETS={'home': 50})
+    def test_request_within_budget_passes(self):
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.player = Player.objects.create(name="Klaus", total_earnings=40)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_records_sql_and_render_per_view(self):
+        executed = []
+
+        def record(execute, sql, *args):
+            executed.append(sql)
+            return execute(sql, *args)
+
+        with connection.execute_wrapper(record):
+            self.client.get(reverse('home'))
+        self.client.get(reverse('leaderboard_api', args=['top']))
+        samples = self.scrape()
+
+        self.assertEqual(samples['poker_requests_total{view="home",status="200"}'], 1)
+        self.assertEqual(samples['poker_request_sql_queries_sum{view="home"}'], len(executed))
+        self.assertEqual(samples['poker_request_sql_queries_sum{view="leaderboard_api"}'], 1)
+        self.assertGreater(samples['poker_request_render_duration_seconds_sum{view="home"}'], 0)
+        self.assertEqual(samples['poker_request_render_duration_seconds_sum{view="leaderboard_api"}'], 0)
+        self.assertEqual(samples['poker_request_duration_seconds_bucket{view="home",le="+Inf"}'], 1)
+        self.assertLessEqual(samples['poker_request_sql_duration_seconds_sum{view="home"}'],
+                             samples['poker_request_duration_seconds_sum{view="home"}'])
+
+    def test_unresolved_and_forbidden(self):
+        self.client.get('/does-not-exist/')
+        self.assertEqual(self.scrape()['poker_requests_total{view="unmatched",status="404"}'], 1)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.8').status_code, 403)
+
+    @override_settings(SLOW_REQUEST_SECONDS=0)
+    def test_slow_requests_are_logged_with_their_queries(self):
+        with self.assertLogs('poker_data.middleware', 'WARNING') as logs:
+            self.client.get(reverse('leaderboard_api', args=['top']))
+        self.assertIn('(leaderboard_api)', logs.output[0])
+        self.assertIn('FROM "poker_data_player"', logs.output[0])
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        settings_override = override_settings(STATIC_ROOT=static_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_templates_use_hashed_names(self):
+        event = Event.objects.create(date=datetime.date(2025, 3, 1), pot=100, asop=True)
+        response = self.client.get(reverse('add_players', args=[event.id]))
+        url = staticfiles_storage.url('JS/add_players.js')
+        self.assertRegex(url, r'^/static/JS/add_players\.[0-9a-f]{12}\.js$')
+        self.assertContains(response, f'src="{url}"')
+
+    def test_serves_precompressed_with_immutable_caching(self):
+        url = staticfiles_storage.url('JS/re_buy.js')
+        with open(os.path.join(settings.BASE_DIR, 'static', 'JS', 're_buy.js'), 'rb') as f:
+            original = f.read()
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), original)
+
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), original)
+
+    def test_unhashed_names_get_short_caching(self):
+        response = self.client.get('/static/JS/re_buy.js', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.STATIC_MAX_AGE}')
+        self.assertEqual(
+            self.client.get('/static/JS/re_buy.js', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+        self.assertEqual(self.client.get('/static/../settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/static/JS/missing.js').status_code, 404)
+
+    def test_accept_encoding_weights(self):
+        url = staticfiles_storage.url('JS/re_buy.js')
+        for header, encoding in [('gzip;q=0, deflate', None), ('GZIP; q=0.5', 'gzip'), ('*', 'gzip'),
+                                 ('*;q=0', None), ('gzip;q=0, *', None), ('gzip;q=bogus', None)]:
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(response.get('Content-Encoding'), encoding, header)
+
+    def test_not_modified_keeps_cache_headers(self):
+        url = staticfiles_storage.url('JS/re_buy.js')
+        modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_new_collectstatic_is_seen_without_restart(self):
+        hashed = staticfiles_storage.stored_name('JS/re_buy.js')
+        self.assertTrue(staticfiles_storage.is_hashed(hashed))
+
+        manifest = staticfiles_storage.path(staticfiles_storage.manifest_name)
+        with open(manifest) as f:
+            content = json.load(f)
+        content['paths']['JS/re_buy.js'] = 'JS/re_buy.0123456789ab.js'
+        with open(manifest, 'w') as f:
+            json.dump(content, f)
+        mtime = os.path.getmtime(manifest) + 10
+        os.utime(manifest, (mtime, mtime))
+
+        self.assertFalse(staticfiles_storage.is_hashed(hashed))
+        self.assertTrue(staticfiles_storage.is_hashed('JS/re_buy.0123456789ab.js'))
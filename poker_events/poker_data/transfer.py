@@ -0,0 +1,230 @@
+# poker_data/transfer.py
+"""Import und Export von Events mit Teilnahmen als CSV oder JSON Lines.
+
+Eine Zeile ist eine Teilnahme, die Event-Spalten wiederholen sich pro Teilnahme::
+
+    event,date,host_location,asop,host_player,pot,player,initial_buy_in,re_buy,earnings
+
+``event`` ist ein beliebiger Schlüssel, der die Zeilen eines Events zusammenhält (der
+Export schreibt die Event-ID). Spieler werden über ihren Namen gefunden oder angelegt.
+
+Jeder Schlüssel legt ein neues Event an; der Import ergänzt keine bestehenden Events.
+Der Import läuft in Blöcken: jeder Block ist eine Transaktion mit bulk_create für
+Spieler, Events, Teilnahmen und Chip-Ledger. total_earnings, Perioden-Summen,
+Ranglisten und remaining_chips werden einmal am Ende nachgezogen, danach werden die
+(beendeten) Events abgerechnet.
+"""
+import csv
+import datetime
+import itertools
+import json
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from poker_data import caching, earnings, leaderboards, rollups, settlement
+from poker_data.models import ArchivedParticipation, ChipTransaction, Event, EventParticipation, Player
+
+COLUMNS = [
+    'event', 'date', 'host_location', 'asop', 'host_player', 'pot',
+    'player', 'initial_buy_in', 're_buy', 'earnings',
+]
+CHUNK_SIZE = 2000
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on'}
+
+
+class InvalidRow(ValueError):
+    def __init__(self, line, message):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+def read_rows(stream, format):
+    """Liest ``(Zeilennummer, dict)`` aus einer CSV- oder JSONL-Datei, ohne sie ganz zu laden."""
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif format == 'jsonl':
+        for line, text in enumerate(stream, start=1):
+            if text.strip():
+                try:
+                    yield line, json.loads(text)
+                except json.JSONDecodeError as e:
+                    raise InvalidRow(line, f"invalid JSON ({e.msg})")
+    else:
+        raise ValueError(f"Unknown format {format!r}")
+
+
+def _decimal(line, row, column):
+    try:
+        return Decimal(str(row.get(column) or '0'))
+    except InvalidOperation:
+        raise InvalidRow(line, f"{column} is not a number: {row.get(column)!r}")
+
+
+def _parse(line, row):
+    """Prüft eine Zeile und wandelt die Werte um."""
+    for column in ('event', 'date', 'player'):
+        if not row.get(column):
+            raise InvalidRow(line, f"{column} is missing")
+    try:
+        date = datetime.date.fromisoformat(str(row['date']))
+    except ValueError:
+        raise InvalidRow(line, f"date is not YYYY-MM-DD: {row['date']!r}")
+    asop = row.get('asop')
+    return {
+        'event': str(row['event']),
+        'date': date,
+        'host_location': row.get('host_location') or None,
+        'asop': asop is True or str(asop).lower() in TRUE_VALUES,
+        'host_player': row.get('host_player') or None,
+        'pot': _decimal(line, row, 'pot'),
+        'player': str(row['player']),
+        'initial_buy_in': _decimal(line, row, 'initial_buy_in'),
+        're_buy': _decimal(line, row, 're_buy'),
+        'earnings': _decimal(line, row, 'earnings'),
+    }
+
+
+class Importer:
+    """Importiert Zeilen blockweise; Zustand über Blockgrenzen hinweg sind nur Schlüssel und Summen."""
+
+    def __init__(self, chunk_size=CHUNK_SIZE, log=None):
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.players = {}  # name -> id
+        self.events = {}  # key -> [id, pot, buy-ins]
+        self.seated = set()  # (event key, player name)
+        self.player_ids = set()
+        self.participations = 0
+
+    def _resolve_players(self, names):
+        missing = set(names) - set(self.players)
+        if missing:
+            self.players.update(Player.objects.filter(name__in=missing).values_list('name', 'id'))
+            new = [Player(name=name) for name in missing if name not in self.players]
+            for player in Player.objects.bulk_create(new):
+                self.players[player.name] = player.id
+
+    def _import_chunk(self, chunk):
+        # Doppelte Teilnahmen vor dem ersten Schreibzugriff erkennen
+        for line, row in chunk:
+            if (row['event'], row['player']) in self.seated:
+                raise InvalidRow(line, f"{row['player']} appears twice in event {row['event']}")
+            self.seated.add((row['event'], row['player']))
+
+        rows = [row for _, row in chunk]
+        self._resolve_players({row['player'] for row in rows} | {row['host_player'] for row in rows if row['host_player']})
+
+        new_events = {}
+        for row in rows:
+            if row['event'] not in self.events and row['event'] not in new_events:
+                new_events[row['event']] = Event(
+                    date=row['date'], host_location=row['host_location'], asop=row['asop'], pot=row['pot'],
+                    host_player_id=self.players[row['host_player']] if row['host_player'] else None,
+                    active=False, remaining_chips=row['pot'],
+                )
+        for key, event in zip(new_events, Event.objects.bulk_create(new_events.values())):
+            self.events[key] = [event.id, event.pot, Decimal('0')]
+
+        participations, ledger = [], []
+        for row in rows:
+            event = self.events[row['event']]
+            player_id = self.players[row['player']]
+            self.player_ids.add(player_id)
+            participations.append(EventParticipation(
+                event_id=event[0], player_id=player_id, initial_buy_in=row['initial_buy_in'],
+                re_buy=row['re_buy'], earnings=row['earnings'],
+            ))
+            for kind, amount in ((ChipTransaction.BUY_IN, row['initial_buy_in']), (ChipTransaction.RE_BUY, row['re_buy'])):
+                if amount:
+                    ledger.append(ChipTransaction(event_id=event[0], player_id=player_id, kind=kind, amount=amount))
+                    event[2] += amount
+        EventParticipation.objects.bulk_create(participations)
+        ChipTransaction.objects.bulk_create(ledger)
+        self.participations += len(participations)
+
+    def _finish(self):
+        # bulk_create umgeht die Signale: alles Abgeleitete einmal am Ende nachziehen
+        if not self.events:
+            return
+        with transaction.atomic():
+            Event.objects.bulk_update([
+                Event(id=event_id, remaining_chips=max(pot - bought, 0))
+                for event_id, pot, bought in self.events.values()
+            ], ['remaining_chips'], batch_size=CHUNK_SIZE)
+            earnings.recompute(self.player_ids)
+            rollups.recompute(self.player_ids)
+            leaderboards.rebuild_all()
+            settlement.settle_finished([event_id for event_id, _, _ in self.events.values()])
+            caching.bump_on_commit(caching.DATA, caching.ACTIVE_EVENTS)
+
+    def run(self, rows):
+        """``rows`` liefert ``(Zeilennummer, dict)``; gibt (Events, Teilnahmen) zurück."""
+        rows = iter(rows)
+        try:
+            while chunk := list(itertools.islice(rows, self.chunk_size)):
+                parsed = [(line, _parse(line, row)) for line, row in chunk]
+                with transaction.atomic():
+                    self._import_chunk(parsed)
+                self.log(f"{len(self.events)} events, {self.participations} participations")
+        finally:
+            # Bereits importierte Blöcke bleiben bei einem Fehler erhalten und werden nachgerechnet
+            self._finish()
+        return len(self.events), self.participations
+
+
+def export_rows(events=None):
+    """Alle Teilnahmen als dicts mit den Spalten aus COLUMNS, per ``iterator()`` gestreamt.
+
+    Teilnahmen archivierter Events (archive.py) kommen per UNION ALL in derselben Query mit.
+    """
+    sources = [EventParticipation.objects.all(), ArchivedParticipation.objects.all()]
+    if events is not None:
+        sources = [participations.filter(event__in=events) for participations in sources]
+    hot, archived = [
+        participations.order_by().values_list(
+            'event_id', 'event__date', 'event__host_location', 'event__asop', 'event__host_player__name',
+            'event__pot', 'player__name', 'initial_buy_in', 're_buy', 'earnings', 'id',
+        )
+        for participations in sources
+    ]
+    rows = hot.union(archived, all=True).order_by('event__date', 'event_id', 'id')
+    for values in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield dict(zip(COLUMNS, values))  # the trailing id only orders the rows
+
+
+class _Echo:
+    # csv.writer needs a file; this one just hands the line back
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+async def aiter_lines(lines, chunk_size=CHUNK_SIZE):
+    """Liefert ``lines`` (csv_lines/jsonl_lines) als asynchronen Iterator für ASGI.
+
+    Einen synchronen Iterator würde Django unter ASGI erst komplett in eine Liste lesen.
+    Hier holt jeder Schritt höchstens ``chunk_size`` Zeilen im Thread der Anfrage
+    (thread_sensitive, dort gehört der Datenbank-Cursor hin).
+    """
+    next_chunk = sync_to_async(lambda: ''.join(itertools.islice(lines, chunk_size)), thread_sensitive=True)
+    try:
+        while chunk := await next_chunk():
+            yield chunk
+    finally:
+        # client gone or done: close the generator and with it the database cursor
+        await sync_to_async(lines.close, thread_sensitive=True)()
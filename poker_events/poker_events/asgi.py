@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poker_events.settings')
+# Serve the home page with the async view (concurrent queries, see poker_events/views.py)
+os.environ.setdefault('POKER_ASYNC_HOME', '1')
+# WAL, busy_timeout and persistent connections for the server (see DB_PROFILES in settings.py)
+os.environ.setdefault('POKER_DB_PROFILE', 'tuned')
 
 application = get_asgi_application()
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'poker_data.middleware.StaticFilesMiddleware',  # collected static files, before any other work
+    'poker_data.middleware.RequestMetricsMiddleware',  # first, so the latency covers all other middleware
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,13 +51,55 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'poker_data.middleware.QueryBudgetMiddleware',
 ]
 
+# SQL query budget per URL name, checked by poker_data.middleware.QueryBudgetMiddleware
+# and by the query-budget tests in poker_data/tests.py. The budgets include the work run
+# after the commit (earnings.mark_dirty, settlement.mark_stale), the tests count it too.
+# QUERY_BUDGET_MODE: 'warn' logs requests over budget, 'raise' fails them, None disables the check.
+QUERY_BUDGET_MODE = 'warn' if DEBUG else None
+QUERY_BUDGETS = {
+    'home': 8,
+    'add_event': 14,
+    'add_players': 28,
+    're_buy': 12,
+    're_buy_api': 10,
+    'end_event': 15,
+    'leaderboard_api': 1,
+    'standings_api': 3,
+    'player_detail': 4,
+    'player_stats_api': 3,
+    'player_search_api': 1,
+    'player_ranks_api': 2,
+}
+
+# Per-request latency, SQL and render metrics (poker_data.middleware.RequestMetricsMiddleware),
+# served in Prometheus text format at /metrics to the addresses in METRICS_ALLOWED_IPS.
+# SLOW_REQUEST_SECONDS logs slower requests with their slowest queries (None disables the log).
+REQUEST_METRICS = True
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+SLOW_REQUEST_SECONDS = 0.5
+
+# Number of most recent events in the "Trending Players" ranking.
+# After changing it run `python manage.py rebuild_leaderboards`.
+TREND_EVENT_COUNT = 3
+
+# Settled events older than this many days are moved to the archive tables by
+# `python manage.py archive_events` (see poker_data/archive.py); `restore_events` brings them back.
+ARCHIVE_AFTER_DAYS = 365
+
+# Places of the rank history (poker_data/rank_history.py) that are recorded after every event;
+# below them a player's place is only recorded after the events they played.
+# After changing it run `python manage.py rebuild_leaderboards`.
+RANK_HISTORY_DEPTH = 100
+
 ROOT_URLCONF = 'poker_events.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to the request metrics
+        'BACKEND': 'poker_data.metrics.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -71,15 +115,61 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'poker_events.wsgi.application'
+# The live event stream (/live/events/) needs ASGI, e.g. `uvicorn poker_events.asgi:application`
+ASGI_APPLICATION = 'poker_events.asgi.application'
+# Under ASGI the home page is served by the async view that runs its queries concurrently
+# (poker_events.views.home_async); asgi.py sets POKER_ASYNC_HOME=1 unless it is set already.
+ASYNC_HOME = os.environ.get('POKER_ASYNC_HOME') == '1'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite profiles, chosen with the POKER_DB_PROFILE environment variable:
+# 'tuned' runs the PRAGMAs below on every new connection and keeps connections open
+# between requests; 'basic' (default) is the plain Django default (one connection per request).
+# wsgi.py and asgi.py switch the servers to 'tuned'; manage.py stays on 'basic', so commands
+# like `makemigrations --check` don't rewrite the database file.
+# WAL lets readers and the writer work at the same time; journal_mode is stored in the
+# database file, so it stays WAL after switching back to 'basic'.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # safe with WAL, only the last commits may be lost on power failure
+    'busy_timeout': 5000,  # ms to wait for the write lock instead of failing with "database is locked"
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32000,  # negative = KiB, i.e. ~32 MB page cache per connection
+}
+DB_PROFILES = {
+    'basic': {},
+    'tuned': {
+        'OPTIONS': {'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items())},
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+}
+DB_PROFILE = os.environ.get('POKER_DB_PROFILE', 'basic')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # File-based test database, so the concurrency tests can open several connections
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        **DB_PROFILES[DB_PROFILE],
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory is per process; when running several worker processes switch to
+# 'django.core.cache.backends.filebased.FileBasedCache' so that signal-based invalidation
+# (poker_data/caching.py) reaches all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'poker-events',
     }
 }
 
@@ -120,6 +210,15 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
+# `python manage.py collectstatic` writes hashed, gzip/brotli-compressed copies here;
+# poker_data.middleware.StaticFilesMiddleware serves them (see poker_data/staticfiles.py)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATIC_MAX_AGE = 60  # seconds, for static files requested without hash in the name
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'poker_data.staticfiles.CompressedManifestStaticFilesStorage'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -14,6 +14,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from poker_events import views  # Import views from the appropriate directory
@@ -22,9 +23,20 @@ from poker_events import views  # Import views from the appropriate directory
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', views.home, name='home'),
+    path('', views.home_async if settings.ASYNC_HOME else views.home, name='home'),
     path('add-event/', views.add_event, name='add_event'),
     path('add_players/<int:event_id>/', views.add_players, name='add_players'),
     path('end_event/<int:event_id>/', views.end_event, name='end_event'),
     path('re_buy/<int:event_id>/', views.re_buy, name='re_buy'),
+    path('api/events/<int:event_id>/players/', views.add_players_api, name='add_players_api'),
+    path('api/events/<int:event_id>/re-buys/', views.re_buy_api, name='re_buy_api'),
+    path('live/events/', views.live_events, name='live_events'),
+    path('api/leaderboards/<str:board>/', views.leaderboard_api, name='leaderboard_api'),
+    path('api/standings/', views.standings_api, name='standings_api'),
+    path('players/<int:player_id>/', views.player_detail, name='player_detail'),
+    path('api/players/search/', views.player_search_api, name='player_search_api'),
+    path('api/players/<int:player_id>/stats/', views.player_stats_api, name='player_stats_api'),
+    path('api/players/<int:player_id>/ranks/', views.player_ranks_api, name='player_ranks_api'),
+    path('export/events.<str:format>', views.export_events, name='export_events'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
@@ -1,70 +1,276 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.forms import modelformset_factory
-from django.db.models import Sum, Q
+from django.db.models import F, Prefetch
 from django.db import transaction
-from poker_data.models import Player, Event, EventParticipation
+from poker_data.models import (
+    Player, Event, EventParticipation, EventSummary, LeaderboardEntry, PlayerPeriodTotal, RankSnapshot,
+)
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib import messages
-from decimal import Decimal
-
-# The following view calculates the necessary data for home.html
-def home(request):
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition, require_POST
+from poker_data import (
+    caching, chips, leaderboards, live, metrics, parallel, player_search, rank_history, rollups, settlement, stats,
+    transfer,
+)
+from poker_data.context_processors import active_events_exist
+from poker_data.forms import LoadedModelFormSet
+from poker_data.registration import register_participants
+from asgiref.sync import sync_to_async
+from decimal import Decimal, InvalidOperation
+import asyncio
+import datetime
+import json
+
+LIVE_HEARTBEAT_SECONDS = 15
+PAST_EVENTS = 10  # settled events listed on the home page
+
+# home.html and the leaderboard pages only change when the data version is bumped
+# (see poker_data/caching.py), so repeat visitors and polling displays get a 304
+def home_etag(request, **kwargs):
+    return f'"home-{caching.get_version(caching.DATA)}"'
+
+def home_last_modified(request, **kwargs):
+    return caching.last_modified(caching.DATA)
+
+# The following function calculates the necessary data for home.html.
+# All querysets stay lazy: the template caches each block per data version
+# and only runs the queries of blocks that are not cached yet.
+def home_context():
+    # Each ranking shows its first page; "Show more" fetches the next pages from leaderboard_api
+    # (keyset pagination on earnings, see poker_data/leaderboards.py)
     # Fetch and sort players by total earnings for the "Top Poker Players Ranking"
-    top_players = Player.objects.all().order_by('-total_earnings')
-    
-    # Fetch the last 3 events by date
-    recent_events = Event.objects.order_by('-date')[:3]
-
-    # Fetch players and calculate their earnings specifically for the last 3 events for the "Trend Poker Players Ranking"
-    trend_players = (
-        Player.objects.filter(event_participations__event__in=recent_events)
-        .annotate(total_trend_earnings=Sum('event_participations__earnings', filter=Q(event_participations__event__in=recent_events)))
-        .order_by('-total_trend_earnings')
-    )
-
-    # If no earnings exist for recent events, fall back to all-time top earnings
-    if not trend_players.exists():
-        trend_players = top_players
-
-    # Fetch the active event(s) to display on the home page
-    active_events = Event.objects.filter(active=True)
-
-    # Fetch the players for each active event
-    for event in active_events:
-        event.players = event.eventparticipation_set.all()  # Get players associated with the event
+    top_players = leaderboards.Page(leaderboards.TOP)
 
-        for participation in event.players:
-            participation.total_buy_in = participation.initial_buy_in + participation.re_buy  # 🛠 Summe aus Initial + Re-Buys
+    # Trend, ASOP and last ASOP rankings are read from the materialized leaderboard tables
+    # If no earnings exist for recent events, home.html falls back to all-time top earnings
+    trend_players = leaderboards.Page(LeaderboardEntry.TREND)
 
-    # Check if any events are active
-    active_events_exist = active_events.exists()
+    # Fetch the active event(s) together with their players in two queries
+    participations = EventParticipation.objects.with_player().with_total_buy_in().order_by('id')
+    active_events = (
+        Event.objects.filter(active=True)
+        .prefetch_related(Prefetch('eventparticipation_set', queryset=participations, to_attr='players'))
+    )
 
     # ASOP Ranking (All ASOP events)
-    asop_players = (
-        Player.objects.filter(event_participations__event__asop=True)
-        .annotate(total_asop_earnings=Sum('event_participations__earnings'))
-        .order_by('-total_asop_earnings')
-    )
+    asop_players = leaderboards.Page(LeaderboardEntry.ASOP)
 
     # Last ASOP Ranking (Only the latest ASOP event)
-    last_asop_event = Event.objects.filter(asop=True).order_by('-date').first()
-    last_asop_players = (
-        Player.objects.filter(event_participations__event=last_asop_event)
-        .annotate(last_asop_earnings=Sum('event_participations__earnings'))
-        .order_by('-last_asop_earnings')
-    )
+    last_asop_players = leaderboards.Page(LeaderboardEntry.LAST_ASOP)
 
-    # Render the home page with both player lists and active events
-    return render(request, 'home.html', {
+    # Past events from their frozen settlement summaries (no aggregates over participations)
+    past_events = EventSummary.objects.order_by('-date', '-event_id')[:PAST_EVENTS]
+
+    return {
         'top_players': top_players,
         'trend_players': trend_players,
         'asop_players': asop_players,
         'last_asop_players': last_asop_players,
-        'active_events_exist': active_events_exist,
         'active_events': active_events,  # Pass active events to the template
+        'past_events': past_events,
+        'data_version': caching.get_version(caching.DATA),  # active_events_exist comes from the context processor
+    }
+
+# The csrftoken cookie lets the Re-Buy buttons post to re_buy_api; the token itself
+# can't be part of the cached page
+@ensure_csrf_cookie
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
+def home(request):
+    # Render the home page with both player lists and active events
+    return render(request, 'home.html', home_context())
+
+# Cached fragments of home.html and the context entries whose queries they need
+HOME_FRAGMENTS = {
+    'home_active_events': ['active_events'],
+    'home_top_players': ['top_players'],
+    'home_trend_players': ['trend_players', 'top_players'],  # top players are the fallback
+    'home_asop_players': ['asop_players'],
+    'home_last_asop_players': ['last_asop_players'],
+    'home_past_events': ['past_events'],
+}
+
+def _loader(value):
+    # Runs the query of a Page or queryset right away (in a worker thread, see below)
+    if isinstance(value, leaderboards.Page):
+        return value.load
+    return lambda: list(value)
+
+# Async home page for ASGI (poker_events/asgi.py sets ASYNC_HOME): the queries of all
+# uncached blocks run at the same time, each in its own thread and database connection
+# (see poker_data/parallel.py), so the latency is the slowest query instead of their sum.
+# Rendering needs no queries for those blocks any more.
+@ensure_csrf_cookie
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
+async def home_async(request):
+    context = home_context()
+    keys = {
+        fragment: make_template_fragment_key(fragment, [context['data_version']]) for fragment in HOME_FRAGMENTS
+    }
+    cached = await cache.aget_many(keys.values())
+    names = sorted({
+        name for fragment, names in HOME_FRAGMENTS.items() if keys[fragment] not in cached for name in names
+    })
+    if names:
+        # active_events_exist (context processor) is cached by the same call, render then needs no query
+        *loaded, _ = await parallel.gather(*(_loader(context[name]) for name in names), active_events_exist)
+        context.update(zip(names, loaded))
+    return await sync_to_async(render)(request, 'home.html', context)
+
+# JSON pages of a ranking: /api/leaderboards/<board>/?after=<cursor>&limit=<n>
+# "next" is the cursor for the following page, or null on the last page
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
+def leaderboard_api(request, board):
+    if board not in leaderboards.BOARDS:
+        raise Http404("Unknown leaderboard")
+
+    try:
+        limit = int(request.GET.get('limit', leaderboards.PAGE_SIZE))
+        page = leaderboards.Page(board, after=request.GET.get('after'), limit=limit)
+        rows = page.rows
+    except ValueError:  # also covers leaderboards.InvalidCursor
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+
+    return JsonResponse({
+        'board': board,
+        'players': [
+            {'id': row['player_id'], 'name': row['name'], 'earnings': str(row['earnings'])}
+            for row in rows
+        ],
+        'next': page.next_cursor,
+    })
+
+# Standings from the precomputed period totals (see poker_data/rollups.py):
+#   ?period=month|season|year&date=2025-03-14   the period containing the date
+#   ?from=2025-01-01&to=2025-06-30              any date range (both inclusive)
+#   ?last=5                                     the last N events
+def standings_api(request):
+    params = request.GET
+    try:
+        limit = max(1, min(int(params.get('limit', leaderboards.PAGE_SIZE)), leaderboards.MAX_PAGE_SIZE))
+        if 'period' in params:
+            if params['period'] not in dict(PlayerPeriodTotal.PERIOD_CHOICES):
+                raise ValueError(params['period'])
+            date = datetime.date.fromisoformat(params['date']) if 'date' in params else timezone.localdate()
+            players = rollups.period_ranking(params['period'], date, limit)
+        elif 'from' in params or 'to' in params:
+            players = rollups.range_ranking(
+                datetime.date.fromisoformat(params['from']), datetime.date.fromisoformat(params['to']), limit
+            )
+        else:
+            count = int(params.get('last', leaderboards.trend_event_count()))
+            if count < 1:
+                raise ValueError(count)
+            players = rollups.last_events_ranking(count, limit)
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Invalid period, date range or event count'}, status=400)
+
+    return JsonResponse({
+        'players': [
+            {'id': row['player_id'], 'name': row['name'], 'earnings': str(row['earnings']),
+             'buy_in': str(row['buy_in']), 'events': row['events']}
+            for row in players
+        ],
+    })
+
+# Statistics of one player over all finished events (see poker_data/stats.py):
+# net result, ROI, variance, streaks and the head-to-head record against every opponent
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
+def player_detail(request, player_id):
+    player = get_object_or_404(Player, id=player_id)
+    report = stats.player_report(player)
+    summary = report['summary']
+    return render(request, 'player_detail.html', {
+        'player': player,
+        'summary': summary,
+        'roi_percent': summary['roi'] * 100 if summary and summary['roi'] is not None else None,
+        'head_to_head': report['head_to_head'],
+    })
+
+# Player search for the add_event/add_players forms: /api/players/search/?q=<prefix>&limit=<n>
+# Case-insensitive name prefix, most recently active first; without q the recent players
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
+def player_search_api(request):
+    try:
+        limit = max(1, min(int(request.GET.get('limit', player_search.MAX_RESULTS)), player_search.MAX_RESULTS))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+
+    return JsonResponse({
+        'players': [
+            {'id': player.id, 'name': player.name,
+             'last_played': player.last_played.isoformat() if player.last_played else None}
+            for player in player_search.search(request.GET.get('q', ''), limit)
+        ],
+    })
+
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
+def player_stats_api(request, player_id):
+    player = get_object_or_404(Player, id=player_id)
+    report = stats.player_report(player)
+    summary = report['summary']
+    if summary is not None:
+        summary = {key: str(value) if isinstance(value, Decimal) else value for key, value in summary.items()}
+    return JsonResponse({
+        'id': player.id,
+        'name': player.name,
+        'summary': summary,
+        'head_to_head': [
+            {'id': record['player_id'], 'name': record['name'], 'events': record['events'],
+             'wins': record['wins'], 'losses': record['losses'], 'ties': record['ties'],
+             'net_difference': str(record['net_difference'])}
+            for record in report['head_to_head']
+        ],
     })
 
+# Rank history of one player (see poker_data/rank_history.py), one point per settled event
+# that changed the player's place: /api/players/<id>/ranks/?board=top|asop&from=2025-01-01&to=2025-12-31
+# With "from" the first point is the place at the start of the range
+@condition(etag_func=home_etag, last_modified_func=home_last_modified)
+def player_ranks_api(request, player_id):
+    player = get_object_or_404(Player, id=player_id)
+    params = request.GET
+    board = params.get('board', RankSnapshot.TOP)
+    try:
+        if board not in dict(RankSnapshot.BOARD_CHOICES):
+            raise ValueError(board)
+        start = datetime.date.fromisoformat(params['from']) if 'from' in params else None
+        end = datetime.date.fromisoformat(params['to']) if 'to' in params else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid board or date range'}, status=400)
+
+    return JsonResponse({
+        'id': player.id,
+        'board': board,
+        'ranks': [
+            {'event_id': event_id, 'date': date.isoformat(), 'position': position, 'earnings': str(earnings)}
+            for event_id, date, position, earnings in rank_history.history(player.id, board, start, end)
+        ],
+    })
+
+# Download of all events with their participations, in the format poker_data/transfer.py
+# imports (`python manage.py import_events`). Rows are streamed straight from the
+# database cursor, so memory use does not grow with the number of participations.
+# Under ASGI Django would read a sync iterator into a list first, so there the lines
+# are handed out by an async iterator in chunks (transfer.aiter_lines).
+def export_events(request, format):
+    lines = {'csv': transfer.csv_lines, 'jsonl': transfer.jsonl_lines}.get(format)
+    if lines is None:
+        raise Http404("Unknown export format")
+    content_type = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    content = lines(transfer.export_rows())
+    if isinstance(request, ASGIRequest):
+        content = transfer.aiter_lines(content)
+    response = StreamingHttpResponse(content, content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="poker_events.{format}"'
+    return response
+
 def add_event(request):
     event_created = False  # Flag to track if the event was created
 
@@ -95,8 +301,8 @@ def add_event(request):
         # Redirect to the page for adding players to the event
         return redirect('add_players', event_id=new_event.id)  # Redirect to the add_players page
 
-    # Fetch all players to display in the dropdown
-    players = Player.objects.all()
+    # Only recently active players; the search field fetches the others from player_search_api
+    players = player_search.recent()
 
     return render(request, 'add_event.html', {
         'players': players,
@@ -108,16 +314,19 @@ def end_event(request, event_id):
     # Get the event object
     event = get_object_or_404(Event, id=event_id)
 
-    # Set the event as inactive
-    event.active = False
-    event.save()
+    # Set the event as inactive and settle it: net results, buy-in totals and the pot
+    # reconciliation are frozen in EventSummary/EventResult (see poker_data/settlement.py)
+    try:
+        settlement.settle(event.id)
+    except settlement.AlreadySettled:
+        pass  # ended before, nothing to do
 
     # Redirect back to the home page or to a page that shows all events
     return redirect('home')  # Adjust the URL name if necessary
 
 def add_players(request, event_id):
     event = get_object_or_404(Event, id=event_id)
-    players = Player.objects.all()
+    players = player_search.recent()  # the others are added through the search field
 
     if request.method == 'POST':
         # Überprüfen, ob der "Cancel"-Button geklickt wurde
@@ -127,42 +336,24 @@ def add_players(request, event_id):
 
         # Spieler hinzufügen, wenn der "Cancel"-Button nicht geklickt wurde
         selected_players = request.POST.getlist('players')  # Get selected players from the form
-        
-        total_initial_buy_in = Decimal('0.00')  # 🛠 Initialisieren der Gesamt-Buy-Ins
-        total_re_buy = Decimal('0.00')  # 🛠 Initialisieren der Gesamt-Re-Buys
-
-        for player_id in selected_players:
-            player = Player.objects.get(id=player_id)
-            initial_buy_in_value = Decimal(request.POST.get(f'initial_buy_in_{player_id}', '0'))  # 🛠 Korrektur des Variablennamens
-
-            # Überprüfen, ob der Spieler bereits eine EventParticipation hat
-            existing_participation = EventParticipation.objects.filter(event=event, player=player).first()
-            
-            if existing_participation:
-                # Falls es bereits ein initial_buy_in gibt, überspringen wir es beim Re-Buy
-                if existing_participation.initial_buy_in > 0:
-                    continue  # Wenn es bereits ein initial_buy_in gibt, überspringen wir diesen Spieler
-                else:
-                    # Falls es kein initial_buy_in gibt, dann ist es ein Re-Buy
-                    re_buy_value = Decimal(request.POST.get(f're_buy_{player_id}', '0'))
-                    existing_participation.re_buy = re_buy_value  # Setze den Re-Buy-Wert
-                    existing_participation.save()
-                    total_re_buy += re_buy_value  # Füge den Re-Buy zur Gesamtzahl hinzu
-            else:
-                # Erstelle EventParticipation mit initial buy-in value (nur beim ersten Mal)
-                EventParticipation.objects.create(
-                    event=event, 
-                    player=player,
-                    initial_buy_in=initial_buy_in_value if initial_buy_in_value > 0 else Decimal('0.00')  # Nur wenn der Wert > 0 ist
-                )
 
-                # Summe der Initial-Buy-Ins berechnen (nur für den ersten Buy-In)
-                if initial_buy_in_value > 0:
-                    total_initial_buy_in += initial_buy_in_value
+        # player_id -> (initial_buy_in, re_buy); registration happens in one batch (see poker_data/registration.py)
+        entries = {}
+        try:
+            for player_id in selected_players:
+                entries[int(player_id)] = (
+                    Decimal(request.POST.get(f'initial_buy_in_{player_id}') or '0'),
+                    Decimal(request.POST.get(f're_buy_{player_id}') or '0'),
+                )
+        except (ValueError, InvalidOperation):
+            messages.error(request, "Ungültige Spieler- oder Buy-In-Angabe!")
+            return redirect('add_players', event_id=event.id)
 
-        # Pot-Update: Subtrahiere die gesamten Initial Buy-Ins und Re-Buys
-        event.remaining_chips -= (total_initial_buy_in + total_re_buy)
-        event.save()
+        try:
+            register_participants(event, entries)
+        except chips.InsufficientChips as e:
+            messages.error(request, str(e))
+            return redirect('add_players', event_id=event.id)
 
         # Redirect to home after adding players
         return redirect('home')
@@ -178,55 +369,152 @@ def add_players(request, event_id):
 # View für Re-Buys (keine Initial Buy-Ins mehr)
 def re_buy(request, event_id):
     event = get_object_or_404(Event, id=event_id)
-    participations = EventParticipation.objects.filter(event=event)
+    participations = EventParticipation.objects.filter(event=event).with_player().order_by('id')
 
     # Formular-Set nur für 're_buy', kein 'initial_buy_in'
     ReBuyFormSet = modelformset_factory(
         EventParticipation,
+        formset=LoadedModelFormSet,  # die IDs der Zeilen ohne eine Query pro Zeile prüfen
         fields=('re_buy',),  # Nur das Re-Buy-Feld
         extra=0
     )
 
     if request.method == 'POST':
-        print("POST-Daten:", request.POST)
+        if not event.active:
+            messages.error(request, "Das Event ist beendet, Re-Buys sind nicht mehr möglich!")
+            return redirect('home')
 
         formset = ReBuyFormSet(request.POST, queryset=participations)
 
         if formset.is_valid():
-            instances = formset.save(commit=False)
-            print("Formset ist gültig, speichere Daten...")
-
-            with transaction.atomic():
-                total_re_buy = Decimal('0.00')
-
-                for form in formset:
-                    participation = form.save(commit=False)
-                    re_buy = Decimal(form.cleaned_data.get('re_buy', '0.00'))  # Verhindert NoneType-Fehler
-
-                    # Re-Buy nur speichern, wenn der Wert gesetzt wurde
-                    if re_buy > Decimal('0.00'):
-                        if event.remaining_chips < re_buy:
-                            messages.error(request, "Nicht genügend Chips im Event für dieses Re-Buy!")
-                            return redirect('re_buy', event_id=event.id)
-
-                        total_re_buy += re_buy  # Summe der Re-Buys berechnen
-                        participation.re_buy += re_buy  # Re-Buy zum bestehenden Wert hinzufügen
-                        
-                    participation.save()
-
-                # Pot-Update nach allen Änderungen
-                event.remaining_chips -= total_re_buy  # Remaining-Chips nach Re-Buys aktualisieren
-                event.save()
+            # Das Feld zeigt den bisherigen Re-Buy-Stand; gebucht wird nur die Erhöhung
+            amounts = {}
+            for form in formset:
+                if not form.has_changed():
+                    continue
+                increase = (form.cleaned_data.get('re_buy') or Decimal('0.00')) - form.initial['re_buy']
+                if increase < 0:
+                    messages.error(request, "Re-Buys können nicht reduziert werden!")
+                    return redirect('re_buy', event_id=event.id)
+                if increase > 0:  # unveränderte Zeilen buchen nichts
+                    amounts[form.instance.player_id] = increase
+
+            try:
+                chips.re_buy(event.id, amounts)  # Ledger + atomares Update von remaining_chips
+            except chips.InsufficientChips as e:
+                messages.error(request, str(e))
+                return redirect('re_buy', event_id=event.id)
 
             messages.success(request, "Re-Buy erfolgreich gespeichert!")  # Erfolgsmeldung
             return redirect('home')  # Weiterleitung zur Startseite
 
         else:
             messages.error(request, "Fehler beim Speichern der Re-Buys!")  # Fehler ausgeben
-            print("Formset Fehler:", formset.errors)  # Debugging in der Konsole
-            
+
     else:
         formset = ReBuyFormSet(queryset=participations)
 
     return render(request, 're_buy.html', {'formset': formset, 'event': event})
 
+
+# JSON endpoint for registering many players at once:
+# {"players": [{"player_id": 1, "initial_buy_in": "50", "re_buy": "0"}, ...]}
+@require_POST
+def add_players_api(request, event_id):
+    event = get_object_or_404(Event, id=event_id)
+
+    try:
+        payload = json.loads(request.body)
+        entries = {
+            int(entry['player_id']): (
+                Decimal(str(entry.get('initial_buy_in', '0'))),
+                Decimal(str(entry.get('re_buy', '0'))),
+            )
+            for entry in payload['players']
+        }
+    except (ValueError, KeyError, TypeError, AttributeError, InvalidOperation):
+        return JsonResponse({'error': 'Invalid payload'}, status=400)
+
+    try:
+        result = register_participants(event, entries)
+    except chips.InsufficientChips as e:
+        return JsonResponse({'error': str(e)}, status=409)
+    event.refresh_from_db(fields=['remaining_chips'])
+    return JsonResponse({
+        'created': result['created'],
+        'updated': result['updated'],
+        'skipped': result['skipped'],
+        'unknown': result['unknown'],
+        'total_buy_in': str(result['total_buy_in']),
+        'remaining_chips': str(event.remaining_chips),
+    })
+
+
+# JSON endpoint for re-buys; only the players that re-bought are sent:
+# {"re_buys": {"<player_id>": "25", ...}}
+# Books all amounts with one chip-ledger insert, one remaining_chips decrement and one
+# participation UPDATE (see poker_data/chips.py). Used by the Re-Buy buttons on the home page.
+@require_POST
+def re_buy_api(request, event_id):
+    event = get_object_or_404(Event, id=event_id)
+    if not event.active:
+        return JsonResponse({'error': 'The event has ended'}, status=409)
+
+    try:
+        payload = json.loads(request.body)
+        amounts = {int(player_id): Decimal(str(amount)) for player_id, amount in payload['re_buys'].items()}
+    except (ValueError, KeyError, TypeError, AttributeError, InvalidOperation):
+        return JsonResponse({'error': 'Invalid payload'}, status=400)
+    if not amounts or any(not amount.is_finite() or amount <= 0 for amount in amounts.values()):
+        return JsonResponse({'error': 'Re-buy amounts must be positive'}, status=400)
+
+    try:
+        chips.re_buy(event.id, amounts)
+    except chips.InsufficientChips as e:
+        return JsonResponse({'error': str(e)}, status=409)
+    except EventParticipation.DoesNotExist as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    event.refresh_from_db(fields=['remaining_chips'])
+    participations = (
+        EventParticipation.objects.filter(event=event, player_id__in=amounts).with_total_buy_in()
+        .values_list('player_id', 'total_buy_in')
+    )
+    return JsonResponse({
+        'remaining_chips': str(event.remaining_chips),
+        # SQLite returns the sum unquantized (60.5), keep two places like the other amounts
+        'players': [{'id': player_id, 'total_buy_in': f'{total:.2f}'} for player_id, total in participations],
+    })
+
+
+# Server-sent events for the active event(s): remaining chips, players and buy-ins.
+# Needs an ASGI server (e.g. `uvicorn poker_events.asgi:application`); under WSGI the
+# endless stream would block a worker thread.
+async def live_events(request):
+    subscriber = live.broadcaster.subscribe()
+
+    async def stream():
+        try:
+            # Current state first, then every change pushed by poker_data.live.notify
+            async for event_id in Event.objects.filter(active=True).values_list('id', flat=True):
+                yield live.format_sse(await sync_to_async(live.event_snapshot)(event_id))
+            queue = subscriber[1]
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            live.broadcaster.unsubscribe(subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # keep reverse proxies from buffering the stream
+    return response
+
+
+# Request metrics of this process in Prometheus text format (see poker_data/metrics.py)
+def metrics_view(request):
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', []):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
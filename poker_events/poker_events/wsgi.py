@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poker_events.settings')
+# WAL, busy_timeout and persistent connections for the server (see DB_PROFILES in settings.py)
+os.environ.setdefault('POKER_DB_PROFILE', 'tuned')
 
 application = get_wsgi_application()
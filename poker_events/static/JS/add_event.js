@@ -16,4 +16,24 @@ document.addEventListener('DOMContentLoaded', function () {
       hostPlayerGroup.style.display = 'block'
     }
   })
-})
\ No newline at end of file
+})
+
+// Replace the listed host players with the search results, keeping the current selection
+document.addEventListener('DOMContentLoaded', function () {
+  const select = document.getElementById('host_player')
+  const recent = Array.from(select.options).slice(1)
+
+  searchPlayers(document.getElementById('host_player_search'), function (players) {
+    const selected = select.selectedOptions[0]
+    const options = players.length ? players.map(function (player) {
+      return new Option(player.name, player.id)
+    }) : recent
+    Array.from(select.options).slice(1).forEach(function (option) {
+      if (option !== selected) option.remove()
+    })
+    options.forEach(function (option) {
+      if (!selected || option.value !== selected.value) select.add(option)
+    })
+    if (players.length && !select.value) select.selectedIndex = 1
+  })
+})
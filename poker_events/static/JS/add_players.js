@@ -2,4 +2,47 @@
  document.getElementById('check_all').addEventListener('click', function () {
   const checkboxes = document.querySelectorAll('input[name="players"]')
   checkboxes.forEach((checkbox) => (checkbox.checked = this.checked));
-});
\ No newline at end of file
+});
+
+// Players found by the search are added to the list, already checked
+function addPlayer (player) {
+  const existing = document.getElementById(`player_${player.id}`)
+  if (existing) {
+    existing.checked = true
+    return
+  }
+  const row = document.createElement('div')
+  row.className = 'form-check ms-3'
+  row.innerHTML = '<input type="checkbox" name="players" class="form-check-input" checked />' +
+    '<label class="form-check-label"></label><br>' +
+    '<label class="ml-2">Buy-In:</label>' +
+    '<input type="number" class="form-control mt-1 w-25" step="5" min="0" value="0"/>'
+  const [checkbox, nameLabel, buyInLabel, buyIn] = row.querySelectorAll('input, label')
+  checkbox.value = player.id
+  checkbox.id = `player_${player.id}`
+  nameLabel.htmlFor = checkbox.id
+  nameLabel.textContent = player.name
+  buyIn.name = buyIn.id = `initial_buy_in_${player.id}`
+  buyInLabel.htmlFor = buyIn.id
+  document.getElementById('player_list').prepend(row)
+}
+
+const playerSearch = document.getElementById('player_search')
+const searchResults = document.getElementById('player_search_results')
+
+searchPlayers(playerSearch, function (players) {
+  searchResults.replaceChildren(...players.map(function (player) {
+    const item = document.createElement('li')
+    const button = document.createElement('button')
+    button.type = 'button'
+    button.className = 'btn btn-link p-0'
+    button.textContent = player.name
+    button.addEventListener('click', function () {
+      addPlayer(player)
+      playerSearch.value = ''
+      searchResults.replaceChildren()
+    })
+    item.appendChild(button)
+    return item
+  }))
+})
@@ -0,0 +1,44 @@
+// "Show more" for the rankings on the home page: loads the next page from /api/leaderboards/<board>/
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('[data-leaderboard-more]').forEach(function (button) {
+    const list = button.previousElementSibling
+
+    button.addEventListener('click', function () {
+      button.disabled = true
+      const url = `${button.dataset.url}?after=${encodeURIComponent(button.dataset.next)}`
+
+      fetch(url, { headers: { Accept: 'application/json' } })
+        .then(function (response) {
+          if (!response.ok) throw new Error(`HTTP ${response.status}`)
+          return response.json()
+        })
+        .then(function (page) {
+          let rank = list.children.length
+          page.players.forEach(function (player) {
+            rank += 1
+            const item = document.createElement('li')
+            item.className = 'd-flex justify-content-start align-items-center mb-3'
+            item.innerHTML = '<div class="rank col-1"><strong></strong></div>' +
+              '<div class="player-name col-6"></div><div class="earnings col-3 text-end"></div>'
+            item.querySelector('strong').textContent = `${rank}.`
+            const link = document.createElement('a')
+            link.href = `/players/${player.id}/`
+            link.textContent = player.name
+            item.querySelector('.player-name').appendChild(link)
+            item.querySelector('.earnings').textContent = `€${Number(player.earnings).toFixed(2)}`
+            list.appendChild(item)
+          })
+
+          if (page.next) {
+            button.dataset.next = page.next
+            button.disabled = false
+          } else {
+            button.remove()
+          }
+        })
+        .catch(function () {
+          button.disabled = false
+        })
+    })
+  })
+})
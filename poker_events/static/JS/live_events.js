@@ -0,0 +1,29 @@
+// Live updates for the active event cards on the home page (server-sent events from /live/events/)
+document.addEventListener('DOMContentLoaded', function () {
+  const script = document.querySelector('script[data-url][src*="live_events"]')
+  if (!window.EventSource || !script) return
+
+  const source = new EventSource(script.dataset.url)
+
+  source.addEventListener('event', function (message) {
+    const snapshot = JSON.parse(message.data)
+    const card = document.querySelector(`[data-live-event="${snapshot.id}"]`)
+
+    // Event started or ended, or a player joined/left: reload once for the full layout
+    if (!card) {
+      if (snapshot.active) window.location.reload()
+      return
+    }
+    const shown = card.querySelectorAll('[data-live-player]')
+    if (!snapshot.active || shown.length !== snapshot.players.length) {
+      window.location.reload()
+      return
+    }
+
+    card.querySelector('[data-live="remaining_chips"]').textContent = Number(snapshot.remaining_chips).toFixed(2)
+    snapshot.players.forEach(function (player) {
+      const buyIn = card.querySelector(`[data-live-player="${player.id}"] [data-live="total_buy_in"]`)
+      if (buyIn) buyIn.textContent = Number(player.total_buy_in).toFixed(2)
+    })
+  })
+})
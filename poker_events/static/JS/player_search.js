@@ -0,0 +1,26 @@
+// Player search for add_event/add_players: the pages only render recently active players,
+// everyone else is fetched by name prefix from /api/players/search/?q=<prefix>
+function searchPlayers (input, onResults) {
+  let timer = null
+  let latest = 0
+
+  input.addEventListener('input', function () {
+    clearTimeout(timer)
+    timer = setTimeout(function () {
+      const term = input.value.trim()
+      if (!term) return onResults([])
+      const request = ++latest
+      const url = `${input.dataset.searchUrl}?q=${encodeURIComponent(term)}&limit=20`
+
+      fetch(url, { headers: { Accept: 'application/json' } })
+        .then(function (response) {
+          if (!response.ok) throw new Error(`HTTP ${response.status}`)
+          return response.json()
+        })
+        .then(function (data) {
+          if (request === latest) onResults(data.players) // ignore answers to older keystrokes
+        })
+        .catch(function () {})
+    }, 200)
+  })
+}
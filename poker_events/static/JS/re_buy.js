@@ -0,0 +1,39 @@
+// Re-Buy buttons on the home page: book a single player's re-buy without the full re-buy form
+// (falls back to the form page when JavaScript is off)
+function csrfToken() {
+  const cookie = document.cookie.split('; ').find((row) => row.startsWith('csrftoken='))
+  return cookie ? decodeURIComponent(cookie.split('=')[1]) : ''
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('[data-re-buy-url]').forEach(function (button) {
+    button.addEventListener('click', function (event) {
+      event.preventDefault()
+      const amount = window.prompt('Re-Buy amount (€):')
+      if (amount === null || amount.trim() === '') return
+
+      const card = button.closest('[data-live-event]')
+      fetch(button.dataset.reBuyUrl, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken() },
+        body: JSON.stringify({ re_buys: { [button.dataset.player]: amount.replace(',', '.') } })
+      })
+        .then(function (response) {
+          return response.json().then(function (data) {
+            if (!response.ok) throw new Error(data.error)
+            return data
+          })
+        })
+        .then(function (data) {
+          card.querySelector('[data-live="remaining_chips"]').textContent = Number(data.remaining_chips).toFixed(2)
+          data.players.forEach(function (player) {
+            const buyIn = card.querySelector(`[data-live-player="${player.id}"] [data-live="total_buy_in"]`)
+            if (buyIn) buyIn.textContent = Number(player.total_buy_in).toFixed(2)
+          })
+        })
+        .catch(function (error) {
+          window.alert(error.message)
+        })
+    })
+  })
+})